@@ -0,0 +1,18 @@
+"""Record the model version on predictions"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('predictions', sa.Column('model_version', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('predictions', 'model_version')
@@ -0,0 +1,35 @@
+"""Unique (match, model type, model version) key for prediction upserts"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the newest of any duplicated versioned predictions
+    op.execute(
+        """
+        DELETE FROM predictions
+        WHERE model_version IS NOT NULL
+          AND id NOT IN (
+            SELECT MAX(id) FROM predictions
+            WHERE model_version IS NOT NULL
+            GROUP BY match_id, model_type, model_version
+          )
+        """
+    )
+    op.create_index(
+        'uq_predictions_match_model_version',
+        'predictions',
+        ['match_id', 'model_type', 'model_version'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_predictions_match_model_version', table_name='predictions')
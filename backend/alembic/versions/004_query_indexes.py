@@ -0,0 +1,26 @@
+"""Composite indexes for the fixture, head-to-head and latest-prediction queries"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_matches_status_match_date', 'matches', ['status', 'match_date'], unique=False)
+    op.create_index(
+        'ix_matches_home_away_date', 'matches', ['home_team_id', 'away_team_id', 'match_date'], unique=False
+    )
+    op.create_index(
+        'ix_predictions_match_model_created', 'predictions', ['match_id', 'model_type', 'created_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_predictions_match_model_created', table_name='predictions')
+    op.drop_index('ix_matches_home_away_date', table_name='matches')
+    op.drop_index('ix_matches_status_match_date', table_name='matches')
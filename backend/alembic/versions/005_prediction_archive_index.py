@@ -0,0 +1,18 @@
+"""Keyset index for paging through the prediction archive"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_predictions_created_at_id', 'predictions', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_predictions_created_at_id', table_name='predictions')
@@ -0,0 +1,25 @@
+"""Sync-state table holding incremental sync watermarks"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sync_state',
+        sa.Column('resource', sa.String(length=50), nullable=False),
+        sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+        sa.Column('last_updated', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('resource')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_state')
@@ -0,0 +1,20 @@
+"""Per-resource job lease on sync_state, so one worker runs each sync"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('sync_state', sa.Column('locked_by', sa.String(length=100), nullable=True))
+    op.add_column('sync_state', sa.Column('locked_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sync_state', 'locked_until')
+    op.drop_column('sync_state', 'locked_by')
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app.config.database import get_db
-from app.schemas.schemas import MatchResponse, MatchDetailedResponse, MatchWithPredictionResponse
-from app.services.database_service import MatchService, PredictionService
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config.database import get_async_db
+from app.schemas.schemas import MatchResponse, MatchDetailedResponse, MatchWithPredictionResponse, MatchPage
+from app.services.async_database_service import AsyncMatchService, AsyncPredictionService
+from app.utils.response_cache import cached_response
+from app.utils.pagination import decode_cursor, split_page
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,58 +13,93 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/matches", tags=["matches"])
 
 
+@router.get("/", response_model=MatchPage)
+async def list_matches(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    status: Optional[str] = Query(None, pattern="^(SCHEDULED|LIVE|FINISHED)$"),
+    team_id: Optional[int] = Query(None),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through the full match history by match date"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def load_page():
+        rows = await AsyncMatchService.list_matches(
+            db, after=after, limit=limit + 1, status=status, team_id=team_id, ascending=order == "asc"
+        )
+        items, next_cursor = split_page(rows, limit, "match_date")
+        return {"items": items, "next_cursor": next_cursor}
+    
+    return await cached_response(request, ["matches", "teams"], MatchPage, load_page)
+
+
 @router.get("/upcoming", response_model=List[MatchDetailedResponse])
 async def get_upcoming_matches(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
     days_ahead: int = Query(10, ge=1, le=30),
     detailed: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get upcoming Premier League matches"""
-    matches = MatchService.get_upcoming_matches(db, days_ahead=days_ahead, limit=limit)
-    return matches
+    return await cached_response(
+        request, ["matches", "teams"], List[MatchDetailedResponse],
+        lambda: AsyncMatchService.get_upcoming_matches(db, days_ahead=days_ahead, limit=limit)
+    )
 
 
 @router.get("/recent", response_model=List[MatchDetailedResponse])
 async def get_recent_matches(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
     days_back: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get recent completed matches"""
-    matches = MatchService.get_recent_matches(db, days_back=days_back, limit=limit)
-    return matches
+    return await cached_response(
+        request, ["matches", "teams"], List[MatchDetailedResponse],
+        lambda: AsyncMatchService.get_recent_matches(db, days_back=days_back, limit=limit)
+    )
 
 
 @router.get("/{match_id}", response_model=MatchWithPredictionResponse)
-async def get_match_detail(match_id: int, db: Session = Depends(get_db)):
+async def get_match_detail(match_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get detailed match information with predictions"""
-    match = MatchService.get_match(db, match_id)
-    if not match:
-        raise HTTPException(status_code=404, detail="Match not found")
-    
-    predictions = PredictionService.get_match_predictions(db, match_id)
-    
-    match_dict = {
-        **match.__dict__,
-        "home_team": match.home_team,
-        "away_team": match.away_team,
-        "predictions": predictions
-    }
+    async def load_match():
+        match = await AsyncMatchService.get_match(db, match_id)
+        if not match:
+            raise HTTPException(status_code=404, detail="Match not found")
+        
+        predictions = await AsyncPredictionService.get_match_predictions(db, match_id)
+        
+        return {
+            **match.__dict__,
+            "home_team": match.home_team,
+            "away_team": match.away_team,
+            "predictions": predictions
+        }
     
-    return match_dict
+    return await cached_response(
+        request, ["matches", "teams", f"predictions:{match_id}"], MatchWithPredictionResponse, load_match
+    )
 
 
 @router.get("/{match_id}/predictions")
-async def get_match_predictions(match_id: int, db: Session = Depends(get_db)):
+async def get_match_predictions(match_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all predictions for a match"""
     from app.schemas.schemas import PredictionResponse
     
-    match = MatchService.get_match(db, match_id)
+    match = await AsyncMatchService.get_match(db, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    predictions = PredictionService.get_match_predictions(db, match_id)
+    predictions = await AsyncPredictionService.get_match_predictions(db, match_id)
     
     return {
         "match_id": match_id,
@@ -74,13 +111,13 @@ async def get_match_predictions(match_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{match_id}/head-to-head")
-async def get_head_to_head(match_id: int, limit: int = Query(10, ge=1, le=30), db: Session = Depends(get_db)):
+async def get_head_to_head(match_id: int, limit: int = Query(10, ge=1, le=30), db: AsyncSession = Depends(get_async_db)):
     """Get head-to-head history for teams in a match"""
-    match = MatchService.get_match(db, match_id)
+    match = await AsyncMatchService.get_match(db, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    h2h = MatchService.head_to_head(db, match.home_team_id, match.away_team_id, limit=limit)
+    h2h = await AsyncMatchService.head_to_head(db, match.home_team_id, match.away_team_id, limit=limit)
     
     home_wins = sum(1 for m in h2h if m.home_team_id == match.home_team_id and m.home_goals > m.away_goals)
     away_wins = sum(1 for m in h2h if m.home_team_id == match.home_team_id and m.home_goals < m.away_goals)
@@ -95,5 +132,5 @@ async def get_head_to_head(match_id: int, limit: int = Query(10, ge=1, le=30), d
             "draws": draws,
             "total_matches": len(h2h)
         },
-        "recent_matches": h2h
+        "recent_matches": [MatchResponse.model_validate(m) for m in h2h]
     }
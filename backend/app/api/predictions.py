@@ -1,57 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from app.config.database import get_db
-from app.schemas.schemas import PredictionResponse
-from app.services.database_service import MatchService, PredictionService, TeamService
-from app.ml.poisson_model import PoissonModel
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional
+from app.config.database import AsyncSessionLocal, get_async_db
+from app.config.settings import settings
+from app.schemas.schemas import PredictionResponse, PredictionPage
+from app.services.async_database_service import AsyncMatchService, AsyncPredictionService, AsyncTeamService
+from app.services.database_service import prediction_cache
+from app.services.model_service import ModelService
+from app.ml.model_registry import ModelVersion, model_registry
+from app.ml.season_simulator import SeasonSimulator
+from app.models.models import Match
+from app.utils.single_flight import SingleFlight
+from app.utils.pagination import decode_cursor, split_page
+from concurrent.futures import Executor
+from functools import partial
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/predict", tags=["predictions"])
 
-# Global model instance (in production, use model registry)
-poisson_model = None
+ModelService.register_models(model_registry)
 
+# Concurrent requests for the same prediction work share one computation
+prediction_flights = SingleFlight()
 
-async def get_poisson_model(db: Session = Depends(get_db)):
-    """Get or initialize Poisson model"""
-    global poisson_model
-    
-    if poisson_model is None or not poisson_model.is_trained:
-        poisson_model = PoissonModel()
-        
-        # Get teams and recent matches for training
-        teams = TeamService.get_all_teams(db)
-        recent_matches = MatchService.get_recent_matches(db, days_back=365, limit=1000)
-        
-        # Train model
-        poisson_model.estimate_parameters(recent_matches, teams)
-        logger.info("Poisson model trained")
+
+async def get_poisson_model() -> ModelVersion:
+    """Current Poisson model version, trained on first use"""
+    return await model_registry.ensure("POISSON")
+
+
+def get_simulation_pool(request: Request) -> Optional[Executor]:
+    """Process pool started by the app lifespan; without one simulations run inline"""
+    return getattr(request.app.state, "simulation_pool", None)
+
+
+async def _with_session(work, *args):
+    """
+    Run shared flight work on a session the flight owns.
     
-    return poisson_model
+    The flight outlives a cancelled leader, whose request session is closed
+    when it goes away, so it must not borrow that session.
+    """
+    async with AsyncSessionLocal() as db:
+        return await work(db, *args)
 
 
 @router.post("/match/{match_id}")
 async def predict_match(
     match_id: int,
-    db: Session = Depends(get_db),
-    model: PoissonModel = Depends(get_poisson_model)
+    model_type: str = Query("POISSON", pattern="^(POISSON|ENSEMBLE)$"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """Predict outcome for a specific match"""
     
-    match = MatchService.get_match(db, match_id)
+    match = await AsyncMatchService.get_match(db, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    # Get existing prediction or create new one
-    existing_prediction = PredictionService.get_latest_prediction(db, match_id, "POISSON")
+    # Pin one published version for the whole request
+    model_version = await model_registry.ensure(model_type)
+    
+    return await prediction_flights.do(
+        ("predict", match_id, model_type, model_version.version),
+        partial(_with_session, _get_or_create_prediction, match, model_type, model_version)
+    )
+
+
+async def _get_or_create_prediction(
+    db: AsyncSession,
+    match: Match,
+    model_type: str,
+    model_version: ModelVersion
+) -> Dict[str, Any]:
+    """Reuse the prediction from this model version or create a new one"""
+    match_id = match.id
+    existing_prediction = await AsyncPredictionService.get_latest_prediction(
+        db, match_id, model_type, model_version=model_version.version
+    )
     if existing_prediction:
         return {
             "match_id": match_id,
             "home_team": match.home_team.name,
             "away_team": match.away_team.name,
+            "model_version": existing_prediction.model_version,
             "prediction": {
                 "home_win_prob": existing_prediction.home_win_prob,
                 "draw_prob": existing_prediction.draw_prob,
@@ -63,8 +97,7 @@ async def predict_match(
         }
     
     # Generate new prediction
-    prediction_data = model.predict_match(match.home_team_id, match.away_team_id)
-    market_data = model.predict_markets(match.home_team_id, match.away_team_id)
+    prediction_data = model_version.model.predict(match.home_team_id, match.away_team_id)
     
     # Calculate confidence
     confidence = max(
@@ -77,7 +110,8 @@ async def predict_match(
     from app.schemas.schemas import PredictionCreate
     pred_create = PredictionCreate(
         match_id=match_id,
-        model_type="POISSON",
+        model_type=model_type,
+        model_version=model_version.version,
         home_win_prob=prediction_data["home_win_prob"],
         draw_prob=prediction_data["draw_prob"],
         away_win_prob=prediction_data["away_win_prob"],
@@ -85,15 +119,21 @@ async def predict_match(
         predicted_away_score=prediction_data["predicted_away_score"],
         most_likely_score=prediction_data["most_likely_score"],
         confidence_score=confidence,
-        **market_data
+        over_2_5_goals=prediction_data["over_2_5_goals"],
+        under_2_5_goals=prediction_data["under_2_5_goals"],
+        btts_yes=prediction_data["btts_yes"],
+        btts_no=prediction_data["btts_no"],
+        home_clean_sheet=prediction_data["home_clean_sheet"],
+        away_clean_sheet=prediction_data["away_clean_sheet"],
     )
     
-    db_pred = PredictionService.create_prediction(db, pred_create)
+    db_pred = await AsyncPredictionService.create_prediction(db, pred_create)
     
     return {
         "match_id": match_id,
         "home_team": match.home_team.name,
         "away_team": match.away_team.name,
+        "model_version": db_pred.model_version,
         "prediction": {
             "home_win_prob": db_pred.home_win_prob,
             "draw_prob": db_pred.draw_prob,
@@ -113,70 +153,76 @@ async def predict_match(
 async def predict_batch(
     days_ahead: int = 10,
     background_tasks: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db),
-    model: PoissonModel = Depends(get_poisson_model)
+    model_version: ModelVersion = Depends(get_poisson_model)
 ) -> Dict[str, Any]:
     """Predict all upcoming matches for next N days"""
     
-    matches = MatchService.get_upcoming_matches(db, days_ahead=days_ahead, limit=100)
-    
-    predictions = []
-    for match in matches:
-        try:
-            prediction_data = model.predict_match(match.home_team_id, match.away_team_id)
-            market_data = model.predict_markets(match.home_team_id, match.away_team_id)
-            
-            confidence = max(
-                prediction_data["home_win_prob"],
-                prediction_data["draw_prob"],
-                prediction_data["away_win_prob"]
-            )
-            
-            from app.schemas.schemas import PredictionCreate
-            pred_create = PredictionCreate(
-                match_id=match.id,
-                model_type="POISSON",
-                home_win_prob=prediction_data["home_win_prob"],
-                draw_prob=prediction_data["draw_prob"],
-                away_win_prob=prediction_data["away_win_prob"],
-                predicted_home_score=prediction_data["predicted_home_score"],
-                predicted_away_score=prediction_data["predicted_away_score"],
-                most_likely_score=prediction_data["most_likely_score"],
-                confidence_score=confidence,
-                **market_data
-            )
-            
-            db_pred = PredictionService.create_prediction(db, pred_create)
-            
-            predictions.append({
-                "match_id": match.id,
-                "home_team": match.home_team.name,
-                "away_team": match.away_team.name,
-                "predicted_score": db_pred.most_likely_score,
-                "confidence": db_pred.confidence_score
-            })
-        except Exception as e:
-            logger.error(f"Error predicting match {match.id}: {e}")
-            continue
+    return await prediction_flights.do(
+        ("batch", days_ahead, model_version.version),
+        partial(_with_session, _predict_upcoming, days_ahead, model_version)
+    )
+
+
+async def _predict_upcoming(db: AsyncSession, days_ahead: int, model_version: ModelVersion) -> Dict[str, Any]:
+    """Score and store predictions for the upcoming slate"""
+    try:
+        matches, stored = await ModelService.predict_upcoming(db, model_version, days_ahead)
+    except Exception as e:
+        logger.error(f"Error storing batch predictions: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Could not store predictions")
+    
+    predictions = [
+        {
+            "match_id": match.id,
+            "home_team": match.home_team.name,
+            "away_team": match.away_team.name,
+            "predicted_score": db_pred.most_likely_score,
+            "confidence": db_pred.confidence_score
+        }
+        for match, db_pred in zip(matches, stored)
+    ]
     
     return {
+        "model_version": model_version.version,
         "predictions_count": len(predictions),
         "predictions": predictions
     }
 
 
+@router.get("/archive", response_model=PredictionPage)
+async def get_prediction_archive(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    model_type: Optional[str] = Query(None),
+    match_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> PredictionPage:
+    """Page through every stored prediction, newest first"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    rows = await AsyncPredictionService.list_predictions(
+        db, after=after, limit=limit + 1, model_type=model_type, match_id=match_id
+    )
+    items, next_cursor = split_page(rows, limit, "created_at")
+    return PredictionPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/match/{match_id}/detailed")
 async def get_detailed_prediction(
     match_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """Get detailed prediction for a match with all markets"""
     
-    match = MatchService.get_match(db, match_id)
+    match = await AsyncMatchService.get_match(db, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    prediction = PredictionService.get_latest_prediction(db, match_id)
+    prediction = await AsyncPredictionService.get_latest_prediction(db, match_id)
     if not prediction:
         raise HTTPException(status_code=404, detail="No prediction found for this match")
     
@@ -187,6 +233,7 @@ async def get_detailed_prediction(
         "match_date": match.match_date,
         "prediction": {
             "model_type": prediction.model_type,
+            "model_version": prediction.model_version,
             "outcomes": {
                 "home_win": round(prediction.home_win_prob, 4),
                 "draw": round(prediction.draw_prob, 4),
@@ -208,3 +255,93 @@ async def get_detailed_prediction(
             "created_at": prediction.created_at,
         }
     }
+
+
+@router.get("/season")
+async def simulate_season(
+    simulations: int = Query(100000, ge=1000, le=1000000),
+    seed: Optional[int] = Query(None),
+    model_version: ModelVersion = Depends(get_poisson_model),
+    pool: Optional[Executor] = Depends(get_simulation_pool)
+) -> Dict[str, Any]:
+    """Simulate the rest of the season and return title, top-4 and relegation odds"""
+    
+    return await prediction_flights.do(
+        ("season", simulations, seed, model_version.version),
+        partial(_with_session, _simulate_season, simulations, seed, model_version, pool)
+    )
+
+
+async def _simulate_season(
+    db: AsyncSession,
+    simulations: int,
+    seed: Optional[int],
+    model_version: ModelVersion,
+    pool: Optional[Executor]
+) -> Dict[str, Any]:
+    """Run the Monte Carlo simulation off the event loop"""
+    teams = await AsyncTeamService.get_all_teams(db)
+    team_ids = {team.id for team in teams}
+    fixtures = [
+        match for match in await AsyncMatchService.get_remaining_matches(db)
+        if match.home_team_id in team_ids and match.away_team_id in team_ids
+    ]
+    
+    simulator = SeasonSimulator(model_version.model, executor=pool, chunk_size=settings.simulation_chunk_size)
+    run = partial(
+        simulator.simulate,
+        team_ids=[team.id for team in teams],
+        current_points=[3 * team.wins + team.draws for team in teams],
+        current_goal_difference=[team.goals_for - team.goals_against for team in teams],
+        current_goals_for=[team.goals_for for team in teams],
+        home_team_ids=[match.home_team_id for match in fixtures],
+        away_team_ids=[match.away_team_id for match in fixtures],
+        n_simulations=simulations,
+        seed=seed,
+    )
+    
+    # Keep the event loop free while the shared worker processes crunch;
+    # the thread only submits chunks and waits
+    results = await asyncio.get_running_loop().run_in_executor(None, run)
+    names = {team.id: team.name for team in teams}
+    
+    return {
+        "model_version": model_version.version,
+        "simulations": simulations,
+        "remaining_fixtures": len(fixtures),
+        "teams": sorted(
+            ({"team": names[result["team_id"]], **result} for result in results),
+            key=lambda result: result["expected_points"],
+            reverse=True
+        ),
+    }
+
+
+@router.get("/models")
+async def list_models() -> Dict[str, Any]:
+    """Published model versions, newest first"""
+    return {
+        name: [entry.info() for entry in model_registry.versions(name)]
+        for name in model_registry.names
+    }
+
+
+@router.post("/models/{model_name}/rebuild", status_code=202)
+async def rebuild_model(model_name: str) -> Dict[str, Any]:
+    """Start building a new model version in the background"""
+    if model_name not in model_registry.names:
+        raise HTTPException(status_code=404, detail="Unknown model")
+    
+    model_registry.build(model_name)
+    current = model_registry.get(model_name)
+    return {
+        "model": model_name,
+        "status": "building",
+        "current_version": current.version if current else None,
+    }
+
+
+@router.get("/cache/stats")
+async def get_prediction_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the in-memory prediction cache"""
+    return prediction_cache.stats()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.config.database import get_db
+from app.config.database import get_async_db
 from app.schemas.schemas import TeamResponse
-from app.services.database_service import TeamService
+from app.services.async_database_service import AsyncTeamService, AsyncMatchService
+from app.utils.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,35 +13,38 @@ router = APIRouter(prefix="/api/v1/teams", tags=["teams"])
 
 
 @router.get("/", response_model=List[TeamResponse])
-async def get_all_teams(db: Session = Depends(get_db)):
+async def get_all_teams(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all Premier League teams"""
-    teams = TeamService.get_all_teams(db)
-    return teams
+    return await cached_response(
+        request, ["teams"], List[TeamResponse],
+        lambda: AsyncTeamService.get_all_teams(db)
+    )
 
 
 @router.get("/{team_id}", response_model=TeamResponse)
-async def get_team(team_id: int, db: Session = Depends(get_db)):
+async def get_team(team_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get specific team details"""
-    team = TeamService.get_team(db, team_id)
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-    return team
+    async def load_team():
+        team = await AsyncTeamService.get_team(db, team_id)
+        if not team:
+            raise HTTPException(status_code=404, detail="Team not found")
+        return team
+    
+    return await cached_response(request, ["teams"], TeamResponse, load_team)
 
 
 @router.get("/{team_id}/form")
 async def get_team_form(
     team_id: int,
     matches: int = Query(5, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get team's recent form (last N matches)"""
-    from app.services.database_service import MatchService
-    
-    team = TeamService.get_team(db, team_id)
+    team = await AsyncTeamService.get_team(db, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    recent_matches = MatchService.get_team_recent_matches(db, team_id, limit=matches)
+    recent_matches = await AsyncMatchService.get_team_recent_matches(db, team_id, limit=matches)
     
     form_data = {
         "team_id": team_id,
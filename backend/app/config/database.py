@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config.settings import settings
 
@@ -26,6 +27,33 @@ else:
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+# Async engine for request handlers; the sync engine above is kept for
+# Alembic, data sync and model training, which run off the event loop
+if database_url.startswith("sqlite"):
+    async_engine = create_async_engine(async_database_url(database_url), **engine_kwargs)
+else:
+    async_engine = create_async_engine(
+        async_database_url(database_url),
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        **engine_kwargs,
+    )
+
+# Objects stay usable after commit so responses can be built without reloading
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for declarative models
 Base = declarative_base()
 
@@ -37,3 +65,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
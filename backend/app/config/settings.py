@@ -24,10 +24,42 @@ class Settings(BaseSettings):
     football_data_api_key: str = ""
     football_data_base_url: str = "https://api.football-data.org/v4"
     understat_base_url: str = "https://understat.com/api/v1"
+    football_data_requests_per_minute: float = 10  # provider quota (free tier: 10/min)
+    football_data_burst: int = 1  # requests allowed back to back before throttling
+    football_data_max_concurrency: int = 4  # in-flight requests and pooled connections
+    football_data_max_retries: int = 3  # retries on 429, 5xx and connection errors
+    football_data_timeout_seconds: float = 15.0
+    football_data_cache_dir: str = "./cache/football-data"  # empty to disable the response cache
+    football_data_cache_ttl_seconds: float = 300.0  # reuse responses without validators this long (never for results)
+    football_data_offline: bool = False  # replay cached responses only, never call the API
     
     # Model Configuration
-    model_retrain_interval_days: int = 7
+    model_retrain_interval_days: float = 7
+    model_artifact_path: str = "./models/poisson.model"  # empty to disable saving
     prediction_confidence_threshold: float = 0.55
+    score_grid_tail_tolerance: float = 1e-6  # max scoreline mass left off the Poisson grid
+    model_time_decay_half_life_days: float = 180.0  # weight of a result halves over this many days
+    elo_k_factor: float = 20.0
+    elo_home_advantage: float = 60.0  # rating points added to the home side
+    ensemble_elo_weight: float = 0.25  # share of the Elo model in ENSEMBLE outcome probabilities
+    
+    # Data Sync (runs when an API key or offline mode is configured)
+    sync_enabled: bool = True
+    sync_results_live_interval_seconds: float = 120.0  # while matches are being played
+    sync_results_idle_interval_seconds: float = 3600.0  # otherwise, or until the next kickoff if sooner
+    sync_fixtures_interval_seconds: float = 21600.0
+    sync_standings_interval_seconds: float = 21600.0
+    sync_lease_seconds: float = 900.0  # job lock lifetime if its worker dies mid-run
+    sync_prediction_days_ahead: int = 10  # slate re-predicted after each sync
+    
+    # Response Caching
+    response_cache_ttl_seconds: float = 60.0  # upper bound on staleness across workers
+    prediction_cache_size: int = 4096
+    prediction_cache_ttl_seconds: float = 300.0
+    
+    # Season Simulation
+    simulation_workers: int = 0  # size of the shared simulation pool; 0 = one process per CPU
+    simulation_chunk_size: int = 10000
     
     # Security
     secret_key: str = "your-secret-key-change-in-production"
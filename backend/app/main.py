@@ -1,10 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config.settings import settings
-from app.config.database import engine, Base
+from app.config.database import engine, async_engine, Base
 from app.api import teams, matches, predictions
 from app.services.football_data_service import FootballDataService
+from app.ml.model_registry import model_registry
+from app.ml.season_simulator import create_process_pool
+from app.services.model_service import ModelService
+from app.services.sync_scheduler import SyncScheduler
+from app.utils.query_counter import count_queries
+import asyncio
 import logging
 
 # Configure logging
@@ -28,13 +34,33 @@ async def lifespan(app: FastAPI):
     
     # Initialize services
     football_data_service = FootballDataService()
+    # One long-lived pool shared by every season simulation request
+    app.state.simulation_pool = create_process_pool(settings.simulation_workers or None)
+    
+    # Have models ready before the first request, then keep them fresh
+    await ModelService.warm_up(model_registry)
+    retrain_task = asyncio.create_task(
+        ModelService.retrain_periodically(model_registry, settings.model_retrain_interval_days)
+    )
+    
+    # Keep matches, results and predictions current without an external cron
+    sync_scheduler = None
+    if settings.sync_enabled and (settings.football_data_api_key or settings.football_data_offline):
+        sync_scheduler = SyncScheduler(football_data_service, model_registry)
+        sync_scheduler.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down API")
+    if sync_scheduler:
+        await sync_scheduler.stop()
+    retrain_task.cancel()
     if football_data_service:
         await football_data_service.close()
+    model_registry.shutdown()
+    app.state.simulation_pool.shutdown(cancel_futures=True)
+    await async_engine.dispose()
 
 
 # Create FastAPI app
@@ -55,6 +81,15 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def query_count_header(request: Request, call_next):
+    """Report the number of SQL statements each request executed"""
+    with count_queries() as queries:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(queries.count)
+    return response
+
+
 # Include routers
 app.include_router(teams.router)
 app.include_router(matches.router)
@@ -0,0 +1,163 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class EloModel:
+    """
+    Streaming Elo rating engine for match results.
+
+    Results are applied one at a time in date order, so a full replay is a
+    single pass over the history. The ratings are checkpointed at the start
+    of every matchweek (ISO week), which lets a late or corrected result be
+    handled by rewinding to the checkpoint before it and replaying only the
+    matches from there on.
+    """
+
+    def __init__(
+        self,
+        k_factor: float = 20.0,
+        home_advantage: float = 60.0,
+        initial_rating: float = 1500.0,
+        draw_rate: float = 0.28
+    ):
+        self.model_name = "ELO"
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage  # rating points added to the home side
+        self.initial_rating = initial_rating
+        self.draw_rate = draw_rate  # draw probability between evenly matched sides
+        self.is_trained = False
+
+        self.ratings: Dict[int, float] = {}
+        self.last_match_date: Optional[datetime] = None
+        self.matches_processed = 0
+
+        # (week start, ratings at that point, matches processed) in date order
+        self._checkpoints: List[Tuple[datetime, Dict[int, float], int]] = []
+
+    @staticmethod
+    def matchweek_start(match_date: datetime) -> datetime:
+        """Monday 00:00 of the ISO week containing the date"""
+        day = match_date.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        return day - timedelta(days=day.weekday())
+
+    def expected_score(self, home_team_id: int, away_team_id: int) -> float:
+        """Expected score (win = 1, draw = 0.5) of the home side"""
+        home_rating = self.ratings.get(home_team_id, self.initial_rating)
+        away_rating = self.ratings.get(away_team_id, self.initial_rating)
+        return 1.0 / (1.0 + 10 ** ((away_rating - home_rating - self.home_advantage) / 400.0))
+
+    def apply_result(
+        self,
+        home_team_id: int,
+        away_team_id: int,
+        home_goals: int,
+        away_goals: int,
+        match_date: Optional[datetime] = None
+    ) -> float:
+        """
+        Update both teams' ratings with one result.
+
+        Results must arrive in date order; use rewind_to for older results.
+
+        Returns:
+            Rating points transferred to the home side
+        """
+        if match_date is not None:
+            week = self.matchweek_start(match_date)
+            if not self._checkpoints or week > self._checkpoints[-1][0]:
+                self._checkpoints.append((week, dict(self.ratings), self.matches_processed))
+            self.last_match_date = match_date
+
+        if home_goals > away_goals:
+            actual = 1.0
+        elif home_goals == away_goals:
+            actual = 0.5
+        else:
+            actual = 0.0
+
+        # Scale the update by margin of victory (World Football Elo weighting)
+        margin = abs(home_goals - away_goals)
+        if margin <= 1:
+            multiplier = 1.0
+        elif margin == 2:
+            multiplier = 1.5
+        else:
+            multiplier = (11.0 + margin) / 8.0
+
+        delta = self.k_factor * multiplier * (actual - self.expected_score(home_team_id, away_team_id))
+        self.ratings[home_team_id] = self.ratings.get(home_team_id, self.initial_rating) + delta
+        self.ratings[away_team_id] = self.ratings.get(away_team_id, self.initial_rating) - delta
+        self.matches_processed += 1
+        self.is_trained = True
+        return delta
+
+    def replay(self, matches: Iterable) -> int:
+        """
+        Stream finished matches through the engine.
+
+        Args:
+            matches: Match objects ordered by match_date (e.g. a yield_per query)
+
+        Returns:
+            Number of results applied
+        """
+        applied = 0
+        for match in matches:
+            if match.home_goals is None or match.away_goals is None:
+                continue
+            self.apply_result(
+                match.home_team_id,
+                match.away_team_id,
+                match.home_goals,
+                match.away_goals,
+                match.match_date
+            )
+            applied += 1
+        return applied
+
+    def rewind_to(self, match_date: datetime) -> Optional[datetime]:
+        """
+        Restore the last checkpoint at or before the matchweek of a date.
+
+        Checkpoints after it are discarded, since they will be rebuilt by
+        replaying from the returned date.
+
+        Returns:
+            Date to replay matches from, or None to replay the whole history
+        """
+        week = self.matchweek_start(match_date)
+        i = bisect_right([checkpoint[0] for checkpoint in self._checkpoints], week) - 1
+        if i < 0:
+            self.reset()
+            return None
+
+        week_start, ratings, processed = self._checkpoints[i]
+        del self._checkpoints[i:]
+        self.ratings = dict(ratings)
+        self.matches_processed = processed
+        self.last_match_date = week_start
+        return week_start
+
+    def reset(self) -> None:
+        """Forget all ratings and checkpoints"""
+        self.ratings = {}
+        self._checkpoints = []
+        self.last_match_date = None
+        self.matches_processed = 0
+        self.is_trained = False
+
+    def predict_match(self, home_team_id: int, away_team_id: int) -> Dict:
+        """
+        Home/draw/away probabilities from the rating difference.
+
+        The draw probability peaks at draw_rate for evenly matched sides and
+        shrinks as the expected score moves towards either extreme.
+        """
+        expected = self.expected_score(home_team_id, away_team_id)
+        draw_prob = self.draw_rate * 2.0 * min(expected, 1.0 - expected)
+        return {
+            "home_win_prob": expected - draw_prob / 2.0,
+            "draw_prob": draw_prob,
+            "away_win_prob": 1.0 - expected - draw_prob / 2.0,
+        }
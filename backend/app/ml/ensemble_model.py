@@ -0,0 +1,78 @@
+from typing import Dict
+import numpy as np
+from app.ml.poisson_model import PoissonModel, OUTCOME_FIELDS, MARKET_FIELDS
+from app.ml.elo_model import EloModel
+
+
+class EnsembleModel:
+    """
+    Blend of the Poisson and Elo models.
+
+    Outcome probabilities are a weighted average of both models; scores and
+    markets come from the Poisson model, which is the only one that models
+    goals.
+    """
+
+    def __init__(self, poisson: PoissonModel, elo: EloModel, elo_weight: float = 0.25):
+        self.model_name = "ENSEMBLE"
+        self.poisson = poisson
+        self.elo = elo
+        self.elo_weight = elo_weight
+
+    @property
+    def is_trained(self) -> bool:
+        return self.poisson.is_trained
+
+    def predict(self, home_team_id: int, away_team_id: int) -> Dict:
+        """
+        Predict outcome probabilities and all markets for a fixture.
+
+        Args:
+            home_team_id: ID of home team
+            away_team_id: ID of away team
+
+        Returns:
+            Dictionary keyed like PoissonModel.predict
+        """
+        prediction = self.poisson.predict(home_team_id, away_team_id)
+        if not self.elo.is_trained:
+            return prediction
+
+        elo_prediction = self.elo.predict_match(home_team_id, away_team_id)
+        for field in ("home_win_prob", "draw_prob", "away_win_prob"):
+            prediction[field] = (1 - self.elo_weight) * prediction[field] + self.elo_weight * elo_prediction[field]
+        return prediction
+
+    def predict_many(self, home_team_ids, away_team_ids) -> Dict[str, np.ndarray]:
+        """
+        Predict outcomes and markets for many fixtures at once.
+
+        Args:
+            home_team_ids: Array-like of home team IDs
+            away_team_ids: Array-like of away team IDs, same length
+
+        Returns:
+            Dictionary of arrays keyed like PoissonModel.predict_many
+        """
+        prediction = self.poisson.predict_many(home_team_ids, away_team_ids)
+        if not self.elo.is_trained:
+            return prediction
+
+        elo_predictions = [
+            self.elo.predict_match(home_team_id, away_team_id)
+            for home_team_id, away_team_id in zip(home_team_ids, away_team_ids)
+        ]
+        for field in ("home_win_prob", "draw_prob", "away_win_prob"):
+            elo_probs = np.array([elo_prediction[field] for elo_prediction in elo_predictions], dtype=float)
+            prediction[field] = (1 - self.elo_weight) * prediction[field] + self.elo_weight * elo_probs
+        return prediction
+
+    def predict_match(self, home_team_id: int, away_team_id: int) -> Dict:
+        """Outcome fields of predict"""
+        prediction = self.predict(home_team_id, away_team_id)
+        return {field: prediction[field] for field in OUTCOME_FIELDS}
+
+    def predict_markets(self, home_team_id: int, away_team_id: int) -> Dict:
+        """Market fields of predict"""
+        prediction = self.predict(home_team_id, away_team_id)
+        return {field: prediction[field] for field in MARKET_FIELDS}
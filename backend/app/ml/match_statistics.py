@@ -0,0 +1,188 @@
+import numpy as np
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+SECONDS_PER_DAY = 86400.0
+
+
+class DecayedMatchStatistics:
+    """
+    Exponentially time-weighted sufficient statistics for the Poisson fit.
+
+    The log-linear model's expected goals depend only on the (home, away)
+    pairing, so the weighted log-likelihood of any number of matches reduces
+    to three sums per pairing: total weight and weighted home/away goals.
+    Moving the reference time forward rescales every sum by the same decay
+    factor and new results are appended, so old matches never have to be
+    re-read to refit the model. Each match's contribution is kept by id, so
+    a corrected result replaces the one it was counted with.
+    """
+
+    def __init__(self, half_life_days: float = 180.0, reference_time: Optional[datetime] = None):
+        self.half_life_days = half_life_days
+        self.decay_rate = np.log(2.0) / (half_life_days * SECONDS_PER_DAY)  # per second
+        self.reference_time = reference_time or datetime.utcnow()
+        self.last_updated: Optional[datetime] = None  # newest updated_at seen, for delta queries
+        self.match_count = 0
+
+        self._pair_index: Dict[Tuple[int, int], int] = {}
+        self._home_team_ids = np.empty(0, dtype=np.int64)
+        self._away_team_ids = np.empty(0, dtype=np.int64)
+        self._weights = np.empty(0)
+        self._home_goals = np.empty(0)
+        self._away_goals = np.empty(0)
+        self._match_counts = np.empty(0, dtype=np.int64)
+
+        # match id -> (pair slot, home goals, away goals, match_date, weight, reference time it was counted at)
+        self._contributions: Dict[int, Tuple[int, int, int, datetime, float, datetime]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pair_index)
+
+    def advance_to(self, now: datetime) -> None:
+        """Move the reference time forward, decaying every accumulated sum"""
+        elapsed = (now - self.reference_time).total_seconds()
+        if elapsed <= 0:
+            return
+        factor = np.exp(-self.decay_rate * elapsed)
+        size = len(self)
+        self._weights[:size] *= factor
+        self._home_goals[:size] *= factor
+        self._away_goals[:size] *= factor
+        self.reference_time = now
+
+    def add_match(
+        self,
+        home_team_id: int,
+        away_team_id: int,
+        home_goals: int,
+        away_goals: int,
+        match_date: datetime
+    ) -> Tuple[int, float]:
+        """
+        Accumulate one result, weighted by its age relative to the reference time.
+
+        Returns:
+            The pairing's slot and the weight the result was counted with
+        """
+        age = max((self.reference_time - match_date).total_seconds(), 0.0)
+        weight = float(np.exp(-self.decay_rate * age))
+
+        key = (home_team_id, away_team_id)
+        i = self._pair_index.get(key)
+        if i is None:
+            i = len(self._pair_index)
+            self._ensure_capacity(i + 1)
+            self._pair_index[key] = i
+            self._home_team_ids[i] = home_team_id
+            self._away_team_ids[i] = away_team_id
+
+        self._weights[i] += weight
+        self._home_goals[i] += weight * home_goals
+        self._away_goals[i] += weight * away_goals
+        self._match_counts[i] += 1
+        self.match_count += 1
+        return i, weight
+
+    def remove_match(self, match_id: int) -> bool:
+        """
+        Take a counted match's contribution back out of the sums.
+
+        Returns:
+            Whether the match had been counted
+        """
+        contribution = self._contributions.pop(match_id, None)
+        if contribution is None:
+            return False
+        i, home_goals, away_goals, _, weight, counted_at = contribution
+        weight *= np.exp(-self.decay_rate * (self.reference_time - counted_at).total_seconds())
+
+        self._match_counts[i] -= 1
+        if self._match_counts[i] == 0:
+            # Cleared exactly rather than left with rounding residue
+            self._weights[i] = self._home_goals[i] = self._away_goals[i] = 0.0
+        else:
+            self._weights[i] -= weight
+            self._home_goals[i] -= weight * home_goals
+            self._away_goals[i] -= weight * away_goals
+        self.match_count -= 1
+        return True
+
+    def add_matches(self, matches: Iterable) -> int:
+        """
+        Accumulate finished matches by id.
+
+        A match that was already counted is replaced if its result, teams
+        or date changed (e.g. a corrected score) and skipped otherwise.
+
+        Args:
+            matches: Match objects with id, team IDs, goals, match_date and updated_at
+
+        Returns:
+            Number of matches added or replaced
+        """
+        added = 0
+        for match in matches:
+            updated_at = getattr(match, "updated_at", None)
+            if updated_at is not None and (self.last_updated is None or updated_at > self.last_updated):
+                self.last_updated = updated_at
+
+            previous = self._contributions.get(match.id)
+            if match.home_goals is None or match.away_goals is None:
+                if previous is not None:
+                    self.remove_match(match.id)  # result voided
+                    added += 1
+                continue
+
+            slot = self._pair_index.get((match.home_team_id, match.away_team_id))
+            if previous is not None and previous[:4] == (slot, match.home_goals, match.away_goals, match.match_date):
+                continue
+            self.remove_match(match.id)
+
+            i, weight = self.add_match(
+                match.home_team_id, match.away_team_id, match.home_goals, match.away_goals, match.match_date
+            )
+            self._contributions[match.id] = (
+                i, match.home_goals, match.away_goals, match.match_date, weight, self.reference_time
+            )
+            added += 1
+        return added
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-pairing statistics for fitting.
+
+        Returns:
+            Tuple of (home_team_ids, away_team_ids, weights, mean home goals,
+            mean away goals), where the means are weighted by time decay
+        """
+        size = len(self)
+        weights = self._weights[:size]
+        keep = weights > 0
+        weights = weights[keep]
+        return (
+            self._home_team_ids[:size][keep],
+            self._away_team_ids[:size][keep],
+            weights,
+            self._home_goals[:size][keep] / weights,
+            self._away_goals[:size][keep] / weights,
+        )
+
+    def _ensure_capacity(self, size: int) -> None:
+        """Grow the backing arrays geometrically"""
+        capacity = len(self._weights)
+        if size <= capacity:
+            return
+        new_capacity = max(size, 2 * capacity, 64)
+
+        def grow(array: np.ndarray) -> np.ndarray:
+            grown = np.zeros(new_capacity, dtype=array.dtype)
+            grown[:capacity] = array
+            return grown
+
+        self._home_team_ids = grow(self._home_team_ids)
+        self._away_team_ids = grow(self._away_team_ids)
+        self._weights = grow(self._weights)
+        self._home_goals = grow(self._home_goals)
+        self._away_goals = grow(self._away_goals)
+        self._match_counts = grow(self._match_counts)
@@ -0,0 +1,113 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+import json
+import os
+import struct
+
+# File layout: magic, header length (uint32 LE), JSON header, then raw arrays
+ARTIFACT_MAGIC = b"PAMODEL\x00"
+ARTIFACT_FORMAT_VERSION = 1
+
+# Array offsets are aligned so memory-mapped views are aligned for any dtype
+ARRAY_ALIGNMENT = 64
+
+_LENGTH = struct.Struct("<I")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def write_artifact(filepath: str, metadata: Dict, arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Write a model artifact: a small JSON header followed by raw arrays.
+
+    The file is written next to the destination and renamed into place, so
+    processes loading the path never see a partially written artifact.
+
+    Args:
+        filepath: Destination path
+        metadata: JSON-serializable model metadata
+        arrays: Named arrays, stored little-endian and C-contiguous
+    """
+    arrays = {
+        name: np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder("<"))
+        for name, array in arrays.items()
+    }
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # lay the arrays out relative to the data section instead
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        position = _aligned(position)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += array.nbytes
+
+    header = json.dumps({
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "metadata": metadata,
+        "arrays": layout,
+    }).encode("utf-8")
+    data_start = _aligned(len(ARTIFACT_MAGIC) + _LENGTH.size + len(header))
+
+    tmp_path = f"{filepath}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(ARTIFACT_MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + position)
+    os.replace(tmp_path, filepath)
+
+
+def read_artifact(filepath: str, mmap_mode: Optional[str] = "c") -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """
+    Read a model artifact written by write_artifact.
+
+    With a mmap_mode the arrays are views into one memory map of the file,
+    so loading costs only the header parse and the pages are shared between
+    processes mapping the same artifact. The default copy-on-write mode
+    keeps the arrays writable without touching the file.
+
+    Args:
+        filepath: Artifact path
+        mmap_mode: np.memmap mode ("r" or "c"), or None to read into memory
+
+    Returns:
+        Tuple of (metadata, arrays by name)
+
+    Raises:
+        ValueError: If the file is not an artifact or has an unsupported version
+    """
+    with open(filepath, "rb") as f:
+        prefix = f.read(len(ARTIFACT_MAGIC) + _LENGTH.size)
+        if len(prefix) < len(ARTIFACT_MAGIC) + _LENGTH.size or not prefix.startswith(ARTIFACT_MAGIC):
+            raise ValueError(f"{filepath} is not a model artifact")
+        (header_length,) = _LENGTH.unpack(prefix[len(ARTIFACT_MAGIC):])
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        data_start = _aligned(len(prefix) + header_length)
+
+        if header.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported model artifact version {header.get('format_version')} "
+                f"(expected {ARTIFACT_FORMAT_VERSION})"
+            )
+
+        data_size = os.fstat(f.fileno()).st_size - data_start
+        if mmap_mode is None or data_size <= 0:
+            f.seek(data_start)
+            buffer = np.frombuffer(bytearray(f.read()), dtype=np.uint8)
+        else:
+            buffer = np.memmap(f, dtype=np.uint8, mode=mmap_mode, offset=data_start)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        start = spec["offset"]
+        arrays[name] = buffer[start:start + nbytes].view(dtype).reshape(shape)
+    return header["metadata"], arrays
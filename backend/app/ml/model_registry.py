@@ -0,0 +1,240 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import asyncio
+import copy
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Builders receive the currently published model (or None) and return a new one
+ModelBuilder = Callable[[Optional[Any]], Any]
+
+
+class ModelVersion:
+    """An immutable published model together with its version label"""
+
+    def __init__(self, name: str, number: int, model: Any, created_at: Optional[datetime] = None):
+        self.name = name
+        self.number = number
+        self.model = model
+        self.created_at = created_at or datetime.utcnow()
+        # Timestamped so labels stay unique across restarts
+        self.version = f"{self.created_at:%Y%m%d%H%M%S}-{number}"
+
+    def info(self) -> Dict[str, Any]:
+        """Summary for API responses"""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "created_at": self.created_at,
+        }
+
+
+class WorkingCopy:
+    """A private, mutable copy of a published model and the version it was taken from"""
+
+    def __init__(self, name: str, base_number: int, model: Any):
+        self.name = name
+        self.base_number = base_number
+        self.model = model
+
+
+class ModelRegistry:
+    """
+    Named, versioned models with atomic hot-swap.
+
+    Rebuilds never touch the published model: a new model is built on a
+    background thread and then the name -> version mapping is replaced with
+    a new dictionary in a single assignment. Readers just read that mapping,
+    so they never take a lock and never see a model that is still training;
+    requests already holding a version keep using it until they finish.
+    Models built from others (e.g. an ensemble) are rebuilt whenever one of
+    their dependencies publishes a new version.
+    """
+
+    def __init__(self, history_size: int = 3):
+        self.history_size = history_size
+        self._current: Dict[str, ModelVersion] = {}
+        self._history: Dict[str, List[ModelVersion]] = {}
+        self._builders: Dict[str, ModelBuilder] = {}
+        self._dependencies: Dict[str, Sequence[str]] = {}
+        self._builds: Dict[str, Future] = {}
+        self._lock = threading.Lock()  # serializes writers only
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, name: str, builder: ModelBuilder, dependencies: Sequence[str] = ()) -> None:
+        """
+        Register how to build a named model.
+
+        Args:
+            name: Model name, e.g. "POISSON"
+            builder: Called with the current model (or None) off the request path
+            dependencies: Models that must be published before this one is built
+        """
+        self._builders[name] = builder
+        self._dependencies[name] = tuple(dependencies)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._builders)
+
+    def get(self, name: str) -> Optional[ModelVersion]:
+        """Currently published version of a model, without blocking"""
+        return self._current.get(name)
+
+    def versions(self, name: str) -> List[ModelVersion]:
+        """Recently published versions of a model, newest first"""
+        return list(reversed(self._history.get(name, [])))
+
+    def publish(self, name: str, model: Any) -> ModelVersion:
+        """Make a fully built model the current version of its name"""
+        with self._lock:
+            entry = self._publish(name, model)
+        logger.info(f"Published {name} model version {entry.version}")
+        return entry
+
+    def _publish(self, name: str, model: Any) -> ModelVersion:
+        """Append a version and swap it in (caller holds the lock)"""
+        history = self._history.setdefault(name, [])
+        number = history[-1].number + 1 if history else 1
+        entry = ModelVersion(name, number, model)
+        history.append(entry)
+        del history[:-self.history_size]
+        self._current = {**self._current, name: entry}
+        return entry
+
+    def working_copy(self, name: str) -> Optional[WorkingCopy]:
+        """
+        Private deep copy of the current model, for in-place updates.
+
+        Incremental updates (e.g. PoissonModel.update_with_result) mutate the
+        model they are given; applying them to a working copy and passing it
+        to publish_update keeps every published version unchanged. The copy
+        records the version it was taken from, so it is never published over
+        a newer one.
+        """
+        current = self.get(name)
+        if current is None:
+            return None
+        return WorkingCopy(name, current.number, copy.deepcopy(current.model))
+
+    def publish_update(self, working_copy: WorkingCopy) -> Dict[str, Future]:
+        """Publish one updated working copy; see publish_updates"""
+        return self.publish_updates([working_copy])
+
+    def publish_updates(self, working_copies: Iterable[WorkingCopy]) -> Dict[str, Future]:
+        """
+        Publish updated working copies, unless their model has moved on.
+
+        Each copy is compared and swapped under the writer lock: it is
+        published only if its base is still the current version and no build
+        of that model is in flight. Otherwise publishing it would roll back
+        the newer version, so a fresh build is queued instead; it runs after
+        any build in flight and refits from the stored data, which by then
+        includes whatever was applied to the copy.
+
+        Dependents are rebuilt once, after every copy is published, so none
+        of them is built from a mix of old and new versions.
+
+        Returns:
+            Background build futures keyed by model name, for the rebuilt
+            stale copies and the dependents of the published ones
+        """
+        published = []
+        builds = {}
+        for working_copy in working_copies:
+            name = working_copy.name
+            with self._lock:
+                current = self._current.get(name)
+                building = self._builds.get(name)
+                if (
+                    current is not None and current.number == working_copy.base_number
+                    and (building is None or building.done())
+                ):
+                    entry = self._publish(name, working_copy.model)
+                else:
+                    entry = None
+            if entry is not None:
+                logger.info(f"Published {name} model version {entry.version}")
+                published.append(name)
+            else:
+                logger.info(f"{name} moved on since version {working_copy.base_number}; rebuilding instead")
+                builds[name] = self.build(name, queue=True)
+        for dependent, future in self._build_dependents(published).items():
+            builds.setdefault(dependent, future)
+        return builds
+
+    def _build_dependents(self, names) -> Dict[str, Future]:
+        return {
+            dependent: self.build(dependent)
+            for dependent, dependencies in self._dependencies.items()
+            if set(names) & set(dependencies) and self.get(dependent) is not None
+        }
+
+    def build(self, name: str, queue: bool = False) -> Future:
+        """
+        Build a new version of a model in the background.
+
+        While a build of the same model is in flight its future is returned
+        instead of starting another one, unless queue is set: then a new
+        build is queued behind it, so it sees everything stored by now.
+
+        Returns:
+            Future resolving to the published ModelVersion
+        """
+        if name not in self._builders:
+            raise KeyError(f"No builder registered for model {name}")
+
+        with self._lock:
+            future = self._builds.get(name)
+            if future is not None and not future.done() and not queue:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-build")
+            future = self._executor.submit(self._run_build, name)
+            self._builds[name] = future
+        return future
+
+    async def ensure(self, name: str) -> ModelVersion:
+        """Current version of a model, building the first one if needed"""
+        entry = self.get(name)
+        if entry is not None:
+            return entry
+        return await asyncio.wrap_future(self.build(name))
+
+    def shutdown(self) -> None:
+        """Stop the build thread, waiting for a running build to finish"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _run_build(self, name: str) -> ModelVersion:
+        """Build and publish a model (runs on the build thread)"""
+        for dependency in self._dependencies[name]:
+            if self.get(dependency) is None:
+                self._run_build(dependency)
+
+        current = self.get(name)
+        started = datetime.utcnow()
+        try:
+            model = self._builders[name](current.model if current else None)
+        except Exception as e:
+            logger.error(f"Building {name} model failed: {e}")
+            raise
+        logger.info(f"Built {name} model in {(datetime.utcnow() - started).total_seconds():.2f}s")
+        entry = self.publish(name, model)
+
+        for dependent, dependencies in self._dependencies.items():
+            if name in dependencies and self.get(dependent) is not None:
+                try:
+                    self._run_build(dependent)
+                except Exception:
+                    pass  # already logged; the previous version stays published
+        return entry
+
+
+# Process-wide registry used by the API
+model_registry = ModelRegistry()
@@ -1,8 +1,240 @@
 import numpy as np
-from scipy.stats import poisson
-from typing import Tuple, Dict
-import pickle
-import os
+from datetime import datetime
+from scipy import optimize, sparse
+from scipy.special import gammaln, pdtrik
+from functools import lru_cache
+from typing import Tuple, Dict, Optional
+from app.ml.match_statistics import DecayedMatchStatistics
+from app.ml.model_artifact import write_artifact, read_artifact
+
+# Default bound on the probability mass lost by truncating the scoreline grid
+DEFAULT_TAIL_TOLERANCE = 1e-6
+
+# The grid always covers 0-2 goals so the under 2.5 region is fully included
+MIN_GRID_GOALS = 2
+
+# Fields returned by predict_match and predict_markets respectively
+OUTCOME_FIELDS = (
+    "predicted_home_score",
+    "predicted_away_score",
+    "home_win_prob",
+    "draw_prob",
+    "away_win_prob",
+    "most_likely_score",
+    "tail_mass",
+)
+MARKET_FIELDS = (
+    "over_2_5_goals",
+    "under_2_5_goals",
+    "btts_yes",
+    "btts_no",
+    "home_clean_sheet",
+    "away_clean_sheet",
+)
+
+# Columns of the precomputed all-pairs table (the score is stored as two goal counts)
+PAIR_TABLE_FIELDS = (
+    "predicted_home_score",
+    "predicted_away_score",
+    "home_win_prob",
+    "draw_prob",
+    "away_win_prob",
+    "most_likely_home_goals",
+    "most_likely_away_goals",
+    "tail_mass",
+) + MARKET_FIELDS
+
+# Fixtures evaluated per vectorized chunk while building the all-pairs table
+PAIR_TABLE_CHUNK_SIZE = 16384
+
+# L2 penalty on log attack/defense strengths; keeps the fit identifiable and
+# pulls teams with few matches towards league average
+DEFAULT_REGULARIZATION = 0.01
+
+# Half-life of a match's weight in time-decayed fitting
+DEFAULT_HALF_LIFE_DAYS = 180.0
+
+# Step size for online updates of a team's log strengths after each result
+DEFAULT_LEARNING_RATE = 0.05
+
+
+class ScoreGrid:
+    """Goal counts, log-factorials and market masks for a 0..max_goals grid"""
+    
+    def __init__(self, max_goals: int):
+        self.max_goals = max_goals
+        self.goals = np.arange(max_goals + 1)
+        self.log_factorials = gammaln(self.goals + 1)
+        
+        home_goals = self.goals[:, np.newaxis]
+        away_goals = self.goals[np.newaxis, :]
+        shape = (max_goals + 1, max_goals + 1)
+        
+        # Boolean masks over the (home goals x away goals) grid
+        self.home_win_mask = home_goals > away_goals
+        self.draw_mask = home_goals == away_goals
+        self.away_win_mask = home_goals < away_goals
+        self.under_2_5_mask = (home_goals + away_goals) < 2.5
+        self.btts_mask = (home_goals > 0) & (away_goals > 0)
+        self.home_clean_sheet_mask = np.broadcast_to(away_goals == 0, shape)
+        self.away_clean_sheet_mask = np.broadcast_to(home_goals == 0, shape)
+    
+    def pmf(self, lam) -> np.ndarray:
+        """
+        Poisson pmf evaluated over the whole grid in one shot.
+        
+        Accepts a scalar or an array of lambdas; the goal axis is appended last.
+        """
+        lam = np.asarray(lam, dtype=float)[..., np.newaxis]
+        return np.exp(self.goals * np.log(lam) - lam - self.log_factorials)
+
+
+@lru_cache(maxsize=None)
+def score_grid(max_goals: int) -> ScoreGrid:
+    """Shared, cached grid for a given size"""
+    return ScoreGrid(max_goals)
+
+
+def grid_size(lambda_home, lambda_away, tolerance: float = DEFAULT_TAIL_TOLERANCE) -> int:
+    """
+    Smallest max-goals grid whose truncated tail mass is within tolerance.
+    
+    Each side is allowed tolerance / 2 of tail mass, so by the union bound the
+    joint mass outside the grid never exceeds the tolerance. Accepts scalars
+    or arrays; for arrays the grid fits every fixture in the slate.
+    
+    Args:
+        lambda_home: Expected home goals (scalar or array)
+        lambda_away: Expected away goals (scalar or array)
+        tolerance: Maximum probability mass allowed outside the grid
+        
+    Returns:
+        Maximum goals per team to evaluate
+    """
+    lam = max(np.max(lambda_home, initial=0.0), np.max(lambda_away, initial=0.0))
+    if lam <= 0:
+        return MIN_GRID_GOALS
+    # pdtrik inverts the Poisson cdf in k; its ceiling is the integer quantile
+    return max(int(np.ceil(pdtrik(1.0 - tolerance / 2.0, lam))), MIN_GRID_GOALS)
+
+
+def _masked_sum(probs: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Sum probabilities over the trailing (home goals x away goals) axes"""
+    return np.sum(probs * mask, axis=(-2, -1))
+
+
+def tail_mass(probs: np.ndarray) -> np.ndarray:
+    """Probability mass of the scorelines that fall outside the grid"""
+    return np.clip(1.0 - np.sum(probs, axis=(-2, -1)), 0.0, 1.0)
+
+
+def outcome_probabilities(probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Home/draw/away probabilities from one or many score matrices.
+    
+    The probabilities are not renormalized: each one undershoots the exact
+    value by at most the tail mass of its matrix.
+    
+    Args:
+        probs: Array of shape (..., max_goals + 1, max_goals + 1)
+        
+    Returns:
+        Tuple of (home_win, draw, away_win) arrays
+    """
+    grid = score_grid(probs.shape[-1] - 1)
+    return (
+        _masked_sum(probs, grid.home_win_mask),
+        _masked_sum(probs, grid.draw_mask),
+        _masked_sum(probs, grid.away_win_mask),
+    )
+
+
+def market_probabilities(probs: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Over/under, both-teams-to-score and clean sheet probabilities.
+    
+    Under 2.5 lies entirely inside the grid, so it and its complement are
+    exact; the remaining markets are within the tail mass of the matrix.
+    """
+    grid = score_grid(probs.shape[-1] - 1)
+    under_2_5 = _masked_sum(probs, grid.under_2_5_mask)
+    btts_yes = _masked_sum(probs, grid.btts_mask)
+    return {
+        "over_2_5_goals": 1.0 - under_2_5,
+        "under_2_5_goals": under_2_5,
+        "btts_yes": btts_yes,
+        "btts_no": 1.0 - btts_yes,
+        "home_clean_sheet": _masked_sum(probs, grid.home_clean_sheet_mask),
+        "away_clean_sheet": _masked_sum(probs, grid.away_clean_sheet_mask),
+    }
+
+
+def most_likely_scores(probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (home goals, away goals) of the modal scoreline per matrix"""
+    flat = probs.reshape(probs.shape[:-2] + (probs.shape[-2] * probs.shape[-1],))
+    return np.divmod(np.argmax(flat, axis=-1), probs.shape[-1])
+
+
+class ScoreMatrix:
+    """
+    Joint scoreline distribution for a single fixture.
+    
+    probs[i, j] is the probability of the home side scoring i goals and the
+    away side scoring j goals, built as the outer product of two Poisson pmf
+    vectors. All outcome and market probabilities are masked sums over it.
+    The grid is sized from the expected goals so that the mass it leaves out
+    (reported as tail_mass) stays within the tolerance.
+    """
+    
+    def __init__(
+        self,
+        lambda_home: float,
+        lambda_away: float,
+        tolerance: float = DEFAULT_TAIL_TOLERANCE,
+        max_goals: Optional[int] = None
+    ):
+        self.lambda_home = lambda_home
+        self.lambda_away = lambda_away
+        if max_goals is None:
+            max_goals = grid_size(lambda_home, lambda_away, tolerance)
+        grid = score_grid(max_goals)
+        self.probs = np.outer(grid.pmf(lambda_home), grid.pmf(lambda_away))
+        self.tail_mass = float(tail_mass(self.probs))
+    
+    @property
+    def max_goals(self) -> int:
+        return self.probs.shape[-1] - 1
+    
+    def most_likely_score(self) -> Tuple[int, int]:
+        """Return the (home, away) scoreline with the highest probability"""
+        home_goals, away_goals = most_likely_scores(self.probs)
+        return int(home_goals), int(away_goals)
+    
+    def outcomes(self) -> Dict:
+        """Home/draw/away probabilities, expected goals and most likely score"""
+        home_win_prob, draw_prob, away_win_prob = outcome_probabilities(self.probs)
+        home_goals, away_goals = self.most_likely_score()
+        return {
+            "predicted_home_score": self.lambda_home,
+            "predicted_away_score": self.lambda_away,
+            "home_win_prob": float(home_win_prob),
+            "draw_prob": float(draw_prob),
+            "away_win_prob": float(away_win_prob),
+            "most_likely_score": f"{home_goals}-{away_goals}",
+            "tail_mass": self.tail_mass,
+        }
+    
+    def all_scores(self) -> Dict[str, float]:
+        """Probability of every scoreline on the grid, keyed by "home-away" score"""
+        return {
+            f"{i}-{j}": prob
+            for i, row in enumerate(self.probs.tolist())
+            for j, prob in enumerate(row)
+        }
+    
+    def markets(self) -> Dict:
+        """Over/under, both-teams-to-score and clean sheet probabilities"""
+        return {key: float(value) for key, value in market_probabilities(self.probs).items()}
 
 
 class PoissonModel:
@@ -11,55 +243,304 @@ class PoissonModel:
     Uses observed scoring patterns to predict match outcomes.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        tail_tolerance: float = DEFAULT_TAIL_TOLERANCE,
+        regularization: float = DEFAULT_REGULARIZATION,
+        half_life_days: float = DEFAULT_HALF_LIFE_DAYS
+    ):
         self.model_name = "POISSON"
+        self.tail_tolerance = tail_tolerance  # max scoreline mass left off the grid
+        self.regularization = regularization
+        self.half_life_days = half_life_days
+        self.match_statistics = None  # DecayedMatchStatistics used by fit_time_weighted
         self.is_trained = False
+        self.fitted_at: Optional[datetime] = None  # when the model was last fit on the history
         self.home_attack_param = {}  # team_id -> attack strength
         self.home_defense_param = {}  # team_id -> defense strength
         self.away_attack_param = {}
         self.away_defense_param = {}
         self.league_home_advantage = 1.0
         self.league_avg_goals = 2.8
+        self._parameter_arrays = None  # cached vectorized view of the param dicts
+        self._team_index = {}  # team_id -> row/column in pair_table
+        self.pair_table = None  # (home team x away team x PAIR_TABLE_FIELDS) predictions
+        
+        # Maximum-likelihood fit in log space, kept for warm starts:
+        # [attack (n_teams), defense (n_teams), home advantage, intercept]
+        self._fitted_team_ids = np.empty(0, dtype=np.int64)
+        self._fitted_params = None
         
-    def estimate_parameters(self, matches: list, teams: list) -> None:
+    def estimate_parameters(self, matches: list, teams: list, warm_start: bool = True) -> None:
         """
         Estimate Poisson parameters from historical match data.
         
+        Fits attack and defense strengths per team plus a shared home
+        advantage by maximum likelihood (the independent-Poisson core of the
+        Dixon-Coles model):
+        
+            log(lambda_home) = intercept + home + attack[home] + defense[away]
+            log(lambda_away) = intercept + attack[away] + defense[home]
+        
+        Falls back to heuristics on the team statistics when there are no
+        finished matches to fit.
+        
         Args:
             matches: List of match results with home_goals, away_goals, home_team_id, away_team_id
             teams: List of team objects with statistics
+            warm_start: Start the optimizer from the previous fit where team IDs overlap
         """
-        self.home_attack_param = {team.id: team.avg_goals_scored * 0.5 + 0.75 for team in teams}
-        self.home_defense_param = {team.id: team.avg_goals_conceded * 0.5 + 0.75 for team in teams}
-        self.away_attack_param = {team.id: team.avg_goals_scored * 0.4 + 0.6 for team in teams}
-        self.away_defense_param = {team.id: team.avg_goals_conceded * 0.4 + 0.6 for team in teams}
+        finished = [m for m in matches if m.home_goals is not None and m.away_goals is not None]
         
-        # Calculate home advantage based on goal difference
-        if matches:
-            home_goals = sum(m.home_goals for m in matches if m.home_goals is not None)
-            away_goals = sum(m.away_goals for m in matches if m.away_goals is not None)
-            match_count = sum(1 for m in matches if m.home_goals is not None)
-            if match_count > 0:
-                self.league_home_advantage = home_goals / match_count
-                self.league_avg_goals = (home_goals + away_goals) / (2 * match_count)
+        if finished:
+            self._fit_maximum_likelihood(
+                team_ids=[team.id for team in teams],
+                home_team_ids=np.array([m.home_team_id for m in finished], dtype=np.int64),
+                away_team_ids=np.array([m.away_team_id for m in finished], dtype=np.int64),
+                home_goals=np.array([m.home_goals for m in finished], dtype=float),
+                away_goals=np.array([m.away_goals for m in finished], dtype=float),
+                warm_start=warm_start,
+            )
+            home_goals = sum(m.home_goals for m in finished)
+            away_goals = sum(m.away_goals for m in finished)
+            self.league_avg_goals = (home_goals + away_goals) / (2 * len(finished))
+        else:
+            # Drop any earlier fit so update_with_result cannot resurrect it
+            self._fitted_team_ids = np.empty(0, dtype=np.int64)
+            self._fitted_params = None
+            self.home_attack_param = {team.id: team.avg_goals_scored * 0.5 + 0.75 for team in teams}
+            self.home_defense_param = {team.id: team.avg_goals_conceded * 0.5 + 0.75 for team in teams}
+            self.away_attack_param = {team.id: team.avg_goals_scored * 0.4 + 0.6 for team in teams}
+            self.away_defense_param = {team.id: team.avg_goals_conceded * 0.4 + 0.6 for team in teams}
         
         self.is_trained = True
+        self.fitted_at = datetime.utcnow()
+        self._rebuild_pair_table()
     
-    def predict_match(self, home_team_id: int, away_team_id: int) -> Dict:
+    def fit_time_weighted(
+        self,
+        new_matches: list,
+        teams: list,
+        now: Optional[datetime] = None,
+        warm_start: bool = True
+    ) -> None:
         """
-        Predict match outcome using Poisson distribution.
+        Refit on the whole match history with exponential time decay.
+        
+        Only matches not seen by a previous call need to be passed: the
+        weighted sufficient statistics of earlier matches are kept on the
+        model, decayed to the new reference time and extended with the new
+        ones, so refit cost depends on the number of team pairings rather
+        than the length of the history.
+        
+        Args:
+            new_matches: Finished matches added or changed since the last call
+            teams: List of team objects with statistics
+            now: Reference time for the weights (defaults to utcnow)
+            warm_start: Start the optimizer from the previous fit
+        """
+        if self.match_statistics is None:
+            self.match_statistics = DecayedMatchStatistics(self.half_life_days, now)
+        stats = self.match_statistics
+        stats.advance_to(now or datetime.utcnow())
+        stats.add_matches(new_matches)
+        
+        if len(stats) == 0:
+            self.estimate_parameters([], teams)
+            return
+        
+        home_team_ids, away_team_ids, weights, home_goals, away_goals = stats.arrays()
+        if not weights.sum() > 0:
+            # Every weight has underflowed: nothing left to refit on, so keep
+            # the previous fit (or start from the heuristics)
+            if not self.is_trained:
+                self.estimate_parameters([], teams)
+            self.fitted_at = datetime.utcnow()
+            return
+        
+        self._fit_maximum_likelihood(
+            team_ids=[team.id for team in teams],
+            home_team_ids=home_team_ids,
+            away_team_ids=away_team_ids,
+            home_goals=home_goals,
+            away_goals=away_goals,
+            weights=weights,
+            warm_start=warm_start,
+        )
+        self.league_avg_goals = float(
+            np.dot(weights, home_goals + away_goals) / (2 * weights.sum())
+        )
+        self.is_trained = True
+        self.fitted_at = datetime.utcnow()
+        self._rebuild_pair_table()
+    
+    def _fit_maximum_likelihood(
+        self,
+        team_ids: list,
+        home_team_ids: np.ndarray,
+        away_team_ids: np.ndarray,
+        home_goals: np.ndarray,
+        away_goals: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        warm_start: bool = True
+    ) -> None:
+        """
+        Fit log-linear attack/defense/home parameters with L-BFGS.
+        
+        The log-likelihood and its analytic gradient are evaluated through a
+        sparse design matrix with one row per team-goals observation, so each
+        optimizer step is a couple of sparse mat-vec products.
+        """
+        fit_team_ids = np.union1d(np.asarray(team_ids, dtype=np.int64), np.union1d(home_team_ids, away_team_ids))
+        n_teams = len(fit_team_ids)
+        n_matches = len(home_team_ids)
+        home_idx = np.searchsorted(fit_team_ids, home_team_ids)
+        away_idx = np.searchsorted(fit_team_ids, away_team_ids)
+        home_col = 2 * n_teams
+        intercept_col = 2 * n_teams + 1
+        
+        # Rows 0..n-1 model home goals, rows n..2n-1 model away goals
+        observation = np.arange(2 * n_matches)
+        rows = np.concatenate([observation, observation, observation, np.arange(n_matches)])
+        cols = np.concatenate([
+            home_idx, away_idx,                      # attack of the scoring side
+            n_teams + away_idx, n_teams + home_idx,  # defense of the conceding side
+            np.full(2 * n_matches, intercept_col),
+            np.full(n_matches, home_col),
+        ])
+        design = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(2 * n_matches, 2 * n_teams + 2)
+        )
+        design_t = design.T.tocsr()
+        goals = np.concatenate([home_goals, away_goals])
+        weights = np.ones(2 * n_matches) if weights is None else np.concatenate([weights, weights])
+        weighted_goals = weights * goals
+        
+        penalty = np.zeros(2 * n_teams + 2)
+        penalty[:2 * n_teams] = self.regularization
+        
+        def negative_log_likelihood(params):
+            eta = design @ params
+            rate = np.exp(eta)
+            loss = np.dot(weights, rate) - np.dot(weighted_goals, eta) + 0.5 * np.dot(penalty * params, params)
+            gradient = design_t @ (weights * rate - weighted_goals) + penalty * params
+            return loss, gradient
+        
+        initial = np.zeros(2 * n_teams + 2)
+        total_weight = weights.sum()
+        mean_goals = np.dot(weights, goals) / total_weight if total_weight > 0 else goals.mean()
+        initial[intercept_col] = np.log(max(mean_goals, 0.1))
+        if warm_start and self._fitted_params is not None:
+            previous_n = len(self._fitted_team_ids)
+            idx, known = self._lookup_teams(self._fitted_team_ids, fit_team_ids)
+            initial[:n_teams][known] = self._fitted_params[:previous_n][idx[known]]
+            initial[n_teams:2 * n_teams][known] = self._fitted_params[previous_n:2 * previous_n][idx[known]]
+            initial[home_col:] = self._fitted_params[-2:]
+        
+        result = optimize.minimize(negative_log_likelihood, initial, jac=True, method="L-BFGS-B")
+        self._fitted_team_ids = fit_team_ids
+        self._fitted_params = result.x
+        self._apply_fitted_params()
+    
+    def _apply_fitted_params(self) -> None:
+        """Expose the log-space fit through the multiplicative parameter dicts"""
+        n_teams = len(self._fitted_team_ids)
+        attack = self._fitted_params[:n_teams]
+        defense = self._fitted_params[n_teams:2 * n_teams]
+        home, intercept = self._fitted_params[-2:]
+        team_ids = self._fitted_team_ids.tolist()
+        
+        # lambda_home = home_attack * away_defense * league_home_advantage
+        # lambda_away = away_attack * home_defense
+        self.home_attack_param = dict(zip(team_ids, np.exp(attack).tolist()))
+        self.away_attack_param = dict(zip(team_ids, np.exp(intercept + attack).tolist()))
+        self.home_defense_param = dict(zip(team_ids, np.exp(defense).tolist()))
+        self.away_defense_param = dict(zip(team_ids, np.exp(defense).tolist()))
+        self.league_home_advantage = float(np.exp(intercept + home))
+    
+    def update_with_result(
+        self,
+        home_team_id: int,
+        away_team_id: int,
+        home_goals: int,
+        away_goals: int,
+        learning_rate: float = DEFAULT_LEARNING_RATE
+    ) -> None:
+        """
+        Incrementally update the fit with one finished match.
+        
+        Takes a single penalized-likelihood gradient step on the attack and
+        defense strengths of the two teams involved, then refreshes only
+        their rows and columns of the all-pairs table. Shared parameters are
+        left to the next full refit.
+        
+        The model is changed in place, so apply this to a private copy
+        (ModelRegistry.working_copy) rather than a published version.
+        
+        Args:
+            home_team_id: ID of home team
+            away_team_id: ID of away team
+            home_goals: Goals scored by the home team
+            away_goals: Goals scored by the away team
+            learning_rate: Gradient step size in log space
+        """
+        if not self.is_trained or self._fitted_params is None:
+            raise ValueError("Incremental updates require a maximum-likelihood fit")
+        
+        if not np.isin([home_team_id, away_team_id], self._fitted_team_ids).all():
+            self._add_fitted_teams([home_team_id, away_team_id])
+        
+        n_teams = len(self._fitted_team_ids)
+        h, a = np.searchsorted(self._fitted_team_ids, [home_team_id, away_team_id])
+        attack = self._fitted_params[:n_teams]
+        defense = self._fitted_params[n_teams:2 * n_teams]
+        home, intercept = self._fitted_params[-2:]
+        
+        # d(log-likelihood)/d(eta) is the observed minus expected goals
+        home_residual = home_goals - np.exp(intercept + home + attack[h] + defense[a])
+        away_residual = away_goals - np.exp(intercept + attack[a] + defense[h])
+        reg = self.regularization
+        attack_h, attack_a, defense_h, defense_a = attack[h], attack[a], defense[h], defense[a]
+        attack[h] += learning_rate * (home_residual - reg * attack_h)
+        defense[a] += learning_rate * (home_residual - reg * defense_a)
+        attack[a] += learning_rate * (away_residual - reg * attack_a)
+        defense[h] += learning_rate * (away_residual - reg * defense_h)
+        
+        for team_id, i in ((home_team_id, h), (away_team_id, a)):
+            self.home_attack_param[team_id] = float(np.exp(attack[i]))
+            self.away_attack_param[team_id] = float(np.exp(intercept + attack[i]))
+            self.home_defense_param[team_id] = float(np.exp(defense[i]))
+            self.away_defense_param[team_id] = float(np.exp(defense[i]))
+        
+        self._refresh_pair_table_teams([home_team_id, away_team_id])
+    
+    def _add_fitted_teams(self, team_ids: list) -> None:
+        """Extend the fit with neutral-strength entries for unseen teams"""
+        n_teams = len(self._fitted_team_ids)
+        new_ids = np.setdiff1d(np.asarray(team_ids, dtype=np.int64), self._fitted_team_ids)
+        positions = np.searchsorted(self._fitted_team_ids, new_ids)
+        attack = np.insert(self._fitted_params[:n_teams], positions, 0.0)
+        defense = np.insert(self._fitted_params[n_teams:2 * n_teams], positions, 0.0)
+        self._fitted_team_ids = np.insert(self._fitted_team_ids, positions, new_ids)
+        self._fitted_params = np.concatenate([attack, defense, self._fitted_params[-2:]])
+        self._apply_fitted_params()
+        self._rebuild_pair_table()
+    
+    def expected_goals(self, home_team_id: int, away_team_id: int) -> Tuple[float, float]:
+        """
+        Calculate expected goals for both sides of a fixture.
         
         Args:
             home_team_id: ID of home team
             away_team_id: ID of away team
             
         Returns:
-            Dictionary with prediction probabilities for all outcomes
+            Tuple of (lambda_home, lambda_away)
         """
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        # Calculate expected goals
         home_attack = self.home_attack_param.get(home_team_id, 1.0)
         home_defense = self.home_defense_param.get(home_team_id, 1.0)
         away_attack = self.away_attack_param.get(away_team_id, 1.0)
@@ -73,58 +554,221 @@ class PoissonModel:
         lambda_home = max(0.1, min(lambda_home, 4.5))
         lambda_away = max(0.1, min(lambda_away, 4.5))
         
-        predictions = {
+        return lambda_home, lambda_away
+    
+    def expected_goals_many(self, home_team_ids, away_team_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized expected goals for arrays of fixtures.
+        
+        Args:
+            home_team_ids: Array-like of home team IDs
+            away_team_ids: Array-like of away team IDs, same length
+            
+        Returns:
+            Tuple of (lambda_home, lambda_away) arrays
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        
+        team_ids, home_attack, home_defense, away_attack, away_defense = self._get_parameter_arrays()
+        home_idx, home_known = self._lookup_teams(team_ids, home_team_ids)
+        away_idx, away_known = self._lookup_teams(team_ids, away_team_ids)
+        
+        # Unknown teams fall back to neutral strength, as in expected_goals
+        lambda_home = (
+            np.where(home_known, home_attack[home_idx], 1.0) *
+            np.where(away_known, away_defense[away_idx], 1.0) *
+            self.league_home_advantage
+        )
+        lambda_away = (
+            np.where(away_known, away_attack[away_idx], 1.0) *
+            np.where(home_known, home_defense[home_idx], 1.0)
+        )
+        
+        return np.clip(lambda_home, 0.1, 4.5), np.clip(lambda_away, 0.1, 4.5)
+    
+    def predict_many(self, home_team_ids, away_team_ids) -> Dict[str, np.ndarray]:
+        """
+        Predict outcomes and markets for many fixtures at once.
+        
+        Fixtures between known teams are gathered from the precomputed
+        all-pairs table. Otherwise a (fixtures x goals x goals) probability
+        tensor is built and reduced with the same masks used for single
+        fixtures, so the cost is a handful of array operations regardless of
+        slate size.
+        
+        Args:
+            home_team_ids: Array-like of home team IDs
+            away_team_ids: Array-like of away team IDs, same length
+            
+        Returns:
+            Dictionary of arrays keyed like the fields returned by predict
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        
+        team_ids = self._get_parameter_arrays()[0]
+        home_idx, home_known = self._lookup_teams(team_ids, home_team_ids)
+        away_idx, away_known = self._lookup_teams(team_ids, away_team_ids)
+        
+        if self.pair_table is not None and np.all(home_known & away_known):
+            rows = self.pair_table[home_idx, away_idx]
+            columns = {field: rows[:, k] for k, field in enumerate(PAIR_TABLE_FIELDS)}
+        else:
+            columns = self._compute_many(*self.expected_goals_many(home_team_ids, away_team_ids))
+        
+        home_goals = columns.pop("most_likely_home_goals").astype(int)
+        away_goals = columns.pop("most_likely_away_goals").astype(int)
+        columns["most_likely_score"] = np.char.add(np.char.add(home_goals.astype(str), "-"), away_goals.astype(str))
+        return columns
+    
+    def _compute_many(self, lambda_home: np.ndarray, lambda_away: np.ndarray) -> Dict[str, np.ndarray]:
+        """Evaluate PAIR_TABLE_FIELDS for arrays of expected goals"""
+        # Pad every fixture to the smallest grid that fits the whole slate
+        grid = score_grid(grid_size(lambda_home, lambda_away, self.tail_tolerance))
+        probs = grid.pmf(lambda_home)[:, :, np.newaxis] * grid.pmf(lambda_away)[:, np.newaxis, :]
+        
+        home_win_prob, draw_prob, away_win_prob = outcome_probabilities(probs)
+        home_goals, away_goals = most_likely_scores(probs)
+        
+        return {
             "predicted_home_score": lambda_home,
             "predicted_away_score": lambda_away,
-            "home_win_prob": 0.0,
-            "draw_prob": 0.0,
-            "away_win_prob": 0.0,
-            "most_likely_score": "0-0",
-            "all_scores": {},
+            "home_win_prob": home_win_prob,
+            "draw_prob": draw_prob,
+            "away_win_prob": away_win_prob,
+            "most_likely_home_goals": home_goals,
+            "most_likely_away_goals": away_goals,
+            "tail_mass": tail_mass(probs),
+            **market_probabilities(probs),
         }
+    
+    def _rebuild_pair_table(self) -> None:
+        """
+        Precompute predictions for every home/away pairing of known teams.
+        
+        Must be called whenever the parameters change; it also drops the
+        cached parameter arrays the table is indexed by.
+        """
+        self._parameter_arrays = None
+        self.pair_table = None
+        team_ids = self._get_parameter_arrays()[0]
+        self._team_index = {team_id: i for i, team_id in enumerate(team_ids.tolist())}
+        
+        n_teams = len(team_ids)
+        table = np.empty((n_teams, n_teams, len(PAIR_TABLE_FIELDS)))
+        rows_per_chunk = max(1, PAIR_TABLE_CHUNK_SIZE // max(n_teams, 1))
+        for start in range(0, n_teams, rows_per_chunk):
+            home_ids = team_ids[start:start + rows_per_chunk]
+            home_grid, away_grid = np.meshgrid(home_ids, team_ids, indexing="ij")
+            columns = self._compute_many(*self.expected_goals_many(home_grid.ravel(), away_grid.ravel()))
+            table[start:start + len(home_ids)] = np.stack(
+                [columns[field] for field in PAIR_TABLE_FIELDS], axis=-1
+            ).reshape(len(home_ids), n_teams, -1)
+        self.pair_table = table
+    
+    def _refresh_pair_table_teams(self, team_ids: list) -> None:
+        """Recompute the table rows and columns of a few teams after their parameters changed"""
+        team_index, home_attack, home_defense, away_attack, away_defense = self._get_parameter_arrays()
+        positions = np.searchsorted(team_index, team_ids)
+        home_attack[positions] = [self.home_attack_param[team_id] for team_id in team_ids]
+        home_defense[positions] = [self.home_defense_param[team_id] for team_id in team_ids]
+        away_attack[positions] = [self.away_attack_param[team_id] for team_id in team_ids]
+        away_defense[positions] = [self.away_defense_param[team_id] for team_id in team_ids]
+        
+        if self.pair_table is None:
+            return
         
-        # Calculate probabilities for all possible scorelines (0-4 goals each team)
-        home_win_prob = 0.0
-        draw_prob = 0.0
-        away_win_prob = 0.0
-        max_score_prob = 0.0
-        most_likely_score = (0, 0)
-        
-        for home_goals in range(5):
-            for away_goals in range(5):
-                # Poisson probability
-                prob = (
-                    poisson.pmf(home_goals, lambda_home) *
-                    poisson.pmf(away_goals, lambda_away)
+        # Fixtures where any of the teams plays at home, then away
+        n_teams = len(team_index)
+        changed = np.repeat(team_index[positions], n_teams)
+        others = np.tile(team_index, len(positions))
+        home_ids = np.concatenate([changed, others])
+        away_ids = np.concatenate([others, changed])
+        columns = self._compute_many(*self.expected_goals_many(home_ids, away_ids))
+        values = np.stack([columns[field] for field in PAIR_TABLE_FIELDS], axis=-1)
+        
+        half = len(changed)
+        self.pair_table[positions] = values[:half].reshape(len(positions), n_teams, -1)
+        self.pair_table[:, positions] = values[half:].reshape(len(positions), n_teams, -1).transpose(1, 0, 2)
+    
+    def _get_parameter_arrays(self) -> Tuple[np.ndarray, ...]:
+        """Team IDs (sorted) with aligned attack/defense parameter arrays"""
+        if self._parameter_arrays is None:
+            team_ids = np.array(sorted(
+                set(self.home_attack_param) | set(self.home_defense_param) |
+                set(self.away_attack_param) | set(self.away_defense_param)
+            ), dtype=np.int64)
+            self._parameter_arrays = (team_ids,) + tuple(
+                np.array([params.get(team_id, 1.0) for team_id in team_ids.tolist()], dtype=float)
+                for params in (
+                    self.home_attack_param,
+                    self.home_defense_param,
+                    self.away_attack_param,
+                    self.away_defense_param,
                 )
-                predictions["all_scores"][f"{home_goals}-{away_goals}"] = float(prob)
-                
-                # Track most likely score
-                if prob > max_score_prob:
-                    max_score_prob = prob
-                    most_likely_score = (home_goals, away_goals)
-                
-                # Accumulate outcome probabilities
-                if home_goals > away_goals:
-                    home_win_prob += prob
-                elif home_goals == away_goals:
-                    draw_prob += prob
-                else:
-                    away_win_prob += prob
-        
-        # Normalize to ensure probabilities sum to 1
-        total = home_win_prob + draw_prob + away_win_prob
-        if total > 0:
-            home_win_prob /= total
-            draw_prob /= total
-            away_win_prob /= total
-        
-        predictions["home_win_prob"] = float(home_win_prob)
-        predictions["draw_prob"] = float(draw_prob)
-        predictions["away_win_prob"] = float(away_win_prob)
-        predictions["most_likely_score"] = f"{most_likely_score[0]}-{most_likely_score[1]}"
-        
-        return predictions
+            )
+        return self._parameter_arrays
+    
+    @staticmethod
+    def _lookup_teams(team_ids: np.ndarray, ids) -> Tuple[np.ndarray, np.ndarray]:
+        """Map team IDs to parameter array positions plus a known-team mask"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(team_ids) == 0:
+            return np.zeros(ids.shape, dtype=np.int64), np.zeros(ids.shape, dtype=bool)
+        idx = np.clip(np.searchsorted(team_ids, ids), 0, len(team_ids) - 1)
+        return idx, team_ids[idx] == ids
+    
+    def score_matrix(self, home_team_id: int, away_team_id: int) -> "ScoreMatrix":
+        """Build the scoreline probability matrix for a fixture"""
+        lambda_home, lambda_away = self.expected_goals(home_team_id, away_team_id)
+        return ScoreMatrix(lambda_home, lambda_away, self.tail_tolerance)
+    
+    def predict(self, home_team_id: int, away_team_id: int) -> Dict:
+        """
+        Predict outcome probabilities and all markets for a fixture.
+        
+        Known pairings are read straight from the precomputed all-pairs
+        table; anything else is derived from a single score matrix.
+        
+        Args:
+            home_team_id: ID of home team
+            away_team_id: ID of away team
+            
+        Returns:
+            Dictionary with outcome, score and market predictions
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        
+        home_idx = self._team_index.get(home_team_id)
+        away_idx = self._team_index.get(away_team_id)
+        if self.pair_table is None or home_idx is None or away_idx is None:
+            matrix = self.score_matrix(home_team_id, away_team_id)
+            return {**matrix.outcomes(), **matrix.markets()}
+        
+        prediction = dict(zip(PAIR_TABLE_FIELDS, self.pair_table[home_idx, away_idx].tolist()))
+        home_goals = int(prediction.pop("most_likely_home_goals"))
+        away_goals = int(prediction.pop("most_likely_away_goals"))
+        prediction["most_likely_score"] = f"{home_goals}-{away_goals}"
+        return prediction
+    
+    def predict_match(self, home_team_id: int, away_team_id: int) -> Dict:
+        """
+        Predict match outcome using Poisson distribution.
+        
+        Args:
+            home_team_id: ID of home team
+            away_team_id: ID of away team
+            
+        Returns:
+            Dictionary with prediction probabilities for all outcomes, plus
+            all_scores: the probability of every scoreline on the grid
+        """
+        prediction = self.predict(home_team_id, away_team_id)
+        # The pair table keeps no scoreline grid, so build it on demand
+        all_scores = self.score_matrix(home_team_id, away_team_id).all_scores()
+        return {**{field: prediction[field] for field in OUTCOME_FIELDS}, "all_scores": all_scores}
     
     def predict_markets(self, home_team_id: int, away_team_id: int) -> Dict:
         """
@@ -137,59 +781,106 @@ class PoissonModel:
         Returns:
             Dictionary with market predictions
         """
-        predictions = self.predict_match(home_team_id, away_team_id)
-        lambda_home = predictions["predicted_home_score"]
-        lambda_away = predictions["predicted_away_score"]
-        
-        # Over/Under 2.5 goals
-        over_2_5 = 0.0
-        under_2_5 = 0.0
-        btts_yes = 0.0
-        btts_no = 0.0
-        home_clean_sheet = 0.0
-        away_clean_sheet = 0.0
-        
-        for home_goals in range(5):
-            for away_goals in range(5):
-                prob = (
-                    poisson.pmf(home_goals, lambda_home) *
-                    poisson.pmf(away_goals, lambda_away)
-                )
-                
-                total_goals = home_goals + away_goals
-                if total_goals > 2.5:
-                    over_2_5 += prob
-                else:
-                    under_2_5 += prob
-                
-                if home_goals > 0 and away_goals > 0:
-                    btts_yes += prob
-                
-                if home_goals == 0 or away_goals == 0:
-                    btts_no += prob
-                
-                if away_goals == 0:
-                    home_clean_sheet += prob
-                
-                if home_goals == 0:
-                    away_clean_sheet += prob
-        
-        return {
-            "over_2_5_goals": float(over_2_5),
-            "under_2_5_goals": float(under_2_5),
-            "btts_yes": float(btts_yes),
-            "btts_no": float(btts_no),
-            "home_clean_sheet": float(home_clean_sheet),
-            "away_clean_sheet": float(away_clean_sheet),
-        }
+        prediction = self.predict(home_team_id, away_team_id)
+        return {field: prediction[field] for field in MARKET_FIELDS}
     
     def save_model(self, filepath: str) -> None:
-        """Save model to disk"""
-        with open(filepath, 'wb') as f:
-            pickle.dump(self, f)
+        """
+        Save model to disk as a versioned artifact.
+        
+        The artifact holds the sorted team index, the parameter arrays, the
+        log-space fit and the all-pairs table as raw arrays behind a small
+        JSON header (which also records fitted_at), so it can be
+        memory-mapped by load_model. Training
+        statistics are not saved; the next time_weighted fit of a loaded
+        model re-reads the history, warm-started from the saved fit.
+        
+        Args:
+            filepath: Destination path
+        """
+        team_ids, home_attack, home_defense, away_attack, away_defense = self._get_parameter_arrays()
+        arrays = {
+            "team_ids": team_ids,
+            "home_attack": home_attack,
+            "home_defense": home_defense,
+            "away_attack": away_attack,
+            "away_defense": away_defense,
+        }
+        if self._fitted_params is not None:
+            arrays["fitted_team_ids"] = self._fitted_team_ids
+            arrays["fitted_params"] = self._fitted_params
+        if self.pair_table is not None:
+            arrays["pair_table"] = self.pair_table
+        
+        metadata = {
+            "model_name": self.model_name,
+            "saved_at": datetime.utcnow().isoformat(),
+            "fitted_at": self.fitted_at.isoformat() if self.fitted_at else None,
+            "is_trained": self.is_trained,
+            "tail_tolerance": self.tail_tolerance,
+            "regularization": self.regularization,
+            "half_life_days": self.half_life_days,
+            "league_home_advantage": self.league_home_advantage,
+            "league_avg_goals": self.league_avg_goals,
+            "pair_table_fields": list(PAIR_TABLE_FIELDS),
+        }
+        write_artifact(filepath, metadata, arrays)
     
     @staticmethod
-    def load_model(filepath: str):
-        """Load model from disk"""
-        with open(filepath, 'rb') as f:
-            return pickle.load(f)
+    def load_model(filepath: str, mmap_mode: Optional[str] = "c") -> "PoissonModel":
+        """
+        Load a model saved by save_model.
+        
+        By default the arrays are copy-on-write memory maps of the file:
+        loading does not read the all-pairs table, and processes loading the
+        same artifact share its pages until they update the model.
+        
+        Args:
+            filepath: Artifact path
+            mmap_mode: "c" (copy-on-write), "r" (read-only) or None to read into memory
+            
+        Returns:
+            PoissonModel ready for predictions
+        """
+        metadata, arrays = read_artifact(filepath, mmap_mode)
+        if metadata.get("model_name") != "POISSON":
+            raise ValueError(f"{filepath} holds a {metadata.get('model_name')} model, not POISSON")
+        
+        model = PoissonModel(
+            tail_tolerance=metadata["tail_tolerance"],
+            regularization=metadata["regularization"],
+            half_life_days=metadata["half_life_days"],
+        )
+        model.is_trained = metadata["is_trained"]
+        # Artifacts written before fitted_at was recorded were saved right after their fit
+        fitted_at = metadata.get("fitted_at") or metadata.get("saved_at")
+        model.fitted_at = datetime.fromisoformat(fitted_at) if fitted_at else None
+        model.league_home_advantage = metadata["league_home_advantage"]
+        model.league_avg_goals = metadata["league_avg_goals"]
+        
+        team_ids = arrays["team_ids"]
+        team_list = team_ids.tolist()
+        model.home_attack_param = dict(zip(team_list, arrays["home_attack"].tolist()))
+        model.home_defense_param = dict(zip(team_list, arrays["home_defense"].tolist()))
+        model.away_attack_param = dict(zip(team_list, arrays["away_attack"].tolist()))
+        model.away_defense_param = dict(zip(team_list, arrays["away_defense"].tolist()))
+        model._parameter_arrays = (
+            team_ids,
+            arrays["home_attack"],
+            arrays["home_defense"],
+            arrays["away_attack"],
+            arrays["away_defense"],
+        )
+        model._team_index = {team_id: i for i, team_id in enumerate(team_list)}
+        
+        if "fitted_params" in arrays:
+            model._fitted_team_ids = arrays["fitted_team_ids"]
+            model._fitted_params = arrays["fitted_params"]
+        
+        if "pair_table" in arrays and metadata.get("pair_table_fields") == list(PAIR_TABLE_FIELDS):
+            model.pair_table = arrays["pair_table"]
+        elif model.is_trained:
+            # Table layout changed since the artifact was written
+            model._rebuild_pair_table()
+        
+        return model
@@ -0,0 +1,216 @@
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import multiprocessing
+import os
+
+from app.ml.poisson_model import PoissonModel, grid_size, score_grid
+
+# Simulated seasons generated per vectorized chunk (and per worker task)
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def create_process_pool(n_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool for simulations, meant to be created once and shared.
+
+    Workers are started by a forkserver (spawn where that is unavailable)
+    rather than forked from the caller: forking a multithreaded server can
+    copy locks held by other threads into the child and deadlock it.
+
+    Args:
+        n_workers: Worker processes (defaults to one per CPU)
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=n_workers or os.cpu_count() or 1, mp_context=context)
+
+
+def _goal_thresholds(lam: np.ndarray, max_goals: int) -> np.ndarray:
+    """
+    Inverse-cdf thresholds for drawing goals, shape (max_goals x fixtures).
+
+    A uniform draw u scores k goals when it exceeds exactly the first k
+    rows; the mass beyond the grid lands on max_goals.
+    """
+    cdf = np.cumsum(score_grid(max_goals).pmf(lam), axis=-1)
+    return np.ascontiguousarray(cdf[:, :-1].T, dtype=np.float32)
+
+
+def _draw_goals(rng: np.random.Generator, thresholds: np.ndarray, n_simulations: int) -> np.ndarray:
+    """Goals per (fixture x simulation), by counting the thresholds each uniform draw exceeds"""
+    uniforms = rng.random((thresholds.shape[1], n_simulations), dtype=np.float32)
+    goals = np.zeros(uniforms.shape, dtype=np.int8)
+    for threshold in thresholds:
+        goals += uniforms > threshold[:, np.newaxis]
+    return goals
+
+
+def _simulate_chunk(
+    home_thresholds: np.ndarray,
+    away_thresholds: np.ndarray,
+    home_index: np.ndarray,
+    away_index: np.ndarray,
+    base_points: np.ndarray,
+    base_goal_difference: np.ndarray,
+    base_goals_for: np.ndarray,
+    n_simulations: int,
+    seed: np.random.SeedSequence
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate the remaining fixtures n_simulations times.
+
+    Kept at module level so it can be shipped to worker processes.
+
+    Returns:
+        Dictionary with a (team x final position) count matrix and the summed
+        final points per team
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(base_points)
+
+    # Fixture-major (fixture x simulation) small integers, so each fixture's
+    # results are one contiguous row
+    home_goals = _draw_goals(rng, home_thresholds, n_simulations)
+    away_goals = _draw_goals(rng, away_thresholds, n_simulations)
+    drawn = home_goals == away_goals
+    home_points = 3 * (home_goals > away_goals).astype(np.int8) + drawn
+    away_points = 3 * (home_goals < away_goals).astype(np.int8) + drawn
+
+    # Integer row adds onto each side's team; far cheaper than an
+    # incidence-matrix product over every (fixture, team) pair
+    points = np.zeros((n_teams, n_simulations), dtype=np.int32)
+    goals_for = np.zeros_like(points)
+    goals_against = np.zeros_like(points)
+    for fixture, (home, away) in enumerate(zip(home_index.tolist(), away_index.tolist())):
+        points[home] += home_points[fixture]
+        points[away] += away_points[fixture]
+        goals_for[home] += home_goals[fixture]
+        goals_for[away] += away_goals[fixture]
+        goals_against[home] += away_goals[fixture]
+        goals_against[away] += home_goals[fixture]
+
+    goal_difference = (goals_for - goals_against).T + base_goal_difference
+    goals_for = goals_for.T + base_goals_for
+    points = points.T + base_points
+
+    # Rank on points, then goal difference, then goals scored, then at random
+    order = np.lexsort((
+        rng.random((n_simulations, n_teams)),
+        -goals_for,
+        -goal_difference,
+        -points,
+    ), axis=-1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_teams), axis=-1)
+
+    team_position = np.arange(n_teams) * n_teams + positions
+    return {
+        "position_counts": np.bincount(team_position.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams),
+        "points_sum": points.sum(axis=0),
+    }
+
+
+class SeasonSimulator:
+    """
+    Monte Carlo simulator for the remainder of a league season.
+
+    Goals for every remaining fixture are drawn from the Poisson model's
+    expected goals, for many simulated seasons at once. Chunks of simulations
+    are submitted to a shared executor (see create_process_pool), each with
+    its own independent RNG stream spawned from one seed, so results are
+    reproducible for a given seed and chunk size regardless of the number of
+    workers. Without an executor the chunks run in the calling thread.
+    """
+
+    def __init__(
+        self,
+        model: PoissonModel,
+        executor: Optional[Executor] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        self.model = model
+        self.executor = executor
+        self.chunk_size = chunk_size
+
+    def simulate(
+        self,
+        team_ids: Sequence[int],
+        current_points: Sequence[int],
+        current_goal_difference: Sequence[int],
+        current_goals_for: Sequence[int],
+        home_team_ids: Sequence[int],
+        away_team_ids: Sequence[int],
+        n_simulations: int = 100000,
+        seed: Optional[int] = None,
+        top_places: int = 4,
+        relegation_places: int = 3
+    ) -> List[Dict]:
+        """
+        Simulate the rest of the season.
+
+        Args:
+            team_ids: IDs of every team in the league table
+            current_points: Points per team so far, aligned with team_ids
+            current_goal_difference: Goal difference per team so far
+            current_goals_for: Goals scored per team so far
+            home_team_ids: Home team of each remaining fixture
+            away_team_ids: Away team of each remaining fixture
+            n_simulations: Number of simulated seasons
+            seed: Seed for the RNG streams (None for fresh entropy)
+            top_places: Places counted as "top" (e.g. Champions League spots)
+            relegation_places: Places relegated at the bottom of the table
+
+        Returns:
+            One dictionary per team with title, top and relegation probabilities,
+            expected points and the distribution of final positions
+        """
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        n_teams = len(team_ids)
+        lambda_home, lambda_away = self.model.expected_goals_many(home_team_ids, away_team_ids)
+
+        position_of = {team_id: i for i, team_id in enumerate(team_ids.tolist())}
+        max_goals = grid_size(lambda_home, lambda_away, self.model.tail_tolerance)
+
+        shared = (
+            _goal_thresholds(lambda_home, max_goals),
+            _goal_thresholds(lambda_away, max_goals),
+            np.array([position_of[t] for t in home_team_ids], dtype=np.int64),
+            np.array([position_of[t] for t in away_team_ids], dtype=np.int64),
+            np.asarray(current_points, dtype=np.int64),
+            np.asarray(current_goal_difference, dtype=np.int64),
+            np.asarray(current_goals_for, dtype=np.int64),
+        )
+        chunk_sizes = [
+            min(self.chunk_size, n_simulations - start)
+            for start in range(0, n_simulations, self.chunk_size)
+        ]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+        if self.executor is None or len(chunk_sizes) == 1:
+            results = [_simulate_chunk(*shared, size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+        else:
+            futures = [
+                self.executor.submit(_simulate_chunk, *shared, size, chunk_seed)
+                for size, chunk_seed in zip(chunk_sizes, seeds)
+            ]
+            results = [future.result() for future in futures]
+
+        position_counts = sum(result["position_counts"] for result in results)
+        points_sum = sum(result["points_sum"] for result in results)
+        position_probs = position_counts / n_simulations
+
+        return [
+            {
+                "team_id": int(team_id),
+                "title_prob": float(position_probs[i, 0]),
+                "top_prob": float(position_probs[i, :top_places].sum()),
+                "relegation_prob": float(position_probs[i, n_teams - relegation_places:].sum()),
+                "expected_points": float(points_sum[i] / n_simulations),
+                "position_probs": position_probs[i].tolist(),
+            }
+            for i, team_id in enumerate(team_ids.tolist())
+        ]
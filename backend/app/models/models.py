@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -79,6 +79,13 @@ class Match(Base):
     home_team = relationship("Team", foreign_keys=[home_team_id], back_populates="home_matches")
     away_team = relationship("Team", foreign_keys=[away_team_id], back_populates="away_matches")
     predictions = relationship("Prediction", back_populates="match", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Fixture lists: status equality plus a match_date range/order
+        Index("ix_matches_status_match_date", "status", "match_date"),
+        # Head-to-head: both teams, newest first
+        Index("ix_matches_home_away_date", "home_team_id", "away_team_id", "match_date"),
+    )
 
 
 class Prediction(Base):
@@ -90,6 +97,7 @@ class Prediction(Base):
     
     # Model type
     model_type = Column(String(50))  # e.g., "POISSON", "XGBOOST", "ENSEMBLE"
+    model_version = Column(String(50), nullable=True)  # registry version that produced it
     
     # Outcome predictions
     home_win_prob = Column(Float)
@@ -119,6 +127,15 @@ class Prediction(Base):
     
     # Relationships
     match = relationship("Match", back_populates="predictions")
+    
+    __table_args__ = (
+        # One prediction per match, model and model version; target of batch upserts
+        Index("uq_predictions_match_model_version", "match_id", "model_type", "model_version", unique=True),
+        # Latest prediction per match and model type
+        Index("ix_predictions_match_model_created", "match_id", "model_type", "created_at"),
+        # Archive pages in (created_at, id) keyset order
+        Index("ix_predictions_created_at_id", "created_at", "id"),
+    )
 
 
 class User(Base):
@@ -169,3 +186,18 @@ class UserPrediction(Base):
     # Relationships
     user = relationship("User", back_populates="user_predictions")
     match = relationship("Match")
+
+
+class SyncState(Base):
+    """High-water marks for incremental syncs from football-data.org"""
+    __tablename__ = "sync_state"
+    
+    resource = Column(String(50), primary_key=True)  # e.g. "match_results", "fixtures", "standings"
+    last_synced_at = Column(DateTime, nullable=True)  # start of the last successful run
+    last_updated = Column(DateTime, nullable=True)  # newest upstream lastUpdated processed
+    
+    # Lease held by the worker currently running this resource's sync job
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
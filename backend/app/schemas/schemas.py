@@ -103,6 +103,7 @@ class PredictionBase(BaseModel):
 class PredictionCreate(PredictionBase):
     match_id: int
     model_type: str
+    model_version: Optional[str] = None
     confidence_score: float
     most_likely_score: Optional[str] = None
     over_2_5_goals: Optional[float] = None
@@ -117,6 +118,7 @@ class PredictionResponse(PredictionBase):
     id: int
     match_id: int
     model_type: str
+    model_version: Optional[str] = None
     most_likely_score: Optional[str]
     over_2_5_goals: Optional[float]
     under_2_5_goals: Optional[float]
@@ -138,6 +140,19 @@ class MatchWithPredictionResponse(MatchDetailedResponse):
     predictions: List[PredictionResponse] = []
 
 
+# Pagination Schemas
+class MatchPage(BaseModel):
+    """One page of matches; pass next_cursor back to get the following page"""
+    items: List[MatchResponse]
+    next_cursor: Optional[str] = None
+
+
+class PredictionPage(BaseModel):
+    """One page of predictions; pass next_cursor back to get the following page"""
+    items: List[PredictionResponse]
+    next_cursor: Optional[str] = None
+
+
 # User Schemas
 class UserBase(BaseModel):
     email: EmailStr
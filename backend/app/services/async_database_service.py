@@ -0,0 +1,300 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, desc, and_, or_, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from app.models.models import Match, Team, Prediction
+from app.schemas.schemas import PredictionCreate, PredictionResponse
+from app.services.database_service import prediction_cache, cache_latest_prediction
+from app.utils.response_cache import response_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches are always returned with both teams loaded, since lazy loading is
+# not available on an AsyncSession and every response includes team names
+_with_teams = (selectinload(Match.home_team), selectinload(Match.away_team))
+
+# Dialect-specific INSERT constructs that support ON CONFLICT
+_upsert_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class AsyncTeamService:
+    """Async counterpart of TeamService for request handlers"""
+    
+    @staticmethod
+    async def get_team(db: AsyncSession, team_id: int) -> Optional[Team]:
+        """Get team by ID"""
+        return await db.get(Team, team_id)
+    
+    @staticmethod
+    async def get_team_by_name(db: AsyncSession, name: str) -> Optional[Team]:
+        """Get team by name"""
+        result = await db.execute(select(Team).where(Team.name == name))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_all_teams(db: AsyncSession) -> List[Team]:
+        """Get all teams"""
+        result = await db.execute(select(Team))
+        return list(result.scalars().all())
+
+
+class AsyncMatchService:
+    """Async counterpart of MatchService for request handlers"""
+    
+    @staticmethod
+    async def get_match(db: AsyncSession, match_id: int) -> Optional[Match]:
+        """Get match by ID, with both teams loaded"""
+        return await db.get(Match, match_id, options=_with_teams)
+    
+    @staticmethod
+    async def get_upcoming_matches(db: AsyncSession, days_ahead: int = 10, limit: int = 50) -> List[Match]:
+        """Get upcoming matches within specified days"""
+        from_date = datetime.utcnow()
+        to_date = from_date + timedelta(days=days_ahead)
+        
+        result = await db.execute(
+            select(Match).options(*_with_teams).where(
+                and_(
+                    Match.match_date >= from_date,
+                    Match.match_date <= to_date,
+                    Match.status == "SCHEDULED"
+                )
+            ).order_by(Match.match_date).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_remaining_matches(db: AsyncSession) -> List[Match]:
+        """Get every match still to be played, regardless of date"""
+        result = await db.execute(
+            select(Match).where(Match.status == "SCHEDULED").order_by(Match.match_date)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_recent_matches(db: AsyncSession, days_back: int = 30, limit: int = 50) -> List[Match]:
+        """Get recent completed matches"""
+        from_date = datetime.utcnow() - timedelta(days=days_back)
+        
+        result = await db.execute(
+            select(Match).options(*_with_teams).where(
+                and_(
+                    Match.match_date >= from_date,
+                    Match.status == "FINISHED"
+                )
+            ).order_by(desc(Match.match_date)).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def list_matches(
+        db: AsyncSession,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        status: Optional[str] = None,
+        team_id: Optional[int] = None,
+        ascending: bool = False
+    ) -> List[Match]:
+        """
+        Page through matches in (match_date, id) order.
+        
+        Seeks past the given keyset position instead of using OFFSET, so any
+        page costs the same as the first.
+        
+        Args:
+            db: Database session
+            after: (match_date, id) of the last match on the previous page
+            limit: Maximum number of matches to return
+            status: Only matches with this status
+            team_id: Only matches involving this team
+            ascending: Oldest first instead of newest first
+        """
+        query = select(Match).options(*_with_teams)
+        if status is not None:
+            query = query.where(Match.status == status)
+        if team_id is not None:
+            query = query.where(or_(Match.home_team_id == team_id, Match.away_team_id == team_id))
+        
+        key = tuple_(Match.match_date, Match.id)
+        if after is not None:
+            query = query.where(key > tuple_(*after) if ascending else key < tuple_(*after))
+        if ascending:
+            query = query.order_by(Match.match_date, Match.id)
+        else:
+            query = query.order_by(desc(Match.match_date), desc(Match.id))
+        
+        result = await db.execute(query.limit(limit))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_team_recent_matches(db: AsyncSession, team_id: int, limit: int = 10) -> List[Match]:
+        """Get recent matches for a specific team"""
+        from_date = datetime.utcnow() - timedelta(days=90)
+        
+        result = await db.execute(
+            select(Match).options(*_with_teams).where(
+                and_(
+                    Match.match_date >= from_date,
+                    or_(Match.home_team_id == team_id, Match.away_team_id == team_id),
+                    Match.status == "FINISHED"
+                )
+            ).order_by(desc(Match.match_date)).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def head_to_head(db: AsyncSession, team1_id: int, team2_id: int, limit: int = 10) -> List[Match]:
+        """Get head-to-head records between two teams"""
+        result = await db.execute(
+            select(Match).options(*_with_teams).where(
+                and_(
+                    or_(
+                        and_(Match.home_team_id == team1_id, Match.away_team_id == team2_id),
+                        and_(Match.home_team_id == team2_id, Match.away_team_id == team1_id)
+                    ),
+                    Match.status == "FINISHED"
+                )
+            ).order_by(desc(Match.match_date)).limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+class AsyncPredictionService:
+    """Async counterpart of PredictionService for request handlers"""
+    
+    @staticmethod
+    async def create_prediction(db: AsyncSession, prediction_data: PredictionCreate) -> Prediction:
+        """Create new prediction"""
+        prediction = Prediction(**prediction_data.model_dump())
+        db.add(prediction)
+        await db.commit()
+        await db.refresh(prediction)
+        cache_latest_prediction(prediction)
+        response_cache.invalidate(f"predictions:{prediction.match_id}")
+        return prediction
+    
+    @staticmethod
+    async def upsert_predictions(db: AsyncSession, predictions: List[PredictionCreate]) -> List[PredictionResponse]:
+        """
+        Write a slate of predictions in a single statement and transaction.
+        
+        Rows are keyed on (match_id, model_type, model_version): a prediction
+        already stored for the same model version is overwritten instead of
+        duplicated, so repeating a batch is idempotent. The stored rows come
+        back through RETURNING rather than being re-read one by one.
+        
+        Args:
+            db: Database session
+            predictions: Predictions to store; model_version must be set
+        
+        Returns:
+            Snapshots of the stored predictions, in input order
+        """
+        if not predictions:
+            return []
+        
+        insert = _upsert_inserts.get(db.bind.dialect.name)
+        if insert is None:
+            raise NotImplementedError(f"Prediction upserts are not supported on {db.bind.dialect.name}")
+        
+        now = datetime.utcnow()
+        rows = [{**prediction.model_dump(), "created_at": now, "updated_at": now} for prediction in predictions]
+        stmt = insert(Prediction)
+        key_columns = ("match_id", "model_type", "model_version")
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={
+                column: stmt.excluded[column]
+                for column in rows[0]
+                if column not in key_columns and column != "created_at"
+            }
+        ).returning(Prediction)
+        
+        result = await db.scalars(stmt, rows, execution_options={"populate_existing": True})
+        stored = {(p.match_id, p.model_type, p.model_version): p for p in result.all()}
+        await db.commit()
+        
+        snapshots = [
+            PredictionResponse.model_validate(stored[(p.match_id, p.model_type, p.model_version)])
+            for p in predictions
+        ]
+        for snapshot in snapshots:
+            cache_latest_prediction(snapshot)
+        response_cache.invalidate(*{f"predictions:{p.match_id}" for p in predictions})
+        logger.info(f"Upserted {len(snapshots)} predictions")
+        return snapshots
+    
+    @staticmethod
+    async def get_match_predictions(db: AsyncSession, match_id: int) -> List[Prediction]:
+        """Get all predictions for a match"""
+        result = await db.execute(select(Prediction).where(Prediction.match_id == match_id))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def list_predictions(
+        db: AsyncSession,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        model_type: Optional[str] = None,
+        match_id: Optional[int] = None
+    ) -> List[Prediction]:
+        """
+        Page through stored predictions, newest first by (created_at, id).
+        
+        Args:
+            db: Database session
+            after: (created_at, id) of the last prediction on the previous page
+            limit: Maximum number of predictions to return
+            model_type: Only predictions from this model type
+            match_id: Only predictions for this match
+        """
+        query = select(Prediction)
+        if model_type is not None:
+            query = query.where(Prediction.model_type == model_type)
+        if match_id is not None:
+            query = query.where(Prediction.match_id == match_id)
+        if after is not None:
+            query = query.where(tuple_(Prediction.created_at, Prediction.id) < tuple_(*after))
+        
+        result = await db.execute(
+            query.order_by(desc(Prediction.created_at), desc(Prediction.id)).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_latest_prediction(
+        db: AsyncSession,
+        match_id: int,
+        model_type: str = "ENSEMBLE",
+        model_version: Optional[str] = None
+    ) -> Optional[PredictionResponse]:
+        """
+        Get latest prediction for a match by model type, optionally from one model version.
+        
+        Served from the in-memory prediction cache when possible; the result
+        is a read-only snapshot rather than a session-bound row.
+        """
+        key = (match_id, model_type, model_version)
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        query = select(Prediction).where(
+            and_(
+                Prediction.match_id == match_id,
+                Prediction.model_type == model_type
+            )
+        )
+        if model_version is not None:
+            query = query.where(Prediction.model_version == model_version)
+        result = await db.execute(query.order_by(desc(Prediction.created_at)).limit(1))
+        prediction = result.scalars().first()
+        if prediction is None:
+            return None
+        
+        snapshot = PredictionResponse.model_validate(prediction)
+        prediction_cache.set(key, snapshot)
+        return snapshot
@@ -1,198 +1,417 @@
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy import insert
+from datetime import datetime, timedelta, timezone
 from app.services.football_data_service import FootballDataService
-from app.services.database_service import TeamService, MatchService
-from app.models.models import Match
-from app.schemas.schemas import MatchCreate
+from app.services.database_service import TeamService, MatchService, SyncStateService
+from app.models.models import Match, SyncState, Team
+from app.ml.poisson_model import PoissonModel
+from app.ml.elo_model import EloModel
+from app.services.rating_service import RatingService
+from app.utils.response_cache import response_cache
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# SyncState resources, one per kind of sync
+STANDINGS = "standings"
+FIXTURES = "fixtures"
+RESULTS = "match_results"
+
+# Results are re-read from this long before the previous run, to catch
+# matches that were still being played when it ran
+RESULTS_OVERLAP = timedelta(days=1)
+
+# Standings table fields copied onto Team columns
+STANDING_FIELDS = {
+    "playedGames": "matches_played",
+    "won": "wins",
+    "draw": "draws",
+    "lost": "losses",
+    "goalsFor": "goals_for",
+    "goalsAgainst": "goals_against",
+}
+
 
 class DataSyncService:
-    """Service for syncing data from football-data.org"""
+    """
+    Service for syncing data from football-data.org.
+    
+    Each sync loads the rows it may touch in one query keyed by external_id
+    and diffs the API payload against them in memory. New rows go in as one
+    executemany INSERT per table; changed rows are updated on the loaded
+    objects, which the session flushes as one executemany UPDATE. Everything
+    commits together instead of one query and commit per API row.
     
-    def __init__(self, db: Session, football_data_service: FootballDataService):
+    Runs are incremental: each resource keeps a SyncState row with the time
+    of its last run and the newest upstream lastUpdated it applied. Results
+    are asked for only since the last run, and those not updated upstream
+    since the watermark are skipped; a result that could not be stored
+    holds the watermark back so the next run sees it again. Watermarks
+    commit in the same transaction as the data they describe, and a failed
+    run rolls back and raises, so the next run retries the same window.
+    
+    Only the API calls run on the event loop; database work and model
+    updates run on a worker thread, so a sync inside the API process never
+    stalls requests.
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        football_data_service: FootballDataService,
+        model: Optional[PoissonModel] = None,
+        elo_model: Optional[EloModel] = None
+    ):
         self.db = db
         self.api = football_data_service
+        # Models of working copies (ModelRegistry.working_copy), updated in
+        # place as results land; the caller publishes them once the sync commits
+        self.model = model
+        self.elo_model = elo_model
+        self.corrected: List[Match] = []  # matches whose stored score the last results sync changed
     
     async def sync_teams(self) -> int:
         """Sync Premier League teams from API"""
         try:
+            started = datetime.utcnow()
             teams_data = await self.api.get_league_standings()
             
             if not teams_data or "standings" not in teams_data:
                 logger.warning("No standings data from API")
                 return 0
-            
-            synced_count = 0
-            for standings in teams_data.get("standings", []):
-                for table_entry in standings.get("table", []):
-                    team_data = table_entry.get("team", {})
-                    external_id = team_data.get("id")
-                    name = team_data.get("name")
-                    
-                    if not external_id or not name:
-                        continue
-                    
-                    # Check if team exists
-                    existing_team = self.db.query(Match).filter(
-                        Match.external_id == external_id
-                    ).first()
-                    
-                    if not existing_team:
-                        team = TeamService.create_team(
-                            self.db,
-                            name=name,
-                            short_code=team_data.get("tla", name[:3]),
-                            external_id=external_id
-                        )
-                        synced_count += 1
-                    else:
-                        # Update stats
-                        TeamService.update_team_stats(
-                            self.db,
-                            existing_team.id,
-                            wins=table_entry.get("won", 0),
-                            draws=table_entry.get("draw", 0),
-                            losses=table_entry.get("lost", 0),
-                            goals_for=table_entry.get("goalsFor", 0),
-                            goals_against=table_entry.get("goalsAgainst", 0),
-                            matches_played=table_entry.get("playedGames", 0)
-                        )
-                        synced_count += 1
-            
-            logger.info(f"Synced {synced_count} teams")
-            return synced_count
+            return await asyncio.to_thread(self._store_standings, teams_data, started)
         
         except Exception as e:
             logger.error(f"Error syncing teams: {e}")
-            return 0
+            await asyncio.to_thread(self.db.rollback)
+            raise
     
     async def sync_upcoming_matches(self, days_ahead: int = 14) -> int:
-        """Sync upcoming matches from API"""
+        """
+        Sync upcoming matches from API, moving any that were rescheduled.
+        
+        Every fixture in the window is diffed: one that just entered it
+        usually has an old lastUpdated, so the watermark cannot be used to
+        skip rows here.
+        """
         try:
+            started = datetime.utcnow()
             matches_data = await self.api.get_league_matches(days_ahead=days_ahead)
             
             if not matches_data or "matches" not in matches_data:
                 logger.warning("No matches data from API")
                 return 0
-            
-            synced_count = 0
-            for match_data in matches_data.get("matches", []):
-                external_id = match_data.get("id")
-                
-                # Check if match already exists
-                existing = self.db.query(Match).filter(
-                    Match.external_id == external_id
-                ).first()
-                
-                if existing:
-                    continue
-                
-                # Get or create teams
-                home_team_data = match_data.get("homeTeam", {})
-                away_team_data = match_data.get("awayTeam", {})
-                
-                home_team = self._get_or_create_team(home_team_data)
-                away_team = self._get_or_create_team(away_team_data)
-                
-                if not home_team or not away_team:
-                    continue
-                
-                # Create match
-                match_date = datetime.fromisoformat(
-                    match_data.get("utcDate", "").replace("Z", "+00:00")
-                )
-                
-                match_create = MatchCreate(
-                    home_team_id=home_team.id,
-                    away_team_id=away_team.id,
-                    match_date=match_date,
-                    external_id=external_id,
-                    venue=match_data.get("venue")
-                )
-                
-                MatchService.create_match(self.db, match_create)
-                synced_count += 1
-            
-            logger.info(f"Synced {synced_count} upcoming matches")
-            return synced_count
+            return await asyncio.to_thread(self._store_fixtures, matches_data, started)
         
         except Exception as e:
             logger.error(f"Error syncing matches: {e}")
-            return 0
+            await asyncio.to_thread(self.db.rollback)
+            raise
     
     async def sync_match_results(self, days_back: int = 30) -> int:
-        """Sync completed match results"""
+        """
+        Sync completed match results changed since the last run.
+        
+        Results for matches never synced as fixtures are inserted, and
+        scores corrected upstream overwrite the stored ones; corrected
+        matches are kept in self.corrected, since an online model update
+        cannot take the old score back out.
+        
+        Args:
+            days_back: How far back the first run looks; later runs start
+                from the previous run's watermark
+                
+        Returns:
+            Number of results stored or corrected
+        """
         try:
-            from_date = (datetime.utcnow() - timedelta(days=days_back)).date()
-            to_date = datetime.utcnow().date()
+            started = datetime.utcnow()
+            self.corrected = []
+            state = await asyncio.to_thread(SyncStateService.get_state, self.db, RESULTS)
+            if state.last_synced_at is not None:
+                from_date = state.last_synced_at - RESULTS_OVERLAP
+            else:
+                from_date = started - timedelta(days=days_back)
             
-            matches_data = await self.api.get_league_matches()
+            # The query is the same all day and upstream sends no validators
+            # for it, so a cached copy would replay stale scores during live polls
+            matches_data = await self.api.get_league_matches(
+                date_from=from_date.date(),
+                date_to=started.date(),
+                status="FINISHED",
+                max_age=0
+            )
             
             if not matches_data or "matches" not in matches_data:
                 return 0
-            
-            synced_count = 0
-            for match_data in matches_data.get("matches", []):
-                if match_data.get("status") != "FINISHED":
-                    continue
-                
-                external_id = match_data.get("id")
-                
-                # Find match in DB
-                match = self.db.query(Match).filter(
-                    Match.external_id == external_id
-                ).first()
-                
-                if not match:
-                    continue
-                
-                # Update result if not already set
-                if match.home_goals is None:
-                    result = match_data.get("score", {})
-                    home_goals = result.get("fullTime", {}).get("home")
-                    away_goals = result.get("fullTime", {}).get("away")
-                    
-                    if home_goals is not None and away_goals is not None:
-                        MatchService.update_match(
-                            self.db,
-                            match.id,
-                            from pydantic import BaseModel
-                            class Update:
-                                home_goals = home_goals
-                                away_goals = away_goals
-                                status = "FINISHED"
-                        )
-                        synced_count += 1
-            
-            logger.info(f"Synced {synced_count} match results")
-            return synced_count
+            return await asyncio.to_thread(self._store_results, matches_data, state, started)
         
         except Exception as e:
             logger.error(f"Error syncing results: {e}")
-            return 0
+            await asyncio.to_thread(self.db.rollback)
+            raise
     
-    def _get_or_create_team(self, team_data: Dict[str, Any]):
-        """Get or create a team from API data"""
-        external_id = team_data.get("id")
-        name = team_data.get("name")
+    def _store_standings(self, teams_data: Dict[str, Any], started: datetime) -> int:
+        """Apply a standings payload and commit it (runs on a worker thread)"""
+        # HOME and AWAY tables would overwrite the season totals
+        table = [
+            table_entry
+            for standings in teams_data.get("standings", [])
+            if standings.get("type", "TOTAL") == "TOTAL"
+            for table_entry in standings.get("table", [])
+        ]
+        teams = self._ensure_teams(
+            TeamService.get_teams_by_external_id(self.db),
+            [table_entry.get("team", {}) for table_entry in table]
+        )
         
-        if not external_id or not name:
-            return None
+        synced_count = 0
+        for table_entry in table:
+            team = teams.get(table_entry.get("team", {}).get("id"))
+            if team is None:
+                continue
+            
+            for field, column in STANDING_FIELDS.items():
+                setattr(team, column, table_entry.get(field, 0))
+            synced_count += 1
+        
+        SyncStateService.advance(SyncStateService.get_state(self.db, STANDINGS), started)
+        self._commit("teams")
+        logger.info(f"Synced {synced_count} teams")
+        return synced_count
+    
+    def _store_fixtures(self, matches_data: Dict[str, Any], started: datetime) -> int:
+        """Apply a fixture window and commit it (runs on a worker thread)"""
+        state = SyncStateService.get_state(self.db, FIXTURES)
+        payload = [m for m in matches_data.get("matches", []) if m.get("id")]
+        existing = MatchService.get_matches_by_external_id(self.db, [m["id"] for m in payload])
+        
+        synced_count = 0
+        new_matches = {}
+        for match_data in payload:
+            match_date = self._parse_date(match_data.get("utcDate"))
+            if match_date is None:
+                continue
+            
+            match = existing.get(match_data["id"])
+            if match is None:
+                new_matches[match_data["id"]] = (match_data, match_date)
+            elif match.status == "SCHEDULED" and match.match_date != match_date:
+                match.match_date = match_date
+                synced_count += 1
         
-        existing = self.db.query(Match).filter(
-            Match.external_id == external_id
-        ).first()
+        inserted = self._insert_matches(new_matches)
+        synced_count += len(inserted)
+        
+        applied, skipped = self._split_applied(payload, existing, inserted)
+        SyncStateService.advance(state, started, self._newest_update(applied, skipped))
+        self._commit("teams", "matches")
+        logger.info(f"Synced {synced_count} upcoming matches")
+        return synced_count
+    
+    def _store_results(self, matches_data: Dict[str, Any], state: SyncState, started: datetime) -> int:
+        """Apply changed results, update the models and commit (runs on a worker thread)"""
+        payload = [
+            m for m in self._changed_since(matches_data.get("matches", []), state.last_updated)
+            if m.get("status") == "FINISHED" and m.get("id") and self._full_time(m) is not None
+        ]
+        matches = MatchService.get_matches_by_external_id(self.db, [m["id"] for m in payload])
         
-        if existing:
-            return existing
+        finished_matches = []
+        new_matches = {}
+        for match_data in payload:
+            home_goals, away_goals = self._full_time(match_data)
+            match = matches.get(match_data["id"])
+            if match is None:
+                match_date = self._parse_date(match_data.get("utcDate"))
+                if match_date is not None:
+                    new_matches[match_data["id"]] = (match_data, match_date)
+                continue
+            if (match.home_goals, match.away_goals) == (home_goals, away_goals):
+                continue
+            
+            if match.home_goals is None:
+                self._update_model(match, home_goals, away_goals)
+                finished_matches.append(match)
+            else:
+                self.corrected.append(match)
+            match.home_goals = home_goals
+            match.away_goals = away_goals
+            match.status = "FINISHED"
+        
+        inserted = self._insert_matches(new_matches)
+        if inserted:
+            # Results for fixtures this database never saw
+            for match in MatchService.get_matches_by_external_id(self.db, inserted).values():
+                self._update_model(match, match.home_goals, match.away_goals)
+                finished_matches.append(match)
+        
+        if self.elo_model is not None and (finished_matches or self.corrected):
+            # Flushed first so a late result's replay reads it back;
+            # results and the ratings they move commit together
+            self.db.flush()
+            RatingService(self.db, self.elo_model).apply_results(
+                finished_matches + self.corrected, corrected=self.corrected
+            )
+        
+        applied, skipped = self._split_applied(payload, matches, inserted)
+        SyncStateService.advance(state, started, self._newest_update(applied, skipped))
+        self._commit("matches", "teams")
+        logger.info(f"Synced {len(finished_matches)} match results and {len(self.corrected)} corrections")
+        return len(finished_matches) + len(self.corrected)
+    
+    def _commit(self, *tags: str) -> None:
+        """Commit the pending batch and drop cached responses built from it"""
+        self.db.commit()
+        response_cache.invalidate(*tags)
+    
+    def _update_model(self, match: Match, home_goals: int, away_goals: int) -> None:
+        """Apply a newly synced result to the working model without a full refit"""
+        if self.model is None or not self.model.is_trained:
+            return
+        try:
+            self.model.update_with_result(match.home_team_id, match.away_team_id, home_goals, away_goals)
+        except ValueError as e:
+            logger.warning(f"Skipping incremental model update for match {match.id}: {e}")
+    
+    def _insert_matches(self, new_matches: Dict[int, tuple]) -> List[int]:
+        """
+        Insert API matches missing locally, creating their teams as needed.
         
-        return TeamService.create_team(
-            self.db,
-            name=name,
-            short_code=team_data.get("tla", name[:3]),
-            external_id=external_id
+        Args:
+            new_matches: (API match, parsed match date) keyed by external_id
+            
+        Returns:
+            External IDs of the matches inserted
+        """
+        if not new_matches:
+            return []
+        teams = self._ensure_teams(
+            TeamService.get_teams_by_external_id(self.db),
+            [
+                match_data.get(side, {})
+                for match_data, _ in new_matches.values()
+                for side in ("homeTeam", "awayTeam")
+            ]
         )
+        rows = self._match_rows(teams, new_matches)
+        if rows:
+            self.db.execute(insert(Match), rows)
+        return [row["external_id"] for row in rows]
+    
+    def _ensure_teams(self, teams: Dict[int, Team], payload: Iterable[Dict[str, Any]]) -> Dict[int, Team]:
+        """
+        Insert the teams from API data missing from a preloaded map.
+        
+        Args:
+            teams: Existing teams keyed by external_id
+            payload: API team objects, possibly repeated
+            
+        Returns:
+            The map itself if nothing was new, otherwise a reloaded one
+            that includes the inserted teams
+        """
+        new_rows = {}
+        for team_data in payload:
+            external_id = team_data.get("id")
+            name = team_data.get("name")
+            if not external_id or not name or external_id in teams:
+                continue
+            new_rows.setdefault(external_id, {
+                "external_id": external_id,
+                "name": name,
+                "short_code": team_data.get("tla", name[:3]),
+            })
+        
+        if not new_rows:
+            return teams
+        self.db.execute(insert(Team), list(new_rows.values()))
+        return TeamService.get_teams_by_external_id(self.db)
+    
+    @classmethod
+    def _match_rows(cls, teams: Dict[int, Team], new_matches: Dict[int, tuple]) -> List[Dict[str, Any]]:
+        """INSERT parameters for new API matches whose teams are both known"""
+        rows = []
+        for external_id, (match_data, match_date) in new_matches.items():
+            home_team = teams.get(match_data.get("homeTeam", {}).get("id"))
+            away_team = teams.get(match_data.get("awayTeam", {}).get("id"))
+            if not home_team or not away_team:
+                continue
+            score = cls._full_time(match_data) if match_data.get("status") == "FINISHED" else None
+            rows.append({
+                "external_id": external_id,
+                "home_team_id": home_team.id,
+                "away_team_id": away_team.id,
+                "match_date": match_date,
+                "venue": match_data.get("venue"),
+                "status": "SCHEDULED" if score is None else "FINISHED",
+                "home_goals": None if score is None else score[0],
+                "away_goals": None if score is None else score[1],
+            })
+        return rows
+    
+    @staticmethod
+    def _full_time(match_data: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """Full-time (home, away) goals of an API match, if both are known"""
+        full_time = match_data.get("score", {}).get("fullTime", {})
+        home_goals = full_time.get("home")
+        away_goals = full_time.get("away")
+        if home_goals is None or away_goals is None:
+            return None
+        return home_goals, away_goals
+    
+    @staticmethod
+    def _split_applied(
+        payload: List[Dict[str, Any]],
+        existing: Dict[int, Match],
+        inserted: Iterable[int]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """API matches now stored locally vs. those that could not be (e.g. unknown teams)"""
+        stored = set(existing) | set(inserted)
+        applied = [m for m in payload if m["id"] in stored]
+        skipped = [m for m in payload if m["id"] not in stored]
+        return applied, skipped
+    
+    @classmethod
+    def _changed_since(cls, matches: List[Dict[str, Any]], watermark: Optional[datetime]) -> List[Dict[str, Any]]:
+        """API matches updated upstream at or after the watermark (all of them if unknown)"""
+        if watermark is None:
+            return list(matches)
+        changed = []
+        for match_data in matches:
+            last_updated = cls._parse_date(match_data.get("lastUpdated"))
+            if last_updated is None or last_updated >= watermark:
+                changed.append(match_data)
+        return changed
+    
+    @classmethod
+    def _newest_update(
+        cls,
+        applied: List[Dict[str, Any]],
+        skipped: List[Dict[str, Any]] = ()
+    ) -> Optional[datetime]:
+        """
+        Watermark covering the applied API matches: their latest lastUpdated,
+        held back to the oldest skipped match so the next run retries it.
+        """
+        def updates(matches):
+            parsed = (cls._parse_date(match_data.get("lastUpdated")) for match_data in matches)
+            return [u for u in parsed if u is not None]
+        
+        newest = max(updates(applied), default=None)
+        oldest_skipped = min(updates(skipped), default=None)
+        if newest is None or oldest_skipped is None:
+            return newest
+        return min(newest, oldest_skipped)
+    
+    @staticmethod
+    def _parse_date(value: Optional[str]) -> Optional[datetime]:
+        """API timestamp as a naive UTC datetime, matching the stored columns"""
+        if not value:
+            return None
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
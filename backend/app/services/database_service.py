@@ -1,13 +1,36 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, and_, or_, func, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
-from typing import List, Optional
-from app.models.models import Match, Team, Prediction
-from app.schemas.schemas import MatchCreate, MatchUpdate, PredictionCreate
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.models.models import Match, Team, Prediction, SyncState
+from app.schemas.schemas import MatchCreate, MatchUpdate, PredictionCreate, PredictionResponse
+from app.config.settings import settings
+from app.utils.response_cache import response_cache
+from app.utils.ttl_cache import LRUCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Latest prediction snapshots keyed by (match_id, model_type, model_version);
+# a model_version of None stands for the newest prediction of any version
+prediction_cache = LRUCache(
+    max_size=settings.prediction_cache_size,
+    ttl_seconds=settings.prediction_cache_ttl_seconds
+)
+
+# Matches served to callers that read team names load both teams in the same
+# query; both are many-to-one, so the JOINs add no rows and LIMIT still applies
+_with_teams = (joinedload(Match.home_team), joinedload(Match.away_team))
+
+
+def cache_latest_prediction(prediction: Prediction) -> PredictionResponse:
+    """Write a just-stored prediction through to the cache as the latest for its match"""
+    snapshot = PredictionResponse.model_validate(prediction)
+    prediction_cache.set((snapshot.match_id, snapshot.model_type, snapshot.model_version), snapshot)
+    prediction_cache.set((snapshot.match_id, snapshot.model_type, None), snapshot)
+    return snapshot
+
 
 class TeamService:
     """Service for team operations"""
@@ -27,6 +50,12 @@ class TeamService:
         """Get all teams"""
         return db.query(Team).all()
     
+    @staticmethod
+    def get_teams_by_external_id(db: Session) -> Dict[int, Team]:
+        """Every team with an external ID, keyed by it, in one query"""
+        teams = db.query(Team).filter(Team.external_id.isnot(None)).all()
+        return {team.external_id: team for team in teams}
+    
     @staticmethod
     def create_team(db: Session, name: str, short_code: str, external_id: Optional[int] = None) -> Team:
         """Create new team"""
@@ -34,6 +63,7 @@ class TeamService:
         db.add(team)
         db.commit()
         db.refresh(team)
+        response_cache.invalidate("teams")
         return team
     
     @staticmethod
@@ -47,7 +77,24 @@ class TeamService:
             team.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(team)
+            response_cache.invalidate("teams")
         return team
+    
+    @staticmethod
+    def update_elo_ratings(db: Session, ratings: Dict[int, float]) -> None:
+        """
+        Write Elo ratings for many teams in one batched statement.
+        
+        Left uncommitted so ratings land in the caller's transaction along
+        with the results that moved them; the caller commits and drops the
+        "teams" response cache.
+        """
+        if not ratings:
+            return
+        db.execute(
+            update(Team),
+            [{"id": team_id, "elo_rating": rating} for team_id, rating in ratings.items()]
+        )
 
 
 class MatchService:
@@ -55,8 +102,8 @@ class MatchService:
     
     @staticmethod
     def get_match(db: Session, match_id: int) -> Optional[Match]:
-        """Get match by ID"""
-        return db.query(Match).filter(Match.id == match_id).first()
+        """Get match by ID, with both teams loaded"""
+        return db.query(Match).options(*_with_teams).filter(Match.id == match_id).first()
     
     @staticmethod
     def get_upcoming_matches(db: Session, days_ahead: int = 10, limit: int = 50) -> List[Match]:
@@ -64,7 +111,7 @@ class MatchService:
         from_date = datetime.utcnow()
         to_date = from_date + timedelta(days=days_ahead)
         
-        return db.query(Match).filter(
+        return db.query(Match).options(*_with_teams).filter(
             and_(
                 Match.match_date >= from_date,
                 Match.match_date <= to_date,
@@ -72,24 +119,55 @@ class MatchService:
             )
         ).order_by(Match.match_date).limit(limit).all()
     
+    @staticmethod
+    def get_next_kickoff(db: Session, since: datetime) -> Optional[datetime]:
+        """Earliest kickoff at or after `since` of a match without a result yet"""
+        return db.query(func.min(Match.match_date)).filter(
+            and_(
+                Match.match_date >= since,
+                Match.status != "FINISHED"
+            )
+        ).scalar()
+    
+    @staticmethod
+    def get_remaining_matches(db: Session) -> List[Match]:
+        """Get every match still to be played, regardless of date"""
+        return db.query(Match).filter(Match.status == "SCHEDULED").order_by(Match.match_date).all()
+    
     @staticmethod
     def get_recent_matches(db: Session, days_back: int = 30, limit: int = 50) -> List[Match]:
         """Get recent completed matches"""
         from_date = datetime.utcnow() - timedelta(days=days_back)
         
-        return db.query(Match).filter(
+        return db.query(Match).options(*_with_teams).filter(
             and_(
                 Match.match_date >= from_date,
                 Match.status == "FINISHED"
             )
         ).order_by(desc(Match.match_date)).limit(limit).all()
     
+    @staticmethod
+    def get_finished_matches(db: Session, updated_since: Optional[datetime] = None) -> List[Match]:
+        """Get all completed matches, optionally only those changed since a timestamp"""
+        query = db.query(Match).filter(Match.status == "FINISHED")
+        if updated_since is not None:
+            query = query.filter(Match.updated_at >= updated_since)
+        return query.order_by(Match.match_date).all()
+    
+    @staticmethod
+    def stream_finished_matches(db: Session, since: Optional[datetime] = None, batch_size: int = 1000) -> Iterator[Match]:
+        """Iterate completed matches in date order, fetching rows in batches"""
+        query = db.query(Match).filter(Match.status == "FINISHED")
+        if since is not None:
+            query = query.filter(Match.match_date >= since)
+        return query.order_by(Match.match_date, Match.id).yield_per(batch_size)
+    
     @staticmethod
     def get_team_recent_matches(db: Session, team_id: int, limit: int = 10) -> List[Match]:
         """Get recent matches for a specific team"""
         from_date = datetime.utcnow() - timedelta(days=90)
         
-        return db.query(Match).filter(
+        return db.query(Match).options(*_with_teams).filter(
             and_(
                 Match.match_date >= from_date,
                 or_(Match.home_team_id == team_id, Match.away_team_id == team_id),
@@ -97,6 +175,17 @@ class MatchService:
             )
         ).order_by(desc(Match.match_date)).limit(limit).all()
     
+    @staticmethod
+    def get_matches_by_external_id(db: Session, external_ids: Iterable[int], chunk_size: int = 500) -> Dict[int, Match]:
+        """Matches with the given external IDs, keyed by them, one IN query per chunk"""
+        external_ids = list(dict.fromkeys(external_ids))
+        matches = {}
+        for start in range(0, len(external_ids), chunk_size):
+            chunk = external_ids[start:start + chunk_size]
+            for match in db.query(Match).filter(Match.external_id.in_(chunk)):
+                matches[match.external_id] = match
+        return matches
+    
     @staticmethod
     def create_match(db: Session, match_data: MatchCreate) -> Match:
         """Create new match"""
@@ -104,6 +193,7 @@ class MatchService:
         db.add(match)
         db.commit()
         db.refresh(match)
+        response_cache.invalidate("matches")
         return match
     
     @staticmethod
@@ -118,14 +208,13 @@ class MatchService:
             match.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(match)
+            response_cache.invalidate("matches")
         return match
     
     @staticmethod
     def head_to_head(db: Session, team1_id: int, team2_id: int, limit: int = 10) -> List[Match]:
         """Get head-to-head records between two teams"""
-        from sqlalchemy import or_
-        
-        return db.query(Match).filter(
+        return db.query(Match).options(*_with_teams).filter(
             and_(
                 or_(
                     and_(Match.home_team_id == team1_id, Match.away_team_id == team2_id),
@@ -146,6 +235,8 @@ class PredictionService:
         db.add(prediction)
         db.commit()
         db.refresh(prediction)
+        cache_latest_prediction(prediction)
+        response_cache.invalidate(f"predictions:{prediction.match_id}")
         return prediction
     
     @staticmethod
@@ -154,14 +245,22 @@ class PredictionService:
         return db.query(Prediction).filter(Prediction.match_id == match_id).all()
     
     @staticmethod
-    def get_latest_prediction(db: Session, match_id: int, model_type: str = "ENSEMBLE") -> Optional[Prediction]:
-        """Get latest prediction for a match by model type"""
-        return db.query(Prediction).filter(
+    def get_latest_prediction(
+        db: Session,
+        match_id: int,
+        model_type: str = "ENSEMBLE",
+        model_version: Optional[str] = None
+    ) -> Optional[Prediction]:
+        """Get latest prediction for a match by model type, optionally from one model version"""
+        query = db.query(Prediction).filter(
             and_(
                 Prediction.match_id == match_id,
                 Prediction.model_type == model_type
             )
-        ).order_by(desc(Prediction.created_at)).first()
+        )
+        if model_version is not None:
+            query = query.filter(Prediction.model_version == model_version)
+        return query.order_by(desc(Prediction.created_at)).first()
     
     @staticmethod
     def update_prediction_accuracy(db: Session, match_id: int) -> None:
@@ -192,3 +291,82 @@ class PredictionService:
                 pred.was_correct = False
             
             db.commit()
+        prediction_cache.discard_where(lambda key: key[0] == match_id)
+        response_cache.invalidate(f"predictions:{match_id}")
+
+
+class SyncStateService:
+    """Service for incremental sync watermarks"""
+    
+    @staticmethod
+    def get_state(db: Session, resource: str) -> SyncState:
+        """
+        Watermarks for a sync resource, added to the session if new.
+        
+        Changes made to the returned row are committed together with the
+        sync's own writes, so a watermark never gets ahead of the data.
+        """
+        state = db.get(SyncState, resource)
+        if state is None:
+            state = SyncState(resource=resource)
+            db.add(state)
+        return state
+    
+    @staticmethod
+    def advance(state: SyncState, synced_at: datetime, last_updated: Optional[datetime] = None) -> None:
+        """Move a resource's watermarks forward; last_updated never moves back"""
+        state.last_synced_at = synced_at
+        if last_updated is not None and (state.last_updated is None or last_updated > state.last_updated):
+            state.last_updated = last_updated
+    
+    @staticmethod
+    def acquire_lease(db: Session, resource: str, owner: str, seconds: float) -> bool:
+        """
+        Take or renew the job lease for a resource.
+        
+        A single conditional UPDATE claims the row if the lease is free,
+        expired or already ours, so concurrent workers cannot both win.
+        
+        Args:
+            db: Database session
+            resource: Sync resource, e.g. "match_results"
+            owner: Unique ID of the calling worker
+            seconds: Lease length; a worker that dies loses it after this
+            
+        Returns:
+            Whether the caller now holds the lease
+        """
+        if db.get(SyncState, resource) is None:
+            db.add(SyncState(resource=resource))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # another worker created it first
+        
+        now = datetime.utcnow()
+        result = db.execute(
+            update(SyncState)
+            .where(
+                SyncState.resource == resource,
+                or_(
+                    SyncState.locked_until.is_(None),
+                    SyncState.locked_until < now,
+                    SyncState.locked_by == owner
+                )
+            )
+            .values(locked_by=owner, locked_until=now + timedelta(seconds=seconds))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount == 1
+    
+    @staticmethod
+    def release_lease(db: Session, resource: str, owner: str) -> None:
+        """Give up a lease if the caller still holds it"""
+        db.execute(
+            update(SyncState)
+            .where(SyncState.resource == resource, SyncState.locked_by == owner)
+            .values(locked_by=None, locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
@@ -1,16 +1,48 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable, Iterable
 import httpx
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from app.config.settings import settings
+from app.utils.rate_limiter import TokenBucket
+from app.utils.http_cache import DiskResponseCache
+import asyncio
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
+# Responses worth retrying: quota exhausted or a transient server failure
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+
+class OfflineCacheMiss(LookupError):
+    """Raised in offline mode for a request with no recorded response"""
+
 
 class FootballDataService:
-    """Service for integrating with football-data.org API"""
+    """
+    Service for integrating with football-data.org API.
+    
+    Every request goes through _get, which keeps within the provider quota
+    with a token bucket, caps in-flight requests (and pooled connections)
+    at football_data_max_concurrency, and retries 429, 5xx and connection
+    errors with jittered exponential backoff. The bulk methods fan out
+    through the same path, so a backfill runs at the quota rate instead of
+    one request at a time. Failures that survive the retries are raised,
+    so callers can tell "upstream failed" from "no data".
     
-    def __init__(self):
+    Responses are kept in an on-disk cache keyed by URL and query. When
+    upstream sent validators every request revalidates with If-None-Match /
+    If-Modified-Since, and a 304 reuses the stored body; only entries
+    without validators are served blind, while younger than
+    football_data_cache_ttl_seconds or the caller's max_age (the live
+    results sync passes 0). Cache files are read and written on a
+    worker thread. In offline mode only the cache is consulted, so a
+    recorded sync can be replayed without network access or quota.
+    """
+    
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = settings.football_data_base_url
         self.api_key = settings.football_data_api_key
         self.headers = {
@@ -18,11 +50,29 @@ class FootballDataService:
             "Content-Type": "application/json"
         }
         self.client = None
+        self.max_retries = settings.football_data_max_retries
+        self.rate_limiter = TokenBucket(
+            rate=settings.football_data_requests_per_minute / 60,
+            capacity=settings.football_data_burst
+        )
+        self._concurrency = asyncio.Semaphore(settings.football_data_max_concurrency)
+        self._transport = transport
+        self.cache = (
+            DiskResponseCache(settings.football_data_cache_dir, settings.football_data_cache_ttl_seconds)
+            if settings.football_data_cache_dir else None
+        )
+        self.offline = settings.football_data_offline
     
     async def get_client(self) -> httpx.AsyncClient:
         """Get or create async HTTP client"""
         if self.client is None:
-            self.client = httpx.AsyncClient(headers=self.headers)
+            max_connections = settings.football_data_max_concurrency
+            self.client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=settings.football_data_timeout_seconds,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                transport=self._transport
+            )
         return self.client
     
     async def close(self):
@@ -30,40 +80,170 @@ class FootballDataService:
         if self.client:
             await self.client.aclose()
     
-    async def get_league_matches(self, league_id: int = 2790, days_ahead: Optional[int] = None) -> Dict[str, Any]:
+    async def _get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_age: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
-        Get upcoming Premier League matches.
+        GET an API path through the response cache.
         
         Args:
-            league_id: Football-data.org competition ID (2790 for Premier League)
-            days_ahead: Number of days ahead to fetch (None = next 10)
+            path: Path below the base URL, e.g. "/matches/123"
+            params: Query parameters
+            max_age: Longest a response without validators may be reused, in
+                seconds (defaults to the cache TTL; 0 always asks upstream)
             
         Returns:
-            Dictionary with match data
+            Decoded JSON body
+            
+        Raises:
+            httpx.HTTPError: If the request still fails after the last retry
+            OfflineCacheMiss: In offline mode, if the response was never recorded
+        """
+        url = f"{self.base_url}{path}"
+        entry = await asyncio.to_thread(self.cache.get, url, params) if self.cache is not None else None
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"No recorded response for {url} {params or ''}")
+            return entry.body
+        
+        validators = entry.validators() if entry is not None else {}
+        if entry is not None and not validators and self.cache.is_fresh(entry, max_age):
+            return entry.body  # nothing to revalidate with; the TTL is the only freshness signal
+        
+        response = await self._request(url, params, validators)
+        if response.status_code == 304 and entry is not None:
+            await asyncio.to_thread(self.cache.touch, entry)
+            return entry.body
+        
+        response.raise_for_status()
+        body = response.json()
+        if self.cache is not None:
+            await asyncio.to_thread(
+                self.cache.set, url, params, body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        return body
+    
+    async def _request(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> httpx.Response:
         """
-        try:
-            client = await self.get_client()
-            params = {}
+        Send a GET within the rate limit, retrying transient failures.
+        
+        Returns:
+            The first response that is not retryable, or the last one once
+            retries are exhausted
             
-            if days_ahead:
-                date_from = datetime.utcnow().date()
-                date_to = (datetime.utcnow() + timedelta(days=days_ahead)).date()
-                params["dateFrom"] = date_from.isoformat()
-                params["dateTo"] = date_to.isoformat()
+        Raises:
+            httpx.TransportError: If the last attempt could not connect
+        """
+        client = await self.get_client()
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                # Only the request itself holds a slot; backoff sleeps free it
+                async with self._concurrency:
+                    response = await client.get(url, params=params, headers=headers)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"GET {url} failed ({e!r}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
             
-            response = await client.get(
-                f"{self.base_url}/competitions/{league_id}/matches",
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+            
+            delay = self._retry_after(response)
+            if delay is None:
+                delay = self._backoff(attempt)
+            logger.warning(f"GET {url} returned {response.status_code}; retrying in {delay:.1f}s")
+            if response.status_code == 429:
+                # Quota spent: hold back every caller, not just this one
+                self.rate_limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt"""
+        return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+    
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """Seconds the server asked us to wait, from Retry-After or the quota reset header"""
+        for header in ("Retry-After", "X-RequestCounter-Reset"):
+            value = response.headers.get(header)
+            if value is None:
+                continue
+            try:
+                return min(max(float(value), 0.0), RETRY_MAX_SECONDS)
+            except ValueError:
+                continue
+        return None
+    
+    async def _gather(
+        self,
+        ids: Iterable[int],
+        fetch: Callable[[int], Awaitable[Dict[str, Any]]],
+        label: str
+    ) -> Dict[int, Dict[str, Any]]:
+        """Fetch many resources concurrently, leaving out the ones that failed"""
+        ids = list(dict.fromkeys(ids))
+        results = await asyncio.gather(*(fetch(resource_id) for resource_id in ids), return_exceptions=True)
+        
+        fetched = {}
+        for resource_id, result in zip(ids, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error fetching {label} {resource_id}: {result}")
+            else:
+                fetched[resource_id] = result
+        return fetched
+    
+    async def get_league_matches(
+        self,
+        league_id: int = 2790,
+        days_ahead: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        status: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Get Premier League matches, by default the whole competition.
+        
+        Args:
+            league_id: Football-data.org competition ID (2790 for Premier League)
+            days_ahead: Only matches from today to this many days ahead
+            date_from: Only matches on or after this date (ignored with days_ahead)
+            date_to: Only matches on or before this date (ignored with days_ahead)
+            status: Only matches with this status, e.g. "FINISHED"
+            max_age: Longest a cached response without validators may be
+                reused, in seconds (defaults to the cache TTL)
+            
+        Returns:
+            Dictionary with match data
+            
+        Raises:
+            httpx.HTTPError: If upstream still fails after the last retry
+            OfflineCacheMiss: In offline mode, if the response was never recorded
+        """
+        params = {}
+        
+        if days_ahead:
+            date_from = datetime.utcnow().date()
+            date_to = (datetime.utcnow() + timedelta(days=days_ahead)).date()
+        if date_from:
+            params["dateFrom"] = date_from.isoformat()
+        if date_to:
+            params["dateTo"] = date_to.isoformat()
+        if status:
+            params["status"] = status
         
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP Error fetching matches: {e}")
-            return {"matches": []}
-        except Exception as e:
-            logger.error(f"Error fetching matches: {e}")
-            return {"matches": []}
+        return await self._get(f"/competitions/{league_id}/matches", params=params, max_age=max_age)
     
     async def get_team_data(self, team_id: int) -> Dict[str, Any]:
         """
@@ -74,16 +254,12 @@ class FootballDataService:
             
         Returns:
             Team data dictionary
+            
+        Raises:
+            httpx.HTTPError: If upstream still fails after the last retry
+            OfflineCacheMiss: In offline mode, if the response was never recorded
         """
-        try:
-            client = await self.get_client()
-            response = await client.get(f"{self.base_url}/teams/{team_id}")
-            response.raise_for_status()
-            return response.json()
-        
-        except Exception as e:
-            logger.error(f"Error fetching team data for {team_id}: {e}")
-            return {}
+        return await self._get(f"/teams/{team_id}")
     
     async def get_league_standings(self, league_id: int = 2790) -> Dict[str, Any]:
         """
@@ -94,16 +270,12 @@ class FootballDataService:
             
         Returns:
             Standings data
+            
+        Raises:
+            httpx.HTTPError: If upstream still fails after the last retry
+            OfflineCacheMiss: In offline mode, if the response was never recorded
         """
-        try:
-            client = await self.get_client()
-            response = await client.get(f"{self.base_url}/competitions/{league_id}/standings")
-            response.raise_for_status()
-            return response.json()
-        
-        except Exception as e:
-            logger.error(f"Error fetching standings: {e}")
-            return {}
+        return await self._get(f"/competitions/{league_id}/standings")
     
     async def get_match_details(self, match_id: int) -> Dict[str, Any]:
         """
@@ -114,16 +286,12 @@ class FootballDataService:
             
         Returns:
             Match details dictionary
+            
+        Raises:
+            httpx.HTTPError: If upstream still fails after the last retry
+            OfflineCacheMiss: In offline mode, if the response was never recorded
         """
-        try:
-            client = await self.get_client()
-            response = await client.get(f"{self.base_url}/matches/{match_id}")
-            response.raise_for_status()
-            return response.json()
-        
-        except Exception as e:
-            logger.error(f"Error fetching match {match_id}: {e}")
-            return {}
+        return await self._get(f"/matches/{match_id}")
     
     async def get_team_matches(self, team_id: int, limit: int = 20) -> Dict[str, Any]:
         """
@@ -135,16 +303,40 @@ class FootballDataService:
             
         Returns:
             Team matches dictionary
+            
+        Raises:
+            httpx.HTTPError: If upstream still fails after the last retry
+            OfflineCacheMiss: In offline mode, if the response was never recorded
         """
-        try:
-            client = await self.get_client()
-            response = await client.get(
-                f"{self.base_url}/teams/{team_id}/matches",
-                params={"limit": limit}
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._get(f"/teams/{team_id}/matches", params={"limit": limit})
+    
+    async def get_many_match_details(self, match_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get details for many matches at once, as fast as the quota allows.
+        
+        Args:
+            match_ids: Football-data.org match IDs
+            
+        Returns:
+            Match details keyed by match ID; matches that could not be
+            fetched after retries are left out
+        """
+        return await self._gather(match_ids, lambda match_id: self._get(f"/matches/{match_id}"), "match")
+    
+    async def get_many_team_matches(self, team_ids: Iterable[int], limit: int = 20) -> Dict[int, Dict[str, Any]]:
+        """
+        Get recent matches for many teams at once, as fast as the quota allows.
         
-        except Exception as e:
-            logger.error(f"Error fetching team matches for {team_id}: {e}")
-            return {}
+        Args:
+            team_ids: Football-data.org team IDs
+            limit: Number of matches to fetch per team
+            
+        Returns:
+            Team matches keyed by team ID; teams that could not be fetched
+            after retries are left out
+        """
+        return await self._gather(
+            team_ids,
+            lambda team_id: self._get(f"/teams/{team_id}/matches", params={"limit": limit}),
+            "team matches for"
+        )
@@ -0,0 +1,203 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.ml.poisson_model import PoissonModel
+from app.ml.elo_model import EloModel
+from app.ml.ensemble_model import EnsembleModel
+from app.ml.model_registry import ModelRegistry, ModelVersion
+from app.models.models import Match
+from app.schemas.schemas import PredictionCreate, PredictionResponse
+from app.services.database_service import TeamService, MatchService
+from app.services.async_database_service import AsyncMatchService, AsyncPredictionService
+from app.services.rating_service import RatingService
+from app.utils.response_cache import response_cache
+from datetime import datetime
+import asyncio
+import copy
+import logging
+import numpy as np
+import os
+
+logger = logging.getLogger(__name__)
+
+# Wait before retrying a scheduled retrain that failed
+RETRAIN_RETRY_SECONDS = 600
+
+
+def train_poisson_model(db: Session, model: Optional[PoissonModel] = None) -> PoissonModel:
+    """
+    Train a Poisson model on the time-weighted match history.
+    
+    When an existing model is passed it is refit in place, reading only the
+    matches finished or changed since its previous fit.
+    """
+    if model is None:
+        model = PoissonModel(
+            tail_tolerance=settings.score_grid_tail_tolerance,
+            half_life_days=settings.model_time_decay_half_life_days
+        )
+    
+    updated_since = model.match_statistics.last_updated if model.match_statistics else None
+    teams = TeamService.get_all_teams(db)
+    new_matches = MatchService.get_finished_matches(db, updated_since=updated_since)
+    
+    model.fit_time_weighted(new_matches, teams)
+    logger.info(f"Poisson model trained with {len(new_matches)} new matches")
+    return model
+
+
+class ModelService:
+    """Builders for the models published through the registry"""
+    
+    @staticmethod
+    def build_poisson(previous: Optional[PoissonModel]) -> PoissonModel:
+        """Refit a copy of the current Poisson model, leaving the published one untouched"""
+        db = SessionLocal()
+        try:
+            model = train_poisson_model(db, copy.deepcopy(previous) if previous else None)
+        finally:
+            db.close()
+        
+        if settings.model_artifact_path:
+            os.makedirs(os.path.dirname(os.path.abspath(settings.model_artifact_path)), exist_ok=True)
+            model.save_model(settings.model_artifact_path)
+        return model
+    
+    @staticmethod
+    def build_elo(previous: Optional[EloModel]) -> EloModel:
+        """Replay the full history into a fresh Elo engine and store the ratings"""
+        elo = EloModel(
+            k_factor=settings.elo_k_factor,
+            home_advantage=settings.elo_home_advantage
+        )
+        db = SessionLocal()
+        try:
+            RatingService(db, elo).rebuild()
+            db.commit()
+        finally:
+            db.close()
+        response_cache.invalidate("teams")
+        return elo
+    
+    @staticmethod
+    def register_models(registry: ModelRegistry) -> None:
+        """Register the POISSON, ELO and ENSEMBLE builders with a registry"""
+        registry.register("POISSON", ModelService.build_poisson)
+        registry.register("ELO", ModelService.build_elo)
+        registry.register(
+            "ENSEMBLE",
+            lambda previous: EnsembleModel(
+                registry.get("POISSON").model,
+                registry.get("ELO").model,
+                elo_weight=settings.ensemble_elo_weight
+            ),
+            dependencies=("POISSON", "ELO")
+        )
+    
+    @staticmethod
+    async def predict_upcoming(
+        db: AsyncSession,
+        model_version: ModelVersion,
+        days_ahead: int = 10
+    ) -> Tuple[List[Match], List[PredictionResponse]]:
+        """
+        Score the upcoming slate with one model version and store it.
+        
+        Predictions are stored under the version's model name (POISSON or
+        ENSEMBLE). The whole slate is scored in one vectorized pass and
+        stored in one transaction; re-running it for the same model version
+        overwrites rather than duplicates.
+        
+        Returns:
+            The upcoming matches and their stored predictions, in the same order
+        """
+        matches = await AsyncMatchService.get_upcoming_matches(db, days_ahead=days_ahead, limit=100)
+        
+        batch = model_version.model.predict_many(
+            [match.home_team_id for match in matches],
+            [match.away_team_id for match in matches]
+        )
+        confidences = np.maximum.reduce([
+            batch["home_win_prob"],
+            batch["draw_prob"],
+            batch["away_win_prob"]
+        ])
+        
+        pred_creates = [
+            PredictionCreate(
+                match_id=match.id,
+                model_type=model_version.name,
+                model_version=model_version.version,
+                home_win_prob=float(batch["home_win_prob"][i]),
+                draw_prob=float(batch["draw_prob"][i]),
+                away_win_prob=float(batch["away_win_prob"][i]),
+                predicted_home_score=float(batch["predicted_home_score"][i]),
+                predicted_away_score=float(batch["predicted_away_score"][i]),
+                most_likely_score=str(batch["most_likely_score"][i]),
+                confidence_score=float(confidences[i]),
+                over_2_5_goals=float(batch["over_2_5_goals"][i]),
+                under_2_5_goals=float(batch["under_2_5_goals"][i]),
+                btts_yes=float(batch["btts_yes"][i]),
+                btts_no=float(batch["btts_no"][i]),
+                home_clean_sheet=float(batch["home_clean_sheet"][i]),
+                away_clean_sheet=float(batch["away_clean_sheet"][i]),
+            )
+            for i, match in enumerate(matches)
+        ]
+        
+        stored = await AsyncPredictionService.upsert_predictions(db, pred_creates)
+        return matches, stored
+    
+    @staticmethod
+    async def warm_up(registry: ModelRegistry) -> None:
+        """
+        Publish every model before the app starts serving.
+        
+        A saved Poisson artifact is memory-mapped instead of retrained, so a
+        restart costs milliseconds; if it is older than the retrain interval
+        a rebuild is started in the background.
+        """
+        path = settings.model_artifact_path
+        if path and os.path.exists(path) and registry.get("POISSON") is None:
+            try:
+                entry = registry.publish("POISSON", PoissonModel.load_model(path))
+                age_days = (datetime.utcnow() - ModelService.fitted_at(entry)).total_seconds() / 86400
+                if age_days >= settings.model_retrain_interval_days:
+                    registry.build("POISSON")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load model artifact {path}: {e}")
+        
+        for name in registry.names:
+            await registry.ensure(name)
+    
+    @staticmethod
+    def fitted_at(entry: ModelVersion) -> datetime:
+        """
+        When a version's model was fit on the history.
+        
+        A version loaded from an artifact keeps the artifact's fit time rather
+        than its publish time, and online updates do not reset it.
+        """
+        return getattr(entry.model, "fitted_at", None) or entry.created_at
+    
+    @staticmethod
+    async def retrain_periodically(registry: ModelRegistry, interval_days: float) -> None:
+        """
+        Rebuild the base models every interval_days, measured from the fit
+        of the currently published Poisson version. Runs until cancelled.
+        """
+        interval = interval_days * 86400
+        while True:
+            current = registry.get("POISSON")
+            elapsed = (datetime.utcnow() - ModelService.fitted_at(current)).total_seconds() if current else interval
+            await asyncio.sleep(max(interval - elapsed, 0))
+            
+            try:
+                # Dependent models such as ENSEMBLE follow automatically
+                for name in ("POISSON", "ELO"):
+                    await asyncio.wrap_future(registry.build(name))
+            except Exception as e:
+                logger.error(f"Scheduled retrain failed: {e}")
+                await asyncio.sleep(RETRAIN_RETRY_SECONDS)
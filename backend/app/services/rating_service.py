@@ -0,0 +1,60 @@
+from sqlalchemy.orm import Session
+from typing import List
+from app.ml.elo_model import EloModel
+from app.models.models import Match
+from app.services.database_service import TeamService, MatchService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RatingService:
+    """Service for keeping Team.elo_rating in step with an Elo engine"""
+    
+    def __init__(self, db: Session, elo_model: EloModel):
+        self.db = db
+        self.elo = elo_model
+    
+    def rebuild(self) -> int:
+        """Replay the whole finished-match history in one streaming pass"""
+        self.elo.reset()
+        applied = self.elo.replay(MatchService.stream_finished_matches(self.db))
+        TeamService.update_elo_ratings(self.db, self.elo.ratings)
+        logger.info(f"Rebuilt Elo ratings from {applied} matches")
+        return applied
+    
+    def apply_results(self, matches: List[Match], corrected: List[Match] = ()) -> int:
+        """
+        Apply newly finished matches to the ratings.
+        
+        Results dated after everything already processed are applied
+        directly. An older result, or a corrected score the engine already
+        counted, rewinds the engine to the matchweek checkpoint before it
+        and replays forward from the database.
+        
+        Args:
+            matches: Matches whose results were just stored
+            corrected: Those of them whose previous score was already applied
+            
+        Returns:
+            Number of results applied, including replayed ones
+        """
+        finished = sorted(
+            (m for m in matches if m.home_goals is not None and m.away_goals is not None),
+            key=lambda m: m.match_date
+        )
+        if not finished:
+            return 0
+        
+        last_date = self.elo.last_match_date
+        if not corrected and (last_date is None or finished[0].match_date >= last_date):
+            applied = self.elo.replay(finished)
+            changed = {team_id for m in finished for team_id in (m.home_team_id, m.away_team_id)}
+            TeamService.update_elo_ratings(self.db, {team_id: self.elo.ratings[team_id] for team_id in changed})
+            return applied
+        
+        replay_from = self.elo.rewind_to(finished[0].match_date)
+        applied = self.elo.replay(MatchService.stream_finished_matches(self.db, since=replay_from))
+        TeamService.update_elo_ratings(self.db, self.elo.ratings)
+        logger.info(f"Replayed {applied} matches from {replay_from} after a late or corrected result")
+        return applied
@@ -0,0 +1,226 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from app.config.database import SessionLocal, AsyncSessionLocal
+from app.config.settings import settings
+from app.ml.model_registry import ModelRegistry, WorkingCopy
+from app.models.models import Match
+from app.services.football_data_service import FootballDataService
+from app.services.data_sync_service import DataSyncService, STANDINGS, FIXTURES, RESULTS
+from app.services.database_service import MatchService, SyncStateService
+from app.services.model_service import ModelService
+from functools import partial
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+# DataSyncService method run for each SyncState resource
+JOBS = {
+    STANDINGS: "sync_teams",
+    FIXTURES: "sync_upcoming_matches",
+    RESULTS: "sync_match_results",
+}
+
+# A match that kicked off this long ago without a result is treated as
+# still being played (90 minutes, half time, stoppage time and a margin)
+MATCH_WINDOW = timedelta(hours=2, minutes=30)
+
+# Delay before retrying a job that raised
+JOB_RETRY_SECONDS = 300
+
+
+class SyncScheduler:
+    """
+    Periodic football-data.org sync run inside the API process.
+    
+    Standings, fixtures and results each run on their own loop. Results are
+    polled every few minutes while a match is being played and hourly
+    otherwise, waking up in time for the next kickoff. A results sync
+    applies the new results to working copies of the published POISSON and
+    ELO models, which are published once it commits (ENSEMBLE is rebuilt
+    from them), or rebuilt from the database if their model was republished
+    while the sync ran; corrected scores, which an online update cannot take back,
+    trigger a POISSON refit instead. Any sync that changes matches
+    re-predicts the upcoming slate with POISSON and ENSEMBLE. Refits and
+    predictions that fail after the sync committed stay pending and are
+    retried after the next sync.
+    
+    The scheduler shares the event loop with the API, so its database work
+    (leases, the sync itself, the next-kickoff lookup) runs on worker threads.
+    
+    Every API worker runs a scheduler, so each job first takes a lease on
+    its SyncState row; only the worker holding it syncs, and a worker that
+    dies mid-run loses the lease once it expires.
+    """
+    
+    def __init__(
+        self,
+        football_data_service: FootballDataService,
+        registry: ModelRegistry,
+        session_factory: Callable[[], Session] = SessionLocal,
+        async_session_factory: Callable = AsyncSessionLocal
+    ):
+        self.api = football_data_service
+        self.registry = registry
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        # Refresh work owed for syncs that already committed
+        self._pending_builds: Set[str] = set()
+        self._predictions_stale = False
+    
+    def start(self) -> None:
+        """Start one loop per job; the first run of each happens immediately"""
+        intervals: Dict[str, Callable[[], Awaitable[float]]] = {
+            STANDINGS: partial(self._fixed_delay, "sync_standings_interval_seconds"),
+            FIXTURES: partial(self._fixed_delay, "sync_fixtures_interval_seconds"),
+            RESULTS: self.results_delay,
+        }
+        self._tasks = [
+            asyncio.create_task(self._loop(resource, interval), name=f"sync-{resource}")
+            for resource, interval in intervals.items()
+        ]
+        logger.info(f"Sync scheduler started as {self.worker_id}")
+    
+    @staticmethod
+    async def _fixed_delay(setting: str) -> float:
+        return getattr(settings, setting)
+    
+    async def stop(self) -> None:
+        """Cancel the job loops and wait for them to unwind"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def _loop(self, resource: str, delay: Callable[[], Awaitable[float]]) -> None:
+        while True:
+            try:
+                await self.run_job(resource)
+                seconds = await delay()
+            except Exception as e:
+                logger.error(f"Scheduled {resource} sync failed: {e}")
+                seconds = JOB_RETRY_SECONDS
+            await asyncio.sleep(seconds)
+    
+    async def run_job(self, resource: str) -> int:
+        """
+        Run one sync if no other worker is running it, then refresh what
+        depends on it. Database work runs on worker threads; only the API
+        calls run on the event loop.
+        
+        Returns:
+            Number of rows synced, or 0 if another worker holds the lease
+        """
+        db = self.session_factory()
+        try:
+            acquired = await asyncio.to_thread(
+                SyncStateService.acquire_lease, db, resource, self.worker_id, settings.sync_lease_seconds
+            )
+            if not acquired:
+                logger.debug(f"Skipping {resource} sync; another worker holds the lease")
+                return 0
+            copies = await asyncio.to_thread(self._working_copies) if resource == RESULTS else {}
+            sync = DataSyncService(
+                db,
+                self.api,
+                model=copies["POISSON"].model if "POISSON" in copies else None,
+                elo_model=copies["ELO"].model if "ELO" in copies else None
+            )
+            try:
+                synced = await getattr(sync, JOBS[resource])()
+            finally:
+                await asyncio.to_thread(self._release, db, resource)
+        finally:
+            await asyncio.to_thread(db.close)
+        
+        if synced and resource == RESULTS:
+            self.publish_models(copies, sync.corrected)
+        if synced and resource in (RESULTS, FIXTURES):
+            self._predictions_stale = True
+        await self.refresh()
+        return synced
+    
+    def _working_copies(self) -> Dict[str, WorkingCopy]:
+        """Private copies of the published base models for the sync to update"""
+        copies = {name: self.registry.working_copy(name) for name in ("POISSON", "ELO")}
+        return {name: working_copy for name, working_copy in copies.items() if working_copy is not None}
+    
+    def publish_models(self, copies: Dict[str, WorkingCopy], corrected: List[Match]) -> None:
+        """
+        Publish the working copies a committed results sync updated.
+        
+        The sync can take minutes under the rate limit; a copy whose model
+        was republished meanwhile (e.g. by the periodic retrain) is rebuilt
+        by the registry instead of published over the newer version.
+        
+        Args:
+            copies: Working copies passed to the sync, keyed by model name
+            corrected: Matches whose score the sync corrected
+        """
+        if corrected and "POISSON" in copies:
+            # The online update cannot take the old score back out
+            del copies["POISSON"]
+            self._pending_builds.add("POISSON")
+        self._pending_builds.update(self.registry.publish_updates(copies.values()))
+    
+    async def refresh(self) -> None:
+        """
+        Finish the model builds and predictions owed for committed syncs.
+        
+        Anything that fails stays pending and is retried after the next sync.
+        """
+        for name in [name for name in self.registry.names if name in self._pending_builds]:
+            # Joins the build publish_updates already started, if still running
+            await asyncio.wrap_future(self.registry.build(name))
+            self._pending_builds.discard(name)
+        if self._predictions_stale:
+            await self.refresh_predictions()
+            self._predictions_stale = False
+    
+    async def refresh_predictions(self) -> None:
+        """Re-predict the upcoming slate with the current POISSON and ENSEMBLE versions"""
+        for name in ("POISSON", "ENSEMBLE"):
+            model_version = await self.registry.ensure(name)
+            async with self.async_session_factory() as db:
+                _, stored = await ModelService.predict_upcoming(
+                    db, model_version, settings.sync_prediction_days_ahead
+                )
+            logger.info(f"Refreshed {len(stored)} predictions with {name} {model_version.version}")
+    
+    def _release(self, db: Session, resource: str) -> None:
+        db.rollback()
+        SyncStateService.release_lease(db, resource, self.worker_id)
+    
+    async def results_delay(self) -> float:
+        """Seconds until the next results sync"""
+        return await asyncio.to_thread(self._results_delay)
+    
+    def _results_delay(self) -> float:
+        db = self.session_factory()
+        try:
+            return self.next_results_delay(db, datetime.utcnow())
+        finally:
+            db.close()
+    
+    @staticmethod
+    def next_results_delay(db: Session, now: datetime) -> float:
+        """
+        Poll fast while any match without a result kicked off within the
+        match window; otherwise wait the idle interval or until the next
+        kickoff, whichever comes first.
+        """
+        live = settings.sync_results_live_interval_seconds
+        idle = settings.sync_results_idle_interval_seconds
+        
+        next_kickoff = MatchService.get_next_kickoff(db, now - MATCH_WINDOW)
+        if next_kickoff is None:
+            return idle
+        if next_kickoff <= now:
+            return live
+        return max(live, min(idle, (next_kickoff - now).total_seconds()))
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class CachedHTTPResponse:
+    """A stored JSON response body with the validators it was served with"""
+
+    def __init__(
+        self,
+        url: str,
+        params: Dict[str, str],
+        body: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        stored_at: Optional[float] = None
+    ):
+        self.url = url
+        self.params = params
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this response"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DiskResponseCache:
+    """
+    On-disk cache of JSON GET responses, one file per URL and query.
+
+    Entries survive restarts and can be replayed without network access.
+    Writes are atomic, so a crash never leaves a truncated entry; entries
+    that cannot be read are treated as missing.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float = 300.0):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _normalize(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        return {str(name): str(value) for name, value in sorted((params or {}).items())}
+
+    def _path(self, url: str, params: Dict[str, str]) -> str:
+        key = hashlib.sha256(json.dumps([url, params]).encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def is_fresh(self, entry: CachedHTTPResponse, max_age: Optional[float] = None) -> bool:
+        """
+        Whether an entry without validators is young enough to serve without asking upstream.
+
+        Args:
+            entry: Stored response
+            max_age: Age limit in seconds for this lookup (defaults to the TTL)
+        """
+        return time.time() - entry.stored_at < (self.ttl_seconds if max_age is None else max_age)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[CachedHTTPResponse]:
+        """Stored response for a URL and query, fresh or not"""
+        params = self._normalize(params)
+        try:
+            with open(self._path(url, params), encoding="utf-8") as f:
+                data = json.load(f)
+            return CachedHTTPResponse(
+                url, params, data["body"], data.get("etag"), data.get("last_modified"), data["stored_at"]
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        body: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> CachedHTTPResponse:
+        """Store a response body with its validators"""
+        entry = CachedHTTPResponse(url, self._normalize(params), body, etag, last_modified)
+        self._write(entry)
+        return entry
+
+    def touch(self, entry: CachedHTTPResponse) -> None:
+        """Mark an entry as just revalidated (after a 304)"""
+        entry.stored_at = time.time()
+        self._write(entry)
+
+    def _write(self, entry: CachedHTTPResponse) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({
+                    "url": entry.url,
+                    "params": entry.params,
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "stored_at": entry.stored_at,
+                    "body": entry.body,
+                }, f)
+            os.replace(tmp_path, self._path(entry.url, entry.params))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
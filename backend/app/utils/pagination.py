@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+
+
+def encode_cursor(position: datetime, row_id: int) -> str:
+    """Opaque cursor for the keyset position (position, row_id)"""
+    payload = json.dumps([position.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Keyset position stored in a cursor.
+    
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(position), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def split_page(rows: Sequence[Any], limit: int, position_attr: str) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim rows fetched with limit + 1 to one page and build the next cursor.
+    
+    Args:
+        rows: Rows in keyset order, at most limit + 1 of them
+        limit: Page size
+        position_attr: Name of the datetime attribute ordered on alongside id
+    
+    Returns:
+        The page and the cursor for the next one, or None on the last page
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(getattr(last, position_attr), last.id)
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Iterator, Optional
+
+
+class QueryCounter:
+    """Number of SQL statements executed while the counter was active"""
+
+    def __init__(self):
+        self.count = 0
+
+
+# Counter for the current request or block; tasks and greenlets spawned from
+# it inherit the same object, so queries made on their behalf are counted too
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Count the statements executed on any engine within the block.
+
+    Example:
+        with count_queries() as queries:
+            MatchService.get_upcoming_matches(db)
+        assert queries.count == 1
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
@@ -0,0 +1,44 @@
+from typing import Callable
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    acquire takes one, waiting until it is available. Waiters are served in
+    arrival order. pause() empties the bucket for a while, for when the
+    server reports the quota as spent.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Wait for and take one token"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+    
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds`"""
+        self._refill()
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+    
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
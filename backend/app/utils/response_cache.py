@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from app.config.settings import settings
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+import hashlib
+import threading
+import time
+
+
+class CachedResponse:
+    """A serialized response body with its strong ETag"""
+    
+    def __init__(self, body: bytes, tags: Iterable[str], expires_at: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.tags = frozenset(tags)
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    In-process cache of serialized GET responses, invalidated by tag.
+    
+    Each entry is tagged with the tables it was built from; writers call
+    invalidate with the same tags after committing, so entries are dropped
+    exactly when their rows change. The TTL is only a safety net for writes
+    made by other processes and for time-relative queries such as
+    "upcoming matches". A body built while an invalidation happened is
+    served but not stored, since it may predate the write.
+    """
+    
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()  # writers also run on sync threads
+        self.generation = 0  # bumped by every invalidation
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Fresh entry for a key, if any"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            with self._lock:
+                self._remove(key)
+            return None
+        return entry
+    
+    def set(self, key: str, body: bytes, tags: Iterable[str], generation: Optional[int] = None) -> CachedResponse:
+        """
+        Store a serialized body under a key.
+        
+        Args:
+            key: Cache key
+            body: Serialized response body
+            tags: Invalidation tags
+            generation: Value of self.generation before the body was built;
+                if anything was invalidated since, the body is not stored
+        """
+        entry = CachedResponse(body, tags, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return entry
+            self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+    
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of the tags"""
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+    
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+# Process-wide cache used by the API and invalidated by the data services
+response_cache = ResponseCache(ttl_seconds=settings.response_cache_ttl_seconds)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def cached_response(
+    request: Request,
+    tags: Iterable[str],
+    response_type: Any,
+    build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a GET response from the cache, honoring If-None-Match.
+    
+    A conditional request whose ETag is still current gets a 304 without
+    running build, so it never reaches the database.
+    
+    Args:
+        request: Incoming request; its path and query string form the key
+        tags: Invalidation tags for the data the response is built from
+        response_type: Type used to validate and serialize the data
+        build: Coroutine function returning the data on a cache miss
+    
+    Returns:
+        JSON response (200) or Not Modified (304) carrying the ETag
+    """
+    key = f"{request.url.path}?{request.url.query}"
+    entry = response_cache.get(key)
+    if entry is None:
+        generation = response_cache.generation
+        adapter = TypeAdapter(response_type)
+        data = adapter.validate_python(await build(), from_attributes=True)
+        entry = response_cache.set(key, adapter.dump_json(data), tags, generation)
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,46 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await that same task instead of repeating the work. The
+    task is shielded, so a caller that disconnects does not cancel the work
+    for everyone else. Results are not cached: once the task finishes the
+    next call for the key runs again.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn for key, or join the run already in flight.
+
+        Args:
+            key: Identifies the unit of work, e.g. ("predict", match_id, version)
+            fn: Coroutine function doing the work
+
+        Returns:
+            Result of the shared run
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
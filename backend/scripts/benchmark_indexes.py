@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark the composite query indexes on a large synthetic dataset.
+
+Loads teams, matches and predictions into a scratch database, then prints
+the query plan and mean latency of each hot query twice: without the
+composite indexes from migration 004, and again after creating them.
+
+Usage (from backend/):
+    python -m scripts.benchmark_indexes [--matches 200000] [--url sqlite:///./benchmark.db]
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, desc, insert, select, and_, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.config.database import Base
+from app.models.models import Team, Match, Prediction
+import argparse
+import os
+import random
+import tempfile
+import time
+
+# Indexes added by migration 004; dropped for the baseline run
+QUERY_INDEXES = [
+    index
+    for table in (Match.__table__, Prediction.__table__)
+    for index in table.indexes
+    if index.name in ("ix_matches_status_match_date", "ix_matches_home_away_date", "ix_predictions_match_model_created")
+]
+
+MODEL_TYPES = ("POISSON", "ELO", "ENSEMBLE")
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper for a select, keeping its bound parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def load_dataset(engine, n_teams: int, n_matches: int, batch_size: int = 20000):
+    """Insert synthetic teams, matches (past finished, future scheduled) and predictions"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    start = now - timedelta(days=365 * 20)
+    span_seconds = (now + timedelta(days=365) - start).total_seconds()
+
+    with engine.begin() as conn:
+        conn.execute(insert(Team), [
+            {"id": i, "external_id": 1000 + i, "name": f"Team {i}", "short_code": f"T{i:02d}"}
+            for i in range(1, n_teams + 1)
+        ])
+
+        for offset in range(0, n_matches, batch_size):
+            matches, predictions = [], []
+            for match_id in range(offset + 1, min(offset + batch_size, n_matches) + 1):
+                home, away = rng.sample(range(1, n_teams + 1), 2)
+                match_date = start + timedelta(seconds=rng.random() * span_seconds)
+                finished = match_date < now
+                matches.append({
+                    "id": match_id,
+                    "external_id": 100000 + match_id,
+                    "home_team_id": home,
+                    "away_team_id": away,
+                    "match_date": match_date,
+                    "status": "FINISHED" if finished else "SCHEDULED",
+                    "home_goals": rng.randint(0, 4) if finished else None,
+                    "away_goals": rng.randint(0, 3) if finished else None,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                for model_type in MODEL_TYPES:
+                    for version in range(2):
+                        predictions.append({
+                            "match_id": match_id,
+                            "model_type": model_type,
+                            "model_version": f"v{version}",
+                            "home_win_prob": 0.45,
+                            "draw_prob": 0.27,
+                            "away_win_prob": 0.28,
+                            "predicted_home_score": 1.5,
+                            "predicted_away_score": 1.1,
+                            "confidence_score": 0.45,
+                            "created_at": match_date - timedelta(days=2 - version),
+                            "updated_at": now,
+                        })
+            conn.execute(insert(Match), matches)
+            conn.execute(insert(Prediction), predictions)
+
+
+def hot_queries(n_matches: int):
+    """The access patterns the indexes target, shaped like the service queries"""
+    now = datetime.utcnow()
+    match_id = n_matches // 2
+    return {
+        "upcoming matches": select(Match).where(
+            and_(
+                Match.match_date >= now,
+                Match.match_date <= now + timedelta(days=10),
+                Match.status == "SCHEDULED"
+            )
+        ).order_by(Match.match_date).limit(50),
+        "recent matches": select(Match).where(
+            and_(
+                Match.match_date >= now - timedelta(days=30),
+                Match.status == "FINISHED"
+            )
+        ).order_by(desc(Match.match_date)).limit(50),
+        "latest prediction": select(Prediction).where(
+            and_(
+                Prediction.match_id == match_id,
+                Prediction.model_type == "ENSEMBLE"
+            )
+        ).order_by(desc(Prediction.created_at)).limit(1),
+        "head to head": select(Match).where(
+            and_(
+                or_(
+                    and_(Match.home_team_id == 1, Match.away_team_id == 2),
+                    and_(Match.home_team_id == 2, Match.away_team_id == 1)
+                ),
+                Match.status == "FINISHED"
+            )
+        ).order_by(desc(Match.match_date)).limit(10),
+        "external_id lookup": select(Match).where(Match.external_id == 100000 + match_id),
+    }
+
+
+def report(engine, queries, repeat: int) -> dict:
+    """Print each query's plan and return its mean latency in milliseconds"""
+    timings = {}
+    with engine.connect() as conn:
+        for name, query in queries.items():
+            plan = conn.execute(Explain(query)).all()
+            conn.execute(query).all()  # warm the page cache
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(query).all()
+            timings[name] = (time.perf_counter() - started) * 1000 / repeat
+
+            print(f"\n  {name}: {timings[name]:.3f} ms")
+            for row in plan:
+                print(f"    {row[-1]}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Scratch database URL (default: temporary SQLite file)")
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--matches", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=200, help="Executions per timed query")
+    args = parser.parse_args()
+
+    scratch = None
+    url = args.url
+    if url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        url = f"sqlite:///{scratch.name}"
+    engine = create_engine(url)
+
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        for index in QUERY_INDEXES:
+            index.drop(bind=engine)
+
+        started = time.perf_counter()
+        load_dataset(engine, args.teams, args.matches)
+        print(f"Loaded {args.matches} matches and {args.matches * len(MODEL_TYPES) * 2} predictions "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        queries = hot_queries(args.matches)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        print("\nWithout composite indexes:")
+        before = report(engine, queries, args.repeat)
+
+        for index in QUERY_INDEXES:
+            index.create(bind=engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        print("\nWith composite indexes:")
+        after = report(engine, queries, args.repeat)
+
+        print("\nSummary (mean ms per query):")
+        for name in queries:
+            print(f"  {name:<20} {before[name]:>9.3f} -> {after[name]:>9.3f}  ({before[name] / after[name]:.1f}x)")
+    finally:
+        engine.dispose()
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+
+if __name__ == "__main__":
+    main()
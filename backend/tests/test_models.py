@@ -1,16 +1,52 @@
+import asyncio
+import itertools
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+import numpy as np
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
 from app.config.database import Base
-from app.models.models import Team, Match
-from app.ml.poisson_model import PoissonModel
-from datetime import datetime, timedelta
+from app.config.settings import settings
+from app.ml.elo_model import EloModel
+from app.ml.model_registry import ModelRegistry
+from app.ml.poisson_model import PoissonModel, ScoreMatrix
+from app.ml.season_simulator import SeasonSimulator, create_process_pool
+from app.models.models import Team, Match, SyncState
+from app.schemas.schemas import PredictionCreate, TeamResponse
+from app.services import football_data_service
+from app.services.async_database_service import AsyncMatchService, AsyncPredictionService
+from app.services.data_sync_service import DataSyncService
+from app.services.database_service import MatchService, SyncStateService, TeamService, prediction_cache
+from app.services.football_data_service import FootballDataService
+from app.services.model_service import ModelService
+from app.services.rating_service import RatingService
+from app.services.sync_scheduler import SyncScheduler
+from app.utils.http_cache import DiskResponseCache
+from app.utils.pagination import encode_cursor, decode_cursor, split_page
+from app.utils.query_counter import count_queries
+from app.utils.rate_limiter import TokenBucket
+from app.utils.response_cache import ResponseCache, cached_response, response_cache
+from app.utils.single_flight import SingleFlight
+from app.utils.ttl_cache import LRUCache
 
 
 @pytest.fixture
 def test_db():
     """Create in-memory test database"""
-    engine = create_engine("sqlite:///:memory:")
+    # One shared connection, since sync database work also runs on worker threads
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
     Base.metadata.create_all(bind=engine)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
@@ -86,6 +122,11 @@ class TestPoissonModel:
         assert "predicted_home_score" in prediction
         assert "predicted_away_score" in prediction
         
+        # The scoreline grid agrees with the summary fields
+        all_scores = prediction["all_scores"]
+        assert max(all_scores, key=all_scores.get) == prediction["most_likely_score"]
+        assert sum(all_scores.values()) == pytest.approx(1 - prediction["tail_mass"])
+        
         # Probabilities should sum to ~1.0
         total_prob = (
             prediction["home_win_prob"] +
@@ -127,6 +168,1197 @@ class TestPoissonModel:
         # Overall favorite should have some confidence
         assert confidence > 0.25
 
+    def test_combined_prediction(self, sample_teams, sample_matches, test_db):
+        """Test single score-matrix prediction matches the separate calls"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+
+        combined = model.predict(sample_teams[0].id, sample_teams[1].id)
+        prediction = model.predict_match(sample_teams[0].id, sample_teams[1].id)
+        markets = model.predict_markets(sample_teams[0].id, sample_teams[1].id)
+        del prediction["all_scores"]  # only predict_match spells out the grid
+
+        for key, value in {**prediction, **markets}.items():
+            assert combined[key] == value
+
+        # Complementary markets cover the same scoreline grid
+        assert abs(
+            (markets["over_2_5_goals"] + markets["under_2_5_goals"]) -
+            (markets["btts_yes"] + markets["btts_no"])
+        ) < 1e-12
+
+    def test_batch_prediction(self, sample_teams, sample_matches, test_db):
+        """Test vectorized batch prediction agrees with per-fixture prediction"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+
+        # Include an unknown team ID to exercise the neutral fallback
+        fixtures = [
+            (sample_teams[0].id, sample_teams[1].id),
+            (sample_teams[2].id, sample_teams[0].id),
+            (sample_teams[1].id, 999),
+        ]
+        batch = model.predict_many([h for h, _ in fixtures], [a for _, a in fixtures])
+
+        for i, (home_id, away_id) in enumerate(fixtures):
+            single = model.predict(home_id, away_id)
+            assert batch["most_likely_score"][i] == single["most_likely_score"]
+            for key in ("home_win_prob", "draw_prob", "away_win_prob", "over_2_5_goals", "btts_yes"):
+                assert batch[key][i] == pytest.approx(single[key], abs=model.tail_tolerance)
+
+    def test_adaptive_score_grid(self):
+        """Test grid size follows expected goals and reports its tail mass"""
+        low = ScoreMatrix(0.3, 0.2, tolerance=1e-6)
+        high = ScoreMatrix(3.5, 2.8, tolerance=1e-6)
+
+        assert low.max_goals < high.max_goals
+        for matrix in (low, high):
+            assert 0 <= matrix.tail_mass <= 1e-6
+            outcomes = matrix.outcomes()
+            total_prob = outcomes["home_win_prob"] + outcomes["draw_prob"] + outcomes["away_win_prob"]
+            assert total_prob == pytest.approx(1 - matrix.tail_mass, abs=1e-12)
+
+        # Markets stay within the reported tail mass of their exact values
+        markets = high.markets()
+        assert markets["home_clean_sheet"] == pytest.approx(math.exp(-2.8), abs=high.tail_mass + 1e-12)
+        assert markets["away_clean_sheet"] == pytest.approx(math.exp(-3.5), abs=high.tail_mass + 1e-12)
+
+    def test_pair_table_lookup(self, sample_teams, sample_matches, test_db):
+        """Test precomputed all-pairs table matches direct computation"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+
+        n_teams = len(sample_teams)
+        assert model.pair_table.shape[:2] == (n_teams, n_teams)
+
+        for home in sample_teams:
+            for away in sample_teams:
+                matrix = model.score_matrix(home.id, away.id)
+                expected = {**matrix.outcomes(), **matrix.markets()}
+                prediction = model.predict(home.id, away.id)
+                assert prediction["most_likely_score"] == expected["most_likely_score"]
+                for key in ("home_win_prob", "draw_prob", "away_win_prob", "btts_yes", "home_clean_sheet"):
+                    assert prediction[key] == pytest.approx(expected[key], abs=model.tail_tolerance)
+
+        # Retraining on different results rebuilds the table for the new parameters
+        before = model.predict(sample_teams[0].id, sample_teams[1].id)
+        for match in sample_matches:
+            match.home_goals = 4
+        model.estimate_parameters(sample_matches, sample_teams)
+        retrained = model.predict(sample_teams[0].id, sample_teams[1].id)
+        matrix = model.score_matrix(sample_teams[0].id, sample_teams[1].id)
+        assert retrained["predicted_home_score"] > before["predicted_home_score"]
+        assert retrained["home_win_prob"] > before["home_win_prob"]
+        assert retrained["predicted_home_score"] == pytest.approx(matrix.lambda_home)
+        assert retrained["home_win_prob"] == pytest.approx(
+            matrix.outcomes()["home_win_prob"], abs=model.tail_tolerance
+        )
+
+    def test_maximum_likelihood_fit(self, sample_teams, sample_matches, test_db):
+        """Test fitted expected goals reproduce the observed scoring rates"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+
+        # Every sample match finished 2-1, which the model can fit exactly
+        lambda_home, lambda_away = model.expected_goals(sample_teams[0].id, sample_teams[1].id)
+        assert lambda_home == pytest.approx(2.0, rel=1e-3)
+        assert lambda_away == pytest.approx(1.0, rel=1e-3)
+
+        # Teams without matches get league-average strengths
+        assert model.home_attack_param[sample_teams[2].id] == pytest.approx(1.0)
+
+        # Warm-starting from the previous fit converges to the same optimum
+        warm = PoissonModel()
+        warm._fitted_team_ids = model._fitted_team_ids
+        warm._fitted_params = model._fitted_params + 0.1
+        warm.estimate_parameters(sample_matches, sample_teams, warm_start=True)
+        assert warm.expected_goals(sample_teams[0].id, sample_teams[1].id) == pytest.approx(
+            (lambda_home, lambda_away), rel=1e-3
+        )
+
+    def test_incremental_update(self, sample_teams, sample_matches, test_db):
+        """Test a single result nudges the teams involved and refreshes the table"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+        home_id, away_id = sample_teams[2].id, sample_teams[1].id
+
+        before = model.predict(home_id, away_id)
+        model.update_with_result(home_id, away_id, 5, 0)
+        after = model.predict(home_id, away_id)
+
+        assert after["predicted_home_score"] > before["predicted_home_score"]
+        assert after["home_win_prob"] > before["home_win_prob"]
+
+        # Table entries for the updated teams match a fresh computation
+        matrix = model.score_matrix(sample_teams[0].id, home_id)
+        assert model.predict(sample_teams[0].id, home_id)["away_win_prob"] == pytest.approx(
+            matrix.outcomes()["away_win_prob"], abs=model.tail_tolerance
+        )
+
+        # Unseen teams are added to the fit on the fly
+        model.update_with_result(home_id, 999, 1, 1)
+        assert 999 in model.home_attack_param
+        assert model.pair_table.shape[0] == len(sample_teams) + 1
+
+        # A heuristic refit leaves no fit to take a gradient step on
+        model.estimate_parameters([], sample_teams)
+        heuristic = dict(model.home_attack_param)
+        with pytest.raises(ValueError):
+            model.update_with_result(home_id, away_id, 5, 0)
+        assert model.home_attack_param == heuristic
+
+    def test_time_weighted_fit(self, sample_teams, test_db):
+        """Test incremental decayed statistics match a full refit"""
+        start = datetime(2025, 8, 1)
+        matches = []
+        for i in range(40):
+            home, away = sample_teams[i % 3], sample_teams[(i + 1) % 3]
+            match = Match(
+                home_team_id=home.id,
+                away_team_id=away.id,
+                match_date=start + timedelta(days=7 * i),
+                home_goals=(i * 7) % 4,
+                away_goals=(i * 5) % 3,
+                status="FINISHED"
+            )
+            test_db.add(match)
+            matches.append(match)
+        test_db.commit()
+        now = start + timedelta(days=7 * 40)
+
+        full = PoissonModel(half_life_days=60)
+        full.fit_time_weighted(matches, sample_teams, now=now)
+
+        incremental = PoissonModel(half_life_days=60)
+        incremental.fit_time_weighted(matches[:25], sample_teams, now=start + timedelta(days=7 * 25))
+        incremental.fit_time_weighted(matches, sample_teams, now=now)  # already-seen matches are skipped
+
+        assert incremental.match_statistics.match_count == len(matches)
+        assert incremental.expected_goals(sample_teams[0].id, sample_teams[1].id) == pytest.approx(
+            full.expected_goals(sample_teams[0].id, sample_teams[1].id), rel=1e-4
+        )
+
+        # A corrected score replaces the result it was counted with
+        matches[3].home_goals = 6
+        test_db.commit()
+        incremental.fit_time_weighted([matches[3]], sample_teams, now=now)
+        corrected = PoissonModel(half_life_days=60)
+        corrected.fit_time_weighted(matches, sample_teams, now=now)
+        assert incremental.match_statistics.match_count == len(matches)
+        assert incremental.expected_goals(sample_teams[0].id, sample_teams[1].id) == pytest.approx(
+            corrected.expected_goals(sample_teams[0].id, sample_teams[1].id), rel=1e-4
+        )
+        assert corrected.expected_goals(sample_teams[0].id, sample_teams[1].id) != pytest.approx(
+            full.expected_goals(sample_teams[0].id, sample_teams[1].id), rel=1e-3
+        )
+
+        # A history decayed to nothing keeps the previous fit instead of failing
+        expected = full.expected_goals(sample_teams[0].id, sample_teams[1].id)
+        full.fit_time_weighted([], sample_teams, now=now + timedelta(days=365 * 200))
+        assert len(full.match_statistics.arrays()[2]) == 0
+        assert full.expected_goals(sample_teams[0].id, sample_teams[1].id) == expected
+        stale = PoissonModel(half_life_days=0.001)
+        stale.fit_time_weighted(matches, sample_teams, now=now)
+        assert stale.is_trained
+
+        # Older results carry less weight than under an unweighted fit
+        unweighted = PoissonModel()
+        unweighted.estimate_parameters(matches, sample_teams)
+        assert full.expected_goals(sample_teams[0].id, sample_teams[1].id) != pytest.approx(
+            unweighted.expected_goals(sample_teams[0].id, sample_teams[1].id), rel=1e-3
+        )
+
+    def test_model_artifact_roundtrip(self, sample_teams, sample_matches, tmp_path):
+        """Test saved models load as memory maps and predict identically"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+        path = tmp_path / "poisson.model"
+        model.save_model(str(path))
+        saved_bytes = path.read_bytes()
+
+        loaded = PoissonModel.load_model(str(path))
+        assert isinstance(loaded.pair_table.base, np.memmap)
+        for home in sample_teams:
+            for away in sample_teams:
+                assert loaded.predict(home.id, away.id) == model.predict(home.id, away.id)
+
+        # Copy-on-write: updating the loaded model leaves the file untouched
+        loaded.update_with_result(sample_teams[0].id, sample_teams[2].id, 0, 4)
+        model.update_with_result(sample_teams[0].id, sample_teams[2].id, 0, 4)
+        assert loaded.predict(sample_teams[0].id, sample_teams[2].id) == pytest.approx(
+            model.predict(sample_teams[0].id, sample_teams[2].id)
+        )
+        assert path.read_bytes() == saved_bytes
+
+        path.write_bytes(b"not a model")
+        with pytest.raises(ValueError):
+            PoissonModel.load_model(str(path))
+
+
+class TestSeasonSimulator:
+    """Test cases for the Monte Carlo season simulator"""
+
+    def test_simulation_probabilities(self, sample_teams, sample_matches, test_db):
+        """Test simulated standings are consistent and reproducible"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+        team_ids = [team.id for team in sample_teams]
+        fixtures = [(home, away) for home in team_ids for away in team_ids if home != away]
+        kwargs = dict(
+            team_ids=team_ids,
+            current_points=[30, 10, 10],
+            current_goal_difference=[20, 0, -5],
+            current_goals_for=[40, 20, 15],
+            home_team_ids=[home for home, _ in fixtures],
+            away_team_ids=[away for _, away in fixtures],
+            n_simulations=5000,
+            seed=42,
+            top_places=1,
+            relegation_places=1,
+        )
+
+        results = SeasonSimulator(model, chunk_size=1000).simulate(**kwargs)
+        pool = create_process_pool(2)
+        try:
+            parallel = SeasonSimulator(model, executor=pool, chunk_size=1000).simulate(**kwargs)
+        finally:
+            pool.shutdown()
+
+        assert results == parallel
+        assert sum(result["title_prob"] for result in results) == pytest.approx(1.0)
+        assert sum(result["relegation_prob"] for result in results) == pytest.approx(1.0)
+        for result in results:
+            assert sum(result["position_probs"]) == pytest.approx(1.0)
+
+        # A 20 point lead with six games left is nearly always held
+        assert results[0]["title_prob"] > 0.9
+        assert results[0]["expected_points"] > 30
+
+        # Simulated points agree with the model's outcome probabilities
+        for team_id, current, result in zip(team_ids, kwargs["current_points"], results):
+            expected = current
+            for home, away in fixtures:
+                if team_id in (home, away):
+                    prediction = model.predict(home, away)
+                    win = prediction["home_win_prob"] if team_id == home else prediction["away_win_prob"]
+                    expected += 3 * win + prediction["draw_prob"]
+            assert result["expected_points"] == pytest.approx(expected, abs=0.15)
+
+
+class TestEloModel:
+    """Test cases for the streaming Elo engine"""
+
+    def test_replay_populates_ratings(self, sample_teams, sample_matches, test_db):
+        """Test a replay writes ratings back to the teams"""
+        elo = EloModel()
+        applied = RatingService(test_db, elo).rebuild()
+
+        assert applied == len(sample_matches)
+        test_db.refresh(sample_teams[0])
+        test_db.refresh(sample_teams[1])
+        assert sample_teams[0].elo_rating > elo.initial_rating
+        assert sample_teams[1].elo_rating < elo.initial_rating
+        assert sample_teams[0].elo_rating + sample_teams[1].elo_rating == pytest.approx(2 * elo.initial_rating)
+
+        # Ratings are written in the caller's transaction, not committed behind its back
+        test_db.rollback()
+        test_db.refresh(sample_teams[0])
+        assert sample_teams[0].elo_rating == 1850
+
+        probs = elo.predict_match(sample_teams[0].id, sample_teams[1].id)
+        assert sum(probs.values()) == pytest.approx(1.0)
+        assert probs["home_win_prob"] > probs["away_win_prob"]
+
+    def test_late_result_rewinds_to_checkpoint(self, sample_teams, sample_matches, test_db):
+        """Test an out-of-order result matches a full replay"""
+        elo = EloModel()
+        service = RatingService(test_db, elo)
+        service.rebuild()
+
+        late = Match(
+            home_team_id=sample_teams[1].id,
+            away_team_id=sample_teams[2].id,
+            match_date=sample_matches[3].match_date + timedelta(hours=1),
+            home_goals=0,
+            away_goals=3,
+            status="FINISHED"
+        )
+        test_db.add(late)
+        test_db.commit()
+        service.apply_results([late])
+
+        rebuilt = EloModel()
+        RatingService(test_db, rebuilt).rebuild()
+        assert elo.matches_processed == rebuilt.matches_processed == len(sample_matches) + 1
+        for team_id, rating in rebuilt.ratings.items():
+            assert elo.ratings[team_id] == pytest.approx(rating)
+
+
+class TestModelRegistry:
+    """Test cases for the versioned model registry"""
+
+    def test_build_and_swap(self):
+        """Test builds publish new versions and refresh dependent models"""
+        registry = ModelRegistry(history_size=2)
+        registry.register("BASE", lambda previous: (previous or 0) + 1)
+        registry.register("DERIVED", lambda previous: registry.get("BASE").model * 10, dependencies=("BASE",))
+
+        first = asyncio.run(registry.ensure("DERIVED"))
+        assert first.model == 10
+        assert registry.get("BASE").number == 1
+
+        held = registry.get("BASE")
+        registry.build("BASE").result()
+        assert held.model == 1  # versions already handed out are left alone
+        assert registry.get("BASE").model == 2
+        assert registry.get("DERIVED").model == 20
+        assert registry.get("DERIVED").version != first.version
+
+        registry.build("BASE").result()
+        assert [entry.number for entry in registry.versions("BASE")] == [3, 2]
+        registry.shutdown()
+
+    def test_incremental_update_publishes_copy(self, sample_teams, sample_matches):
+        """Test online updates go to a working copy, leaving the published version untouched"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+        registry = ModelRegistry()
+        registry.register("POISSON", lambda previous: model)
+        registry.register("DERIVED", lambda previous: registry.get("POISSON").number, dependencies=("POISSON",))
+        asyncio.run(registry.ensure("DERIVED"))
+
+        held = registry.get("POISSON")
+        before = held.model.predict(sample_teams[0].id, sample_teams[1].id)
+        updated = registry.working_copy("POISSON")
+        updated.model.update_with_result(sample_teams[0].id, sample_teams[1].id, 5, 0)
+        builds = registry.publish_update(updated)
+
+        assert held.model.predict(sample_teams[0].id, sample_teams[1].id) == before
+        assert registry.get("POISSON").model.predict(sample_teams[0].id, sample_teams[1].id) != before
+        assert builds["DERIVED"].result().model == 2  # dependents follow the new version
+
+        # A copy whose model was republished meanwhile is rebuilt, not published over it
+        stale = registry.working_copy("POISSON")
+        stale.model.update_with_result(sample_teams[0].id, sample_teams[1].id, 5, 0)
+        retrained = registry.build("POISSON").result()
+        builds = registry.publish_update(stale)
+        assert builds["POISSON"].result().number == retrained.number + 1
+        assert registry.get("POISSON").model is model  # from the builder, not the stale copy
+        registry.shutdown()
+
+    def test_warm_up_and_scheduled_retrain(self, sample_teams, sample_matches, tmp_path, monkeypatch):
+        """Test startup loads the saved artifact and the scheduler publishes new versions"""
+        model = PoissonModel()
+        model.estimate_parameters(sample_matches, sample_teams)
+        path = tmp_path / "poisson.model"
+        model.save_model(str(path))
+        monkeypatch.setattr(settings, "model_artifact_path", str(path))
+
+        def fail(previous):
+            raise RuntimeError("should load the artifact instead")
+
+        registry = ModelRegistry()
+        registry.register("POISSON", fail)
+        registry.register("ELO", lambda previous: "elo")
+        asyncio.run(ModelService.warm_up(registry))
+        assert registry.get("POISSON").model.predict(sample_teams[0].id, sample_teams[1].id) == model.predict(
+            sample_teams[0].id, sample_teams[1].id
+        )
+        assert registry.get("ELO").model == "elo"
+
+        def refit(previous):
+            refitted = PoissonModel()
+            refitted.estimate_parameters(sample_matches, sample_teams)
+            return refitted
+
+        registry.register("POISSON", refit)
+
+        async def run_scheduler():
+            task = asyncio.create_task(ModelService.retrain_periodically(registry, interval_days=0.5 / 86400))
+            await asyncio.sleep(1.2)
+            task.cancel()
+
+        asyncio.run(run_scheduler())
+        assert 1 < registry.get("POISSON").number <= 4
+        assert registry.get("ELO").number > 1
+        registry.shutdown()
+
+        # A restart measures the artifact's age from its fit, not from loading it
+        model.fitted_at = datetime.utcnow() - timedelta(days=settings.model_retrain_interval_days + 1)
+        model.save_model(str(path))
+        rebuilt_from = []
+        restarted = ModelRegistry()
+        restarted.register("POISSON", lambda previous: rebuilt_from.append(previous.fitted_at) or refit(previous))
+        restarted.register("ELO", lambda previous: "elo")
+        asyncio.run(ModelService.warm_up(restarted))
+        restarted.shutdown()  # waits for the background rebuild
+        assert rebuilt_from == [model.fitted_at]
+        assert ModelService.fitted_at(restarted.get("POISSON")) > model.fitted_at
+
+
+class TestSingleFlight:
+    """Test cases for request coalescing"""
+
+    def test_concurrent_calls_share_one_run(self):
+        """Test callers with the same key await a single execution"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        async def run():
+            same = await asyncio.gather(*(flights.do("a", lambda: work(1)) for _ in range(5)))
+            other = await flights.do("b", lambda: work(2))
+            again = await flights.do("a", lambda: work(3))
+            return same, other, again
+
+        same, other, again = asyncio.run(run())
+        assert same == [2] * 5
+        assert (other, again) == (4, 6)
+        assert calls == [1, 2, 3]  # finished keys run again
+
+    def test_cancelled_caller_does_not_cancel_work(self):
+        """Test a caller going away leaves the shared run for the others"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            leader = asyncio.ensure_future(flights.do("key", work))
+            follower = asyncio.ensure_future(flights.do("key", work))
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == "done"
+
+
+class TestAsyncServices:
+    """Test cases for the async data access path"""
+
+    def test_match_and_prediction_queries(self):
+        """Test async queries return matches with teams loaded and latest predictions"""
+
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+            async with session_factory() as db:
+                home = Team(name="Chelsea", short_code="CHE")
+                away = Team(name="Everton", short_code="EVE")
+                db.add_all([home, away])
+                await db.flush()
+                match = Match(
+                    home_team_id=home.id,
+                    away_team_id=away.id,
+                    match_date=datetime.utcnow() + timedelta(days=1),
+                    status="SCHEDULED"
+                )
+                db.add(match)
+                await db.commit()
+
+                for version in ("v1", "v2"):
+                    await AsyncPredictionService.create_prediction(db, PredictionCreate(
+                        match_id=match.id,
+                        model_type="POISSON",
+                        model_version=version,
+                        home_win_prob=0.5,
+                        draw_prob=0.3,
+                        away_win_prob=0.2,
+                        predicted_home_score=1.5,
+                        predicted_away_score=1.0,
+                        confidence_score=0.5,
+                    ))
+
+            async with session_factory() as db:
+                loaded = await AsyncMatchService.get_match(db, match.id)
+                upcoming = await AsyncMatchService.get_upcoming_matches(db)
+                latest = await AsyncPredictionService.get_latest_prediction(db, match.id, "POISSON", model_version="v1")
+                missing = await AsyncPredictionService.get_latest_prediction(db, match.id, "ELO")
+            await engine.dispose()
+
+            # Written through on create, so served with the engine gone
+            newest = await AsyncPredictionService.get_latest_prediction(None, match.id, "POISSON")
+            return loaded, upcoming, latest, missing, newest
+
+        prediction_cache.clear()
+        loaded, upcoming, latest, missing, newest = asyncio.run(run())
+        # Relationships were loaded eagerly, so they work after the session closed
+        assert (loaded.home_team.name, loaded.away_team.name) == ("Chelsea", "Everton")
+        assert [m.id for m in upcoming] == [loaded.id]
+        assert upcoming[0].away_team.short_code == "EVE"
+        assert latest.model_version == "v1"
+        assert missing is None
+        assert newest.model_version == "v2"
+
+    def test_upsert_predictions(self):
+        """Test a repeated batch overwrites its rows instead of duplicating them"""
+
+        def slate(match_ids, home_win_prob):
+            return [
+                PredictionCreate(
+                    match_id=match_id,
+                    model_type="POISSON",
+                    model_version="v1",
+                    home_win_prob=home_win_prob,
+                    draw_prob=0.3,
+                    away_win_prob=0.7 - home_win_prob,
+                    predicted_home_score=1.5,
+                    predicted_away_score=1.0,
+                    confidence_score=0.5,
+                )
+                for match_id in match_ids
+            ]
+
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+            async with session_factory() as db:
+                home = Team(name="Chelsea", short_code="CHE")
+                away = Team(name="Everton", short_code="EVE")
+                db.add_all([home, away])
+                await db.flush()
+                matches = [
+                    Match(
+                        home_team_id=home.id,
+                        away_team_id=away.id,
+                        match_date=datetime.utcnow() + timedelta(days=day),
+                        status="SCHEDULED"
+                    )
+                    for day in (1, 2)
+                ]
+                db.add_all(matches)
+                await db.commit()
+                match_ids = [match.id for match in matches]
+
+                first = await AsyncPredictionService.upsert_predictions(db, slate(match_ids, 0.4))
+                second = await AsyncPredictionService.upsert_predictions(db, slate(reversed(match_ids), 0.5))
+                stored = await AsyncPredictionService.get_match_predictions(db, match_ids[0])
+            await engine.dispose()
+            return match_ids, first, second, stored
+
+        prediction_cache.clear()
+        match_ids, first, second, stored = asyncio.run(run())
+        assert [p.match_id for p in first] == match_ids
+        assert [p.match_id for p in second] == match_ids[::-1]
+        assert {p.id for p in first} == {p.id for p in second}
+        assert len(stored) == 1
+        assert stored[0].home_win_prob == pytest.approx(0.5)
+        # Written through to the cache as the latest prediction
+        latest = asyncio.run(AsyncPredictionService.get_latest_prediction(None, match_ids[0], "POISSON"))
+        assert latest.home_win_prob == pytest.approx(0.5)
+
+    def test_keyset_pagination(self):
+        """Test cursors walk every match exactly once, including date ties"""
+
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+            async with session_factory() as db:
+                home = Team(name="Chelsea", short_code="CHE")
+                away = Team(name="Everton", short_code="EVE")
+                db.add_all([home, away])
+                await db.flush()
+                kickoff = datetime(2024, 1, 1, 15)
+                db.add_all([
+                    Match(
+                        home_team_id=home.id,
+                        away_team_id=away.id,
+                        match_date=kickoff + timedelta(days=i // 3),  # three per day
+                        status="FINISHED"
+                    )
+                    for i in range(10)
+                ])
+                await db.commit()
+
+                pages, cursor = [], None
+                while True:
+                    after = decode_cursor(cursor) if cursor else None
+                    rows = await AsyncMatchService.list_matches(db, after=after, limit=5)
+                    page, cursor = split_page(rows, 4, "match_date")
+                    pages.append([(m.match_date, m.id) for m in page])
+                    if cursor is None:
+                        break
+            await engine.dispose()
+            return pages
+
+        pages = asyncio.run(run())
+        keys = [key for page in pages for key in page]
+        assert [len(page) for page in pages] == [4, 4, 2]
+        assert keys == sorted(keys, reverse=True)
+        assert len(set(keys)) == 10
+
+        when = datetime(2024, 1, 1, 15, 30)
+        assert decode_cursor(encode_cursor(when, 7)) == (when, 7)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_prediction_cache(self):
+        """Test LRU eviction, TTL expiry and hit/miss counting"""
+        cache = LRUCache(max_size=2, ttl_seconds=60)
+        cache.set((1, "POISSON", "v1"), "a")
+        cache.set((2, "POISSON", "v1"), "b")
+        assert cache.get((1, "POISSON", "v1")) == "a"  # now most recently used
+        cache.set((3, "POISSON", "v1"), "c")
+        assert cache.get((2, "POISSON", "v1")) is None
+        assert cache.get((1, "POISSON", "v1")) == "a"
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+
+        assert cache.discard_where(lambda key: key[0] == 1) == 1
+        assert len(cache) == 1
+
+        expired = LRUCache(ttl_seconds=0)
+        expired.set("key", "value")
+        assert expired.get("key") is None
+
+
+class FakeFootballData:
+    """Canned football-data.org payloads for sync tests, filtered like the API"""
+
+    def __init__(self, n_teams: int = 20):
+        teams = [{"id": 100 + i, "name": f"Team {i}", "tla": f"T{i:02d}"} for i in range(n_teams)]
+        self.now = datetime.utcnow().replace(microsecond=0)
+        kickoff = self.now - timedelta(days=150)
+        self.matches = [
+            {
+                "id": 5000 + i,
+                "utcDate": (kickoff + timedelta(days=i)).isoformat() + "Z",
+                "status": "SCHEDULED",
+                "homeTeam": home,
+                "awayTeam": away,
+                "lastUpdated": (self.now - timedelta(days=200, seconds=i)).isoformat() + "Z",
+            }
+            for i, (home, away) in enumerate(itertools.permutations(teams, 2))
+        ]
+        self.standings = {"standings": [
+            {"type": "TOTAL", "table": [
+                {"team": team, "playedGames": 2, "won": 1, "draw": 1, "lost": 0, "goalsFor": 3, "goalsAgainst": 1}
+                for team in teams
+            ]},
+            {"type": "HOME", "table": [{"team": team, "playedGames": 1} for team in teams]},
+        ]}
+        self.calls = []
+
+    def update(self, index, **fields):
+        """Change a match upstream, bumping its lastUpdated"""
+        self.matches[index].update(fields, lastUpdated=datetime.utcnow().isoformat() + "Z")
+
+    async def get_league_standings(self):
+        return self.standings
+
+    async def get_league_matches(self, days_ahead=None, date_from=None, date_to=None, status=None, max_age=None):
+        if days_ahead:
+            date_from = datetime.utcnow().date()
+            date_to = (datetime.utcnow() + timedelta(days=days_ahead)).date()
+        self.calls.append({"date_from": date_from, "date_to": date_to, "status": status, "max_age": max_age})
+        matches = [m for m in self.matches if status is None or m["status"] == status]
+        if date_from is not None:
+            matches = [m for m in matches if m["utcDate"][:10] >= date_from.isoformat()]
+        if date_to is not None:
+            matches = [m for m in matches if m["utcDate"][:10] <= date_to.isoformat()]
+        return {"matches": matches}
+
+
+class TestDataSync:
+    """Test cases for the bulk, incremental football-data.org sync"""
+
+    def test_bulk_sync_round_trips(self, test_db):
+        """Test a full-season sync uses a handful of statements, not one per row"""
+        api = FakeFootballData()
+        sync = DataSyncService(test_db, api)
+
+        with count_queries() as queries:
+            assert asyncio.run(sync.sync_upcoming_matches(days_ahead=365)) == 230
+        assert queries.count <= 7
+        assert test_db.query(Team).count() == 20
+        assert test_db.query(Match).count() == 230
+
+        # Standings update the existing teams from the TOTAL table only
+        assert asyncio.run(sync.sync_teams()) == 20
+        team = test_db.query(Team).filter(Team.external_id == 100).one()
+        assert (team.matches_played, team.wins, team.goals_for) == (2, 1, 3)
+        assert test_db.query(Team).count() == 20
+
+        # 100 results for fixtures never synced, plus today's stored fixture
+        for index in range(50, 151):
+            api.update(index, status="FINISHED", score={"fullTime": {"home": 2, "away": 1}})
+        test_db.expire_all()
+        with count_queries() as queries:
+            assert asyncio.run(sync.sync_match_results(days_back=365)) == 101
+        assert queries.count <= 7
+        assert test_db.query(Match).filter(Match.status == "FINISHED").count() == 101
+        assert test_db.query(Match).count() == 330
+
+        # Nothing left to apply on a repeat
+        assert asyncio.run(sync.sync_upcoming_matches(days_ahead=365)) == 0
+        assert asyncio.run(sync.sync_match_results()) == 0
+
+    def test_failed_sync_keeps_watermark(self, test_db):
+        """Test an upstream failure raises and leaves the watermark where it was"""
+        api = FakeFootballData()
+        sync = DataSyncService(test_db, api)
+        asyncio.run(sync.sync_match_results())
+        synced_at = test_db.get(SyncState, "match_results").last_synced_at
+
+        async def unavailable(**params):
+            raise httpx.ConnectError("upstream down")
+
+        api.get_league_matches = unavailable
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(sync.sync_match_results())
+        test_db.expire_all()
+        assert test_db.get(SyncState, "match_results").last_synced_at == synced_at
+
+    def test_incremental_sync(self, test_db):
+        """Test later runs fetch only the new window and apply what changed since the watermark"""
+        api = FakeFootballData()
+        sync = DataSyncService(test_db, api)
+        assert asyncio.run(sync.sync_upcoming_matches()) == 15  # today and the next 14 days
+        asyncio.run(sync.sync_match_results())
+        state = test_db.get(SyncState, "match_results")
+        assert state.last_synced_at is not None
+
+        # Yesterday's and today's matches finish; an old match changes unannounced
+        for index in (149, 150):
+            api.update(index, status="FINISHED", score={"fullTime": {"home": 1, "away": 1}})
+        api.matches[0].update(status="FINISHED", score={"fullTime": {"home": 9, "away": 0}})
+        assert asyncio.run(sync.sync_match_results()) == 2  # yesterday's was never a local fixture
+        assert api.calls[-1]["date_from"] == (state.last_synced_at - timedelta(days=1)).date()
+        assert api.calls[-1]["max_age"] == 0  # results always ask upstream
+        assert test_db.query(Match).filter(Match.status == "FINISHED").count() == 2
+
+        # Fixtures entering the window are stored however old their lastUpdated
+        assert asyncio.run(sync.sync_upcoming_matches(days_ahead=28)) == 14
+        assert asyncio.run(sync.sync_upcoming_matches(days_ahead=28)) == 0
+        moved = datetime.utcnow().replace(microsecond=0) + timedelta(days=20)
+        api.update(160, utcDate=moved.isoformat() + "Z")
+        assert asyncio.run(sync.sync_upcoming_matches(days_ahead=28)) == 1
+        assert test_db.query(Match).filter(Match.external_id == 5160).one().match_date == moved
+
+    def test_result_corrections_and_skipped_rows(self, test_db):
+        """Test corrected scores are applied and unstorable results hold the watermark back"""
+        api = FakeFootballData()
+        elo = EloModel()
+        sync = DataSyncService(test_db, api, elo_model=elo)
+        api.update(150, status="FINISHED", score={"fullTime": {"home": 1, "away": 0}})
+        assert asyncio.run(sync.sync_match_results()) == 1
+
+        api.update(150, score={"fullTime": {"home": 1, "away": 1}})
+        assert asyncio.run(sync.sync_match_results()) == 1
+        assert [match.external_id for match in sync.corrected] == [5150]
+        assert test_db.query(Match).filter(Match.external_id == 5150).one().away_goals == 1
+
+        # A result whose home team is unknown upstream is skipped, not lost
+        api.update(149, status="FINISHED", score={"fullTime": {"home": 0, "away": 0}}, homeTeam={"id": 999})
+        api.update(150, score={"fullTime": {"home": 2, "away": 1}})  # applied, and updated later
+        assert asyncio.run(sync.sync_match_results()) == 1
+        api.matches[149]["homeTeam"] = {"id": 999, "name": "Late Team", "tla": "LTE"}  # lastUpdated not bumped
+        assert asyncio.run(sync.sync_match_results()) == 1
+        assert test_db.query(Match).filter(Match.external_id == 5149).one().home_goals == 0
+
+        # Corrections replay the ratings instead of counting both scores
+        rebuilt = EloModel()
+        RatingService(test_db, rebuilt).rebuild()
+        assert elo.matches_processed == rebuilt.matches_processed == 2
+        for team_id, rating in rebuilt.ratings.items():
+            assert elo.ratings[team_id] == pytest.approx(rating)
+
+
+class TestSyncScheduler:
+    """Test cases for the in-process sync scheduler"""
+
+    def test_job_lease(self, test_db):
+        """Test one worker at a time holds a job, until it releases or the lease expires"""
+        assert SyncStateService.acquire_lease(test_db, "fixtures", "a", 60)
+        assert not SyncStateService.acquire_lease(test_db, "fixtures", "b", 60)
+        assert SyncStateService.acquire_lease(test_db, "fixtures", "a", 60)  # renewal
+        assert SyncStateService.acquire_lease(test_db, "standings", "b", 60)
+
+        SyncStateService.release_lease(test_db, "fixtures", "a")
+        assert SyncStateService.acquire_lease(test_db, "fixtures", "b", 60)
+
+        # A dead worker's lease lapses
+        test_db.get(SyncState, "fixtures").locked_until = datetime.utcnow() - timedelta(seconds=1)
+        test_db.commit()
+        assert SyncStateService.acquire_lease(test_db, "fixtures", "a", 60)
+
+    def test_results_cadence(self, test_db, sample_teams):
+        """Test results are polled fast during matches and otherwise wait for the next kickoff"""
+        now = datetime.utcnow()
+        live = settings.sync_results_live_interval_seconds
+        idle = settings.sync_results_idle_interval_seconds
+        assert SyncScheduler.next_results_delay(test_db, now) == idle
+
+        match = Match(
+            home_team_id=sample_teams[0].id,
+            away_team_id=sample_teams[1].id,
+            match_date=now - timedelta(hours=1),
+            status="SCHEDULED"
+        )
+        test_db.add(match)
+        test_db.commit()
+        assert SyncScheduler.next_results_delay(test_db, now) == live
+
+        match.status = "FINISHED"
+        test_db.commit()
+        assert SyncScheduler.next_results_delay(test_db, now) == idle
+
+        test_db.add(Match(
+            home_team_id=sample_teams[1].id,
+            away_team_id=sample_teams[2].id,
+            match_date=now + timedelta(seconds=idle / 2),
+            status="SCHEDULED"
+        ))
+        test_db.commit()
+        assert SyncScheduler.next_results_delay(test_db, now) == pytest.approx(idle / 2)
+        assert SyncScheduler.next_results_delay(test_db, now + timedelta(seconds=idle / 2 - 1)) == live
+
+    def test_run_job_respects_lease(self, test_db):
+        """Test a job is skipped while another worker holds it, runs its database work off the event loop and releases its lease"""
+        api = FakeFootballData()
+        scheduler = SyncScheduler(api, ModelRegistry(), session_factory=sessionmaker(bind=test_db.get_bind()))
+
+        assert SyncStateService.acquire_lease(test_db, "standings", "other-worker", 60)
+        assert asyncio.run(scheduler.run_job("standings")) == 0
+        assert test_db.query(Team).count() == 0
+
+        SyncStateService.release_lease(test_db, "standings", "other-worker")
+        threads = set()
+        listener = lambda *args: threads.add(threading.get_ident())
+        event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+
+        async def run():
+            loop_thread = threading.get_ident()
+            synced = await scheduler.run_job("standings")
+            delay = await scheduler.results_delay()
+            return synced, delay, loop_thread
+
+        synced, delay, loop_thread = asyncio.run(run())
+        event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+        assert synced == 20
+        assert delay == settings.sync_results_idle_interval_seconds
+        assert threads and loop_thread not in threads  # no statement ran on the event loop
+
+        test_db.expire_all()
+        state = test_db.get(SyncState, "standings")
+        assert state.locked_by is None
+        assert state.last_synced_at is not None
+
+    def test_results_publish_updated_copies(self, test_db):
+        """Test a results sync publishes updated copies, refits on corrections and retries failed refreshes"""
+
+        class RecordingModel:
+            is_trained = True
+
+            def __init__(self):
+                self.results = []
+
+            def update_with_result(self, home_team_id, away_team_id, home_goals, away_goals):
+                self.results.append((home_goals, away_goals))
+
+        builds = []
+        registry = ModelRegistry()
+        registry.register("POISSON", lambda previous: builds.append("POISSON") or RecordingModel())
+        registry.register("ELO", lambda previous: EloModel())
+        registry.register(
+            "ENSEMBLE",
+            lambda previous: (registry.get("POISSON").model, registry.get("ELO").model),
+            dependencies=("POISSON", "ELO")
+        )
+        asyncio.run(registry.ensure("ENSEMBLE"))
+        held = registry.get("POISSON")
+
+        api = FakeFootballData()
+        scheduler = SyncScheduler(api, registry, session_factory=sessionmaker(bind=test_db.get_bind()))
+        refreshed = []
+
+        async def refresh_predictions():
+            refreshed.append(registry.get("ENSEMBLE").model)
+            if len(refreshed) == 1:
+                raise RuntimeError("database unavailable")
+
+        scheduler.refresh_predictions = refresh_predictions
+
+        api.update(150, status="FINISHED", score={"fullTime": {"home": 2, "away": 1}})
+        with pytest.raises(RuntimeError):
+            asyncio.run(scheduler.run_job("match_results"))
+        poisson, elo = registry.get("POISSON").model, registry.get("ELO").model
+        assert poisson.results == [(2, 1)] and held.model.results == []
+        assert elo.matches_processed == 1
+        assert refreshed == [(poisson, elo)]  # ENSEMBLE was rebuilt from both copies first
+        assert builds == ["POISSON"]  # no full refit
+
+        # The results committed; the failed refresh runs after the next sync
+        assert asyncio.run(scheduler.run_job("match_results")) == 0
+        assert len(refreshed) == 2
+
+        # A correction cannot be applied online, so POISSON is refit
+        api.update(150, score={"fullTime": {"home": 2, "away": 2}})
+        assert asyncio.run(scheduler.run_job("match_results")) == 1
+        assert builds == ["POISSON", "POISSON"]
+        assert registry.get("ENSEMBLE").model[0] is registry.get("POISSON").model
+        assert registry.get("ELO").model.matches_processed == 1
+
+        # A retrain published mid-sync is rebuilt on, not replaced by the older copy
+        fetch = api.get_league_matches
+
+        async def fetch_during_retrain(**kwargs):
+            registry.build("POISSON").result()
+            return await fetch(**kwargs)
+
+        api.get_league_matches = fetch_during_retrain
+        api.update(149, status="FINISHED", score={"fullTime": {"home": 0, "away": 3}})
+        assert asyncio.run(scheduler.run_job("match_results")) == 1
+        assert builds == ["POISSON"] * 4  # the retrain, then a rebuild instead of the stale copy
+        assert registry.get("POISSON").model.results == []
+        assert registry.get("ELO").model.matches_processed == 2  # its copy was still current
+        assert registry.get("ENSEMBLE").model == (registry.get("POISSON").model, registry.get("ELO").model)
+        registry.shutdown()
+
+
+class TestFootballDataService:
+    """Test cases for the rate-limited football-data.org client"""
+
+    def test_token_bucket(self):
+        """Test acquisitions beyond the burst are spread at the refill rate"""
+
+        async def run():
+            bucket = TokenBucket(rate=50, capacity=2)
+            started = time.monotonic()
+            for _ in range(5):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        assert asyncio.run(run()) >= 0.05  # three tokens at 50 per second
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+    def test_retries_and_bulk_fetch(self, monkeypatch):
+        """Test 429/5xx responses are retried and bulk fetches skip failures"""
+        monkeypatch.setattr(football_data_service, "RETRY_BASE_SECONDS", 0.001)
+        calls = {}
+
+        def handler(request):
+            match_id = int(request.url.path.rsplit("/", 1)[-1])
+            calls[match_id] = calls.get(match_id, 0) + 1
+            if match_id == 404:
+                return httpx.Response(404)
+            if match_id == 1 and calls[match_id] == 1:
+                return httpx.Response(503)
+            if match_id == 1 and calls[match_id] == 2:
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return httpx.Response(200, json={"id": match_id})
+
+        async def run():
+            service = FootballDataService(transport=httpx.MockTransport(handler))
+            service.rate_limiter = TokenBucket(rate=1000, capacity=10)
+            service.cache = None
+            try:
+                return await service.get_many_match_details([1, 2, 3, 404, 2])
+            finally:
+                await service.close()
+
+        details = asyncio.run(run())
+        assert details == {1: {"id": 1}, 2: {"id": 2}, 3: {"id": 3}}
+        assert calls[1] == 3
+        assert calls[2] == 1  # duplicate IDs are fetched once
+        assert calls[404] == 1  # client errors are not retried
+
+        async def fetch_one(match_id):
+            service = FootballDataService(transport=httpx.MockTransport(handler))
+            service.rate_limiter = TokenBucket(rate=1000, capacity=10)
+            service.cache = None
+            try:
+                return await service.get_match_details(match_id)
+            finally:
+                await service.close()
+
+        # A single fetch reports the failure instead of returning an empty body
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(fetch_one(404))
+
+
+    def test_conditional_cache_and_offline_replay(self, tmp_path):
+        """Test entries with ETags are always revalidated, others kept for the TTL unless bypassed, and replayed offline"""
+        requests = []
+
+        def handler(request):
+            requests.append(request.headers.get("if-none-match"))
+            if request.url.path.startswith("/v4/matches/") or request.url.path.endswith("/matches"):
+                return httpx.Response(200, json={"id": 1})  # no validators
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(200, json={"standings": []}, headers={"ETag": '"v1"'})
+
+        def offline_handler(request):
+            raise AssertionError("offline mode must not call the API")
+
+        def client(handler, ttl_seconds, offline=False):
+            service = FootballDataService(transport=httpx.MockTransport(handler))
+            service.rate_limiter = TokenBucket(rate=1000, capacity=10)
+            service.cache = DiskResponseCache(str(tmp_path), ttl_seconds=ttl_seconds)
+            service.offline = offline
+            return service
+
+        async def fetch(handler, ttl_seconds, offline=False):
+            service = client(handler, ttl_seconds, offline)
+            try:
+                return await service.get_league_standings(), await service.get_match_details(1)
+            finally:
+                await service.close()
+
+        async def poll_results(max_age):
+            service = client(handler, ttl_seconds=3600)
+            try:
+                return await service.get_league_matches(status="FINISHED", max_age=max_age)
+            finally:
+                await service.close()
+
+        standings, _ = asyncio.run(fetch(handler, ttl_seconds=0))
+        assert standings == {"standings": []}
+        asyncio.run(fetch(handler, ttl_seconds=0))  # stale: standings revalidated (304), match refetched
+        asyncio.run(fetch(handler, ttl_seconds=3600))  # fresh: standings still revalidated, match from disk
+        assert requests == [None, None, '"v1"', None, '"v1"']
+
+        # Live result polls skip the TTL; other callers still reuse the entry
+        del requests[:]
+        for max_age in (0, 0, None):
+            asyncio.run(poll_results(max_age))
+        assert requests == [None, None]
+
+        standings, _ = asyncio.run(fetch(offline_handler, ttl_seconds=0, offline=True))
+        assert standings == {"standings": []}
+
+        tmp_path = tmp_path / "empty"
+        with pytest.raises(football_data_service.OfflineCacheMiss):  # nothing recorded, and no request
+            asyncio.run(fetch(offline_handler, ttl_seconds=0, offline=True))
+
+
+class TestQueryCount:
+    """Test cases guarding against lazy-load (N+1) regressions"""
+
+    def test_match_queries_load_teams_eagerly(self, test_db, sample_teams, sample_matches):
+        """Test match lists cost one query however many team names are read"""
+        home_id, away_id = sample_teams[0].id, sample_teams[1].id
+        match_id = sample_matches[0].id
+        queries = {
+            "match": lambda: [MatchService.get_match(test_db, match_id)],
+            "recent": lambda: MatchService.get_recent_matches(test_db),
+            "team": lambda: MatchService.get_team_recent_matches(test_db, home_id),
+            "h2h": lambda: MatchService.head_to_head(test_db, home_id, away_id),
+        }
+        for name, query in queries.items():
+            test_db.expunge_all()
+            with count_queries() as counter:
+                matches = query()
+                names = [(m.home_team.name, m.away_team.name) for m in matches]
+            assert names, name
+            assert counter.count == 1, name
+
+    def test_async_match_queries_are_bounded(self):
+        """Test async match lists use a fixed number of queries"""
+
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+            async with session_factory() as db:
+                teams = [Team(name=f"Team {i}", short_code=f"T{i}") for i in range(6)]
+                db.add_all(teams)
+                await db.flush()
+                db.add_all([
+                    Match(
+                        home_team_id=teams[i].id,
+                        away_team_id=teams[(i + 1) % 6].id,
+                        match_date=datetime.utcnow() + timedelta(days=i + 1),
+                        status="SCHEDULED"
+                    )
+                    for i in range(6)
+                ])
+                await db.commit()
+
+            async with session_factory() as db:
+                with count_queries() as counter:
+                    matches = await AsyncMatchService.get_upcoming_matches(db)
+            await engine.dispose()
+            return matches, counter.count
+
+        matches, count = asyncio.run(run())
+        assert len({m.home_team.name for m in matches}) == 6
+        assert count == 3  # matches, then one IN query per team relationship
+
+
+class TestResponseCache:
+    """Test cases for the ETag response cache"""
+
+    def test_tag_invalidation(self):
+        """Test entries are dropped by tag and stale builds are not stored"""
+        cache = ResponseCache(ttl_seconds=60)
+        cache.set("/teams?", b"[]", ["teams"])
+        cache.set("/matches/upcoming?", b"[]", ["matches", "teams"])
+        cache.set("/matches/1?", b"{}", ["predictions:1"])
+
+        cache.invalidate("matches")
+        assert cache.get("/matches/upcoming?") is None
+        assert cache.get("/teams?") is not None
+
+        generation = cache.generation
+        cache.invalidate("teams")
+        cache.set("/teams?", b"[]", ["teams"], generation)  # built before the write
+        assert cache.get("/teams?") is None
+        assert cache.get("/matches/1?") is not None
+
+        expired = ResponseCache(ttl_seconds=0)
+        expired.set("/teams?", b"[]", ["teams"])
+        assert expired.get("/teams?") is None
+
+    def test_conditional_get(self, sample_teams, test_db):
+        """Test a matching If-None-Match gets a 304 without rebuilding"""
+        builds = []
+
+        async def load():
+            builds.append(1)
+            return sample_teams
+
+        def request(headers=()):
+            return Request({
+                "type": "http",
+                "method": "GET",
+                "path": "/api/v1/teams/",
+                "query_string": b"",
+                "headers": [(name.encode(), value.encode()) for name, value in headers],
+            })
+
+        response_cache.invalidate("teams")
+        first = asyncio.run(cached_response(request(), ["teams"], List[TeamResponse], load))
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+
+        revalidated = asyncio.run(cached_response(request([("if-none-match", etag)]), ["teams"], List[TeamResponse], load))
+        assert revalidated.status_code == 304
+        assert builds == [1]
+
+        TeamService.update_team_stats(test_db, sample_teams[0].id, wins=5)  # invalidates "teams"
+        rebuilt = asyncio.run(cached_response(request([("if-none-match", etag)]), ["teams"], List[TeamResponse], load))
+        assert rebuilt.status_code == 200
+        assert builds == [1, 1]
+
 
 class TestDatabaseModels:
     """Test cases for database models"""